@@ -15,6 +15,9 @@ from benchmark.core.simulated_student import SimulatedStudent, ExpertPersona, No
 from benchmark.core.runner import BenchmarkRunner
 from benchmark.reporting.data_serializer import BenchmarkDataSerializer
 
+# Only the judges are cached by default: re-judging an unchanged question adds cost, not information
+DEFAULT_LLM_CACHE = "evaluator,topic_labeler"
+
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Run Adaptive AI Benchmarking")
@@ -23,6 +26,11 @@ def parse_arguments():
     parser.add_argument("--turns", type=int, default=10, help="Number of turns to simulate")
     parser.add_argument("--sleep", type=float, default=0, 
                        help="Sleep duration between turns in seconds (default: 0)")
+    parser.add_argument("--llm-cache", type=str, default=os.environ.get("MCQ_LLM_CACHE", DEFAULT_LLM_CACHE),
+                       help="Components whose LLM responses are cached on disk: all, none, or a comma-separated "
+                            f"list of agents, evaluator, topic_labeler, student (default: {DEFAULT_LLM_CACHE}). "
+                            "Caching agents replays the system under test and caching the student replays its "
+                            "temperature-0.7 samples, so both are opt-in")
     return parser.parse_args()
 
 
@@ -59,6 +67,14 @@ def execute_benchmark(persona, turns, sleep_duration) -> dict:
     return runner.run()
 
 
+def print_llm_cache_summary(stats: dict):
+    if not stats['enabled']:
+        return
+    calls = stats['hits'] + stats['misses']
+    print(f"LLM cache: {stats['hits']}/{calls} responses replayed, "
+          f"{stats['saved_input_tokens']} input and {stats['saved_output_tokens']} output tokens saved")
+
+
 def main():
     args = parse_arguments()
     
@@ -67,6 +83,9 @@ def main():
     # Configure content path for the benchmark using absolute path
     benchmark_dir = os.path.dirname(os.path.abspath(__file__))
     os.environ["CONTENT_PATH"] = os.path.join(benchmark_dir, "content", "SD-Com.txt")
+    os.environ["MCQ_SUBTOPICS_PATH"] = os.path.join(benchmark_dir, "content", "subtopics.json")
+    # Re-running on unchanged inputs replays cached responses instead of calling the API
+    os.environ["MCQ_LLM_CACHE"] = args.llm_cache
     
     print(f"Initializing benchmark for {args.persona} with {args.turns} turns...")
     
@@ -75,6 +94,7 @@ def main():
     
     data_path = save_benchmark_data(raw_data, output_dir)
     print(f"\nBenchmark data saved to {data_path}")
+    print_llm_cache_summary(raw_data['metadata']['llm_cache'])
     print(f"To generate report, run: python generate_report.py {data_path}")
 
 if __name__ == "__main__":
@@ -1,11 +1,11 @@
 from typing import List
 from langchain_core.messages import HumanMessage, SystemMessage
-from final.agents import create_model
+from final.agents import get_model
 import re
 
 class BenchmarkEvaluator:
     def __init__(self):
-        self.llm = create_model()
+        self.llm = get_model("evaluator")
 
     def evaluate_difficulty(self, question: str, options: List[str]) -> int:
         """
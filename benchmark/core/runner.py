@@ -16,11 +16,17 @@ from final.nodes import (
     route_orchestrator,
     route_after_feedback,
     route_after_question_creation,
-    route_after_difficulty_review
+    route_after_difficulty_review,
+    route_after_present,
+    question_pool
 )
 from benchmark.core.simulated_student import SimulatedStudent
 from benchmark.core.evaluator import BenchmarkEvaluator
 from benchmark.core.topic_labeler import TopicLabeler
+from final.llm_cache import llm_cache_stats
+from final.prompt_cache import summarize_prompt_cache
+from final.streaming import ConsoleRenderer, stream_turn
+from services.analytics import AnswerAnalytics
 
 class BenchmarkRunner:
     def __init__(self, student: SimulatedStudent, turns: int = 10, sleep_duration: float = 0):
@@ -82,7 +88,15 @@ class BenchmarkRunner:
             }
         )
 
-        workflow.add_edge("present_question", END)
+        workflow.add_conditional_edges(
+        "present_question",
+        route_after_present,
+        {
+            "get_feedback": "get_feedback",
+            "create_question": "create_question",
+            "end": END
+        }
+    )
         
         return workflow.compile()
 
@@ -90,12 +104,13 @@ class BenchmarkRunner:
         """Runs the benchmark and returns raw results data."""
         print(f"Starting benchmark for persona: {self.student.persona.__class__.__name__} with {self.turns} turns.")
         
-        # We need to patch the service in both locations:
-        # 1. tools.tools.mcq_service: used by the actual Tools (get_performance_tool, etc)
-        # 2. final.nodes.mcq_service: used by the Agent Nodes to build context
-        with patch('tools.tools.mcq_service') as mock_service:
-            with patch('final.nodes.mcq_service', new=mock_service):
-                self._run_benchmark_loop(mock_service)
+        # Without a session_id in the state, both the Tools (get_performance_tool, etc)
+        # and the Agent Nodes resolve tools.tools.mcq_service, so one patch covers both
+        # The question pool is disabled: every turn must generate its question against
+        # the student's performance at that turn, which is what the benchmark measures
+        with patch('tools.tools.mcq_service') as mock_service, \
+             patch.object(question_pool, 'depth', 0):
+            self._run_benchmark_loop(mock_service)
                 
         return self._prepare_raw_results()
 
@@ -115,10 +130,11 @@ class BenchmarkRunner:
         self._update_mock_service(mock_service, history)
         
         try:
-            result = self.workflow.invoke(state)
+            result, timing = stream_turn(self.workflow, state, ConsoleRenderer())
             turn_result = self._process_turn_result(result, turn)
             
             if turn_result:
+                turn_result.update(timing)
                 history.append({
                     'is_correct': turn_result['is_correct'],
                     'answered_at': time.time()
@@ -144,6 +160,7 @@ class BenchmarkRunner:
             'score_percentage': 0.0,
             'recent_performance': []
         }
+        mock_service.get_mastery_analytics.return_value = AnswerAnalytics().snapshot()
 
     def _get_initial_state(self):
         return {
@@ -183,7 +200,9 @@ class BenchmarkRunner:
             "subtopics": subtopic_ids,
             "is_correct": is_correct,
             "student_answer": student_answer_letter,
-            "correct_answer": chr(65 + correct_idx)
+            "correct_answer": chr(65 + correct_idx),
+            "input_tokens": result.get("input_tokens", 0),
+            "prompt_cache_calls": result.get("prompt_cache_calls", [])
         }
 
     def _update_mock_service(self, mock_service, history):
@@ -206,6 +225,11 @@ class BenchmarkRunner:
             'recent_performance': recent
         }
         
+        analytics = AnswerAnalytics()
+        for h in history:
+            analytics.record(h['is_correct'])
+        mock_service.get_mastery_analytics.return_value = analytics.snapshot()
+        
         mock_service.get_last_question_id.return_value = "mock_id"
 
     def _sleep_with_progress(self, current_turn: int):
@@ -217,6 +241,18 @@ class BenchmarkRunner:
         
         print()
 
+    def _average_input_tokens(self) -> float:
+        """Average LLM prompt tokens spent to generate each presented question."""
+        if not self.results:
+            return 0.0
+        return sum(r['input_tokens'] for r in self.results) / len(self.results)
+
+    def _average(self, key: str) -> float:
+        """Average of a per-turn timing over the completed turns."""
+        if not self.results:
+            return 0.0
+        return sum(r[key] for r in self.results) / len(self.results)
+
     def _prepare_raw_results(self) -> Dict:
         """Prepare raw results for serialization."""
         return {
@@ -224,7 +260,14 @@ class BenchmarkRunner:
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
                 'turns_planned': self.turns,
                 'turns_completed': len(self.results),
-                'persona_type': self.student.persona.__class__.__name__
+                'persona_type': self.student.persona.__class__.__name__,
+                'avg_input_tokens_per_question': self._average_input_tokens(),
+                'avg_first_visible_token_s': self._average('first_visible_token_s'),
+                'avg_turn_latency_s': self._average('turn_latency_s'),
+                'llm_cache': llm_cache_stats(),
+                'prompt_cache': summarize_prompt_cache(
+                    [call for r in self.results for call in r['prompt_cache_calls']]
+                )
             },
             'persona_config': {
                 'true_level': self.student.persona.true_level,
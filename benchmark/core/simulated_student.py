@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 from typing import List
 import re
 from langchain_core.messages import HumanMessage, SystemMessage
-from final.agents import create_model
+from final.agents import get_model
 
 class PersonaStrategy(ABC):
     """Abstract base class for student personas."""
@@ -113,7 +113,7 @@ Persona: LEARNER. You start with low knowledge but learn from feedback (simulate
 
 class SimulatedStudent:
     def __init__(self, persona: PersonaStrategy):
-        self.llm = create_model()
+        self.llm = get_model("student")
         self.persona = persona
         self.turn_count = 0
         
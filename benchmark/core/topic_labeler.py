@@ -3,7 +3,8 @@ import os
 import re
 from typing import List
 from langchain_core.messages import HumanMessage, SystemMessage
-from final.agents import create_model
+from final.agents import get_model
+from services.subtopic_map import SubtopicMap, load_subtopic_map
 
 
 class SubtopicLoader:
@@ -21,13 +22,20 @@ class SubtopicLoader:
         with open(subtopics_path, 'r', encoding='utf-8') as f:
             return json.load(f)
 
+    def load_subtopic_map(self) -> SubtopicMap:
+        """Load the subtopic -> course passage map (precomputed once per content hash)."""
+        content_path = os.path.join(os.path.dirname(__file__), "..", "content", "SD-Com.txt")
+        return load_subtopic_map(content_path, self.load_subtopics())
+
 
 class TopicLabeler:
     """Labels questions with relevant subtopic IDs using LLM."""
     
     def __init__(self):
-        self.llm = create_model()
-        self.subtopics = SubtopicLoader().load_subtopics()
+        self.llm = get_model("topic_labeler")
+        loader = SubtopicLoader()
+        self.subtopics = loader.load_subtopics()
+        self.subtopic_map = loader.load_subtopic_map()
     
     def label_question(self, question: str, options: List[str]) -> List[int]:
         """Returns list of subtopic indices (0-based) covered in question."""
@@ -68,7 +76,14 @@ Here are some guidelines to help you:
 Response:"""
     
     def _format_subtopics_for_prompt(self) -> str:
-        return "\n".join([f"{i}. {topic}" for i, topic in enumerate(self.subtopics)])
+        return "\n".join([self._format_subtopic(i, topic) for i, topic in enumerate(self.subtopics)])
+
+    def _format_subtopic(self, topic_id: int, topic: str) -> str:
+        """Topic with the course section that covers it, when its name alone does not say it"""
+        location = self.subtopic_map.location(topic_id)
+        if location is None or location['section_title'].lower() in topic.lower():
+            return f"{topic_id}. {topic}"
+        return f"{topic_id}. {topic} (section: {location['section_title']})"
     
     def _invoke_llm(self, prompt: str) -> str:
         response = self.llm.invoke([
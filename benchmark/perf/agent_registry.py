@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions endpoint that answers immediately; one instance per TCP connection"""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def completion(self, request: dict) -> dict:
+        return COMPLETION
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = json.dumps(self.completion(request)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency_ms: float, handler=StubHandler) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    server.latency = latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Per-call agent setup overhead: a new model + agent per node call vs the process-wide registry"
+    )
+    parser.add_argument("--calls", type=int, default=50, help="Agent invocations per scenario")
+    parser.add_argument("--threads", type=int, default=8, help="Threads for the concurrent scenario")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated API latency of the stub server")
+    return parser.parse_args()
+
+
+def run(server, label: str, calls: int, get_agent, threads: int = 1):
+    """Invoke get_agent() once per call, timing setup and invocation separately"""
+    from langchain_core.messages import HumanMessage
+
+    connections, requests = server.connections, server.requests
+    setup, total = [], []
+
+    def call(_):
+        start = time.perf_counter()
+        agent = get_agent()
+        built = time.perf_counter()
+        agent.invoke({"messages": [HumanMessage(content="Genera una pregunta")]})
+        setup.append(built - start)
+        total.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:>34} | {sum(setup) / calls * 1000:>9.2f} | {sum(total) / calls * 1000:>9.2f} | "
+          f"{calls / elapsed:>8.1f} | {server.requests - requests:>8} | {server.connections - connections:>11}")
+    return sum(total) / calls
+
+
+def main():
+    args = parse_arguments()
+    server = start_stub_server(args.latency_ms)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    from langchain.agents import create_agent
+    from langchain_openai import ChatOpenAI
+    from final import agents
+
+    def build_per_call():
+        # What the nodes did before: a new client, connection pool and compiled graph per invocation
+        llm = ChatOpenAI(model="gpt-4o", temperature=0.7, max_tokens=2048, timeout=None, max_retries=2)
+        return create_agent(llm, [agents.get_performance_tool])
+
+    builds = 0
+    original_builder = agents.AGENT_BUILDERS["difficulty_reviewer"]
+
+    def counted_builder():
+        nonlocal builds
+        builds += 1
+        return original_builder()
+
+    agents.AGENT_BUILDERS["difficulty_reviewer"] = counted_builder
+
+    print(f"Stub server at {os.environ['OPENAI_BASE_URL']} ({args.latency_ms:.0f} ms latency), {args.calls} calls")
+    print(f"{'scenario':>34} | {'setup ms':>9} | {'call ms':>9} | {'calls/s':>8} | {'requests':>8} | {'connections':>11}")
+    print("-" * 96)
+    before = run(server, "before: new agent per call", args.calls, build_per_call)
+    after = run(server, "after: registry", args.calls, agents.get_difficulty_reviewer_agent)
+    run(server, f"after: registry, {args.threads} threads", args.calls,
+        agents.get_difficulty_reviewer_agent, threads=args.threads)
+    print(f"\nPer-call overhead removed: {(before - after) * 1000:.2f} ms ({before / after:.1f}x); "
+          f"reviewer agent built {builds} time(s) across {args.calls * 2} registry calls")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from benchmark.perf.agent_registry import COMPLETION, StubHandler, start_stub_server
+
+DEFAULT_CONTENT = os.path.join(ROOT, "benchmark", "content", "SD-Com.txt")
+
+
+class GraphStubHandler(StubHandler):
+    """Answers each agent of the graph in the format its node parses: question JSON, review JSON or text"""
+    counter = itertools.count()
+    vocabulary = []
+
+    def completion(self, request: dict) -> dict:
+        system = next((m.get("content") for m in request.get("messages", []) if m.get("role") == "system"), "")
+        system = system if isinstance(system, str) else json.dumps(system)
+        if "revisor de dificultad" in system:
+            content = json.dumps({"approved": True, "feedback": "Dificultad adecuada"})
+        elif "patrones de aprendizaje" in system:
+            content = "El usuario domina los conceptos básicos."
+        else:
+            # Different words every time, so the near-duplicate check never rejects a question
+            words = random.Random(next(self.counter)).sample(self.vocabulary, 8)
+            content = json.dumps({
+                "question": f"¿Qué relación hay entre {' '.join(words)}?",
+                "options": words[:4],
+                "correct_index": 0
+            }, ensure_ascii=False)
+        return {**COMPLETION, "choices": [{**COMPLETION["choices"][0],
+                                           "message": {"role": "assistant", "content": content}}]}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Turn throughput vs concurrency of the graph: sync invoke (threads) vs async ainvoke"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64],
+                        help="Sessions running at the same time")
+    parser.add_argument("--turns", type=int, default=3, help="Question requests per session")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Simulated LLM latency per call")
+    parser.add_argument("--content", default=DEFAULT_CONTENT, help="Course text the creator reads")
+    return parser.parse_args()
+
+
+def report(label: str, concurrency: int, latencies: list, elapsed: float, threads: int):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:>6} | {concurrency:>11} | {len(latencies) / elapsed:>8.2f} | "
+          f"{statistics.median(latencies) * 1000:>8.0f} | {p95 * 1000:>8.0f} | {threads:>12}")
+
+
+def run_sync(app, initial_state, concurrency: int, turns: int):
+    """One OS thread per session, each blocking on app.invoke"""
+    latencies, peak = [], [threading.active_count()]
+
+    def session(session_id):
+        for _ in range(turns):
+            start = time.perf_counter()
+            app.invoke(initial_state("Quiero una pregunta nueva", session_id))
+            latencies.append(time.perf_counter() - start)
+            peak.append(threading.active_count())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(session, [f"sync-{concurrency}-{i}" for i in range(concurrency)]))
+    return latencies, time.perf_counter() - start, max(peak)
+
+
+async def run_async(app, run_turn, concurrency: int, turns: int):
+    """All sessions multiplexed on one event loop with app.ainvoke"""
+    latencies, peak = [], [threading.active_count()]
+
+    async def session(session_id):
+        for _ in range(turns):
+            start = time.perf_counter()
+            await run_turn(app, "Quiero una pregunta nueva", session_id)
+            latencies.append(time.perf_counter() - start)
+            peak.append(threading.active_count())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(f"async-{concurrency}-{i}") for i in range(concurrency)))
+    return latencies, time.perf_counter() - start, max(peak)
+
+
+async def run_async_all(app, run_turn, args, results):
+    # One event loop for every level: the shared async HTTP client is bound to it
+    for concurrency in args.concurrency:
+        results[concurrency] = await run_async(app, run_turn, concurrency, args.turns)
+
+
+def main():
+    args = parse_arguments()
+    with open(args.content, "r", encoding="utf-8") as f:
+        GraphStubHandler.vocabulary = sorted({w for w in f.read().lower().split() if w.isalpha() and len(w) > 5})
+    server = start_stub_server(args.latency_ms, GraphStubHandler)
+    os.environ.update({
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_address[1]}/v1",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub"),
+        "CONTENT_PATH": args.content,
+        "MCQ_POOL_DEPTH": "0",
+        "MCQ_LLM_CACHE": "none",
+        "MCQ_STATIC_CONTEXT": "0",
+        # Enough pooled connections that the HTTP pool is not what limits concurrency
+        "MCQ_HTTP_MAX_CONNECTIONS": str(max(args.concurrency)),
+    })
+
+    from final_agent import build_workflow, initial_state, run_turn
+
+    sync_app, async_app = build_workflow(), build_workflow(use_async=True)
+    sync_results, async_results = {}, {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for concurrency in args.concurrency:
+            sync_results[concurrency] = run_sync(sync_app, initial_state, concurrency, args.turns)
+        asyncio.run(run_async_all(async_app, run_turn, args, async_results))
+
+    print(f"Stub LLM at {os.environ['OPENAI_BASE_URL']} ({args.latency_ms:.0f} ms per call), "
+          f"{args.turns} turns per session, {server.requests} LLM calls served")
+    print(f"{'mode':>6} | {'concurrency':>11} | {'turns/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'peak threads':>12}")
+    print("-" * 70)
+    for concurrency in args.concurrency:
+        report("sync", concurrency, *sync_results[concurrency])
+        report("async", concurrency, *async_results[concurrency])
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CONTENT = os.path.join(ROOT, "benchmark", "content", "SD-Com.txt")
+
+# A fresh interpreter: import the service layer and run the first searches the creator makes
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.append({root!r})
+from services.service import FileService
+from services.index_store import index_store
+FileService.search_in_file({path!r}, "comunicación")
+FileService.search_passages({path!r}, "sockets", 4)
+print(json.dumps({{"first_search_s": time.perf_counter() - start, **index_store.stats()}}))
+# Let the background suffix-array build finish (and be written) before exiting
+index_store.wait_for_builds()
+"""
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Cold-start-to-first-search time with and without the persisted index file"
+    )
+    parser.add_argument("--content", default=DEFAULT_CONTENT, help="Course text to replicate")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[0.02, 0.5],
+                        help="File sizes to test, in MB (the course text is repeated to fill them)")
+    return parser.parse_args()
+
+
+def cold_start(path: str, persist: bool) -> dict:
+    env = {**os.environ, "MCQ_INDEX_PERSIST": "1" if persist else "0", "MCQ_CACHE_DIR": os.path.dirname(path)}
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT, path=path)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return {**json.loads(output), "process_s": time.perf_counter() - start}
+
+
+def main():
+    args = parse_arguments()
+    with open(args.content, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    print(f"{'size (MB)':>10} | {'scenario':>26} | {'first search (s)':>16} | {'process (s)':>11} | {'loaded/built':>12}")
+    print("-" * 88)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(tmp_dir, f"course_{size_mb}.txt")
+            repeats = max(1, int(size_mb * 1024 * 1024) // len(content.encode("utf-8")))
+            with open(path, "w", encoding="utf-8") as f:
+                for i in range(repeats):
+                    f.write(f"Copia {i}\n{content}")
+            actual_mb = os.path.getsize(path) / (1024 * 1024)
+
+            scenarios = [
+                ("before: no index file", cold_start(path, persist=False)),
+                ("first run (writes index)", cold_start(path, persist=True)),
+                ("after: index on disk", cold_start(path, persist=True)),
+            ]
+            for name, result in scenarios:
+                print(f"{actual_mb:>10.2f} | {name:>26} | {result['first_search_s']:>16.3f} | "
+                      f"{result['process_s']:>11.3f} | {result['loaded']:>5}/{result['built']:<6}")
+            index_files = glob.glob(glob.escape(path) + ".*.idx")
+            index_mb = sum(os.path.getsize(index_file) for index_file in index_files) / (1024 * 1024)
+            print(f"{'':>10}   index files: {len(index_files)}, {index_mb:.2f} MB, "
+                  f"{scenarios[0][1]['first_search_s'] / scenarios[2][1]['first_search_s']:.1f}x faster cold start")
+
+
+if __name__ == "__main__":
+    main()
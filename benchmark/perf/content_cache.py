@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.content_cache import ContentCache
+from services.service import FileService
+
+DEFAULT_CONTENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content", "SD-Com.txt")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Compare uncached and cached read_txt_file latency")
+    parser.add_argument("--content", default=DEFAULT_CONTENT, help="Course text to replicate")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[0.02, 1, 50],
+                        help="File sizes to test, in MB (the course text is repeated to fill them)")
+    parser.add_argument("--reads", type=int, default=50, help="Reads per measurement")
+    return parser.parse_args()
+
+
+def build_file(path: str, content: str, size_mb: float):
+    target = int(size_mb * 1024 * 1024)
+    repeats = max(1, target // len(content.encode("utf-8")))
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(repeats):
+            f.write(content)
+
+
+def time_reads(read, path: str, reads: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reads):
+        read(path)
+    return (time.perf_counter() - start) / reads * 1000
+
+
+def uncached_read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def main():
+    args = parse_arguments()
+    with open(args.content, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    print(f"{'size (MB)':>10} | {'uncached (ms)':>13} | {'cached (ms)':>11} | {'speedup':>8} | {'hit ratio':>9} | {'MB saved':>9}")
+    print("-" * 76)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(tmp_dir, f"course_{size_mb}.txt")
+            build_file(path, content, size_mb)
+            actual_mb = os.path.getsize(path) / (1024 * 1024)
+
+            cache = ContentCache()
+            uncached_ms = time_reads(uncached_read, path, args.reads)
+            cached_ms = time_reads(cache.read_text, path, args.reads)
+            assert cache.read_text(path) == uncached_read(path)
+            stats = cache.stats()
+            print(f"{actual_mb:>10.2f} | {uncached_ms:>13.3f} | {cached_ms:>11.4f} | "
+                  f"{uncached_ms / cached_ms:>7.0f}x | {stats['hit_ratio']:>9.2%} | "
+                  f"{stats['bytes_saved'] / (1024 * 1024):>9.1f}")
+
+    FileService.read_txt_file(args.content)
+    print(f"\nFileService cache after one read of {os.path.basename(args.content)}: {FileService.cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
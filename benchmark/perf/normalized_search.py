@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import sys
+import time
+import unicodedata
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.index_store import index_store
+from services.service import FileService
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content")
+DEFAULT_CONTENT = os.path.join(CONTENT_DIR, "SD-Com.txt")
+DEFAULT_SUBTOPICS = os.path.join(CONTENT_DIR, "subtopics.json")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Compare exact and accent/case-normalized search: hits recovered and query latency"
+    )
+    parser.add_argument("--content", default=DEFAULT_CONTENT, help="Course text")
+    parser.add_argument("--subtopics", default=DEFAULT_SUBTOPICS, help="JSON list of subtopics used as queries")
+    parser.add_argument("--repeat", type=int, default=50, help="Times each query set is timed")
+    return parser.parse_args()
+
+
+def strip_accents(text: str) -> str:
+    """How the agent often types a term: no accents, mixed case"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def query_terms(subtopics):
+    """Every word of more than 4 letters in the subtopics, as typed without accents, plus a plural form"""
+    words = {word.strip("()/,-") for subtopic in subtopics for word in subtopic.split()}
+    words = sorted(word for word in words if len(word) > 4)
+    return [strip_accents(word) for word in words] + [strip_accents(word) + "s" for word in words if not word.endswith("s")]
+
+
+def time_queries(search, terms, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for term in terms:
+            search(term)
+    return (time.perf_counter() - start) / (repeat * len(terms)) * 1000
+
+
+def main():
+    args = parse_arguments()
+    with open(args.subtopics, "r", encoding="utf-8") as f:
+        terms = query_terms(json.load(f))
+
+    modes = {
+        "exact (lower)": {},
+        "normalized": {"normalize": True},
+        "normalized + stem": {"stem": True},
+    }
+    print(f"{len(terms)} queries (subtopic words typed without accents, singular and plural)")
+    print(f"{'mode':>18} | {'build (ms)':>10} | {'queries with hits':>17} | {'ms/query':>8}")
+    print("-" * 63)
+    exact_misses = None
+    for name, options in modes.items():
+        start = time.perf_counter()
+        FileService.search_in_file(args.content, "x", **options)
+        # Large files answer by scanning while the index builds in the background
+        index_store.wait_for_builds()
+        build_ms = (time.perf_counter() - start) * 1000
+        found = [bool(FileService.search_in_file(args.content, term, **options)) for term in terms]
+        if exact_misses is None:
+            exact_misses = found
+        query_ms = time_queries(lambda term: FileService.search_in_file(args.content, term, **options),
+                                terms, args.repeat)
+        print(f"{name:>18} | {build_ms:>10.1f} | {sum(found):>8}/{len(terms):<8} | {query_ms:>8.4f}")
+        recovered = sum(1 for before, now in zip(exact_misses, found) if now and not before)
+        if recovered:
+            print(f"{'':>18}   {recovered} queries that missed with exact search now find results "
+                  f"(each one a retry tool call avoided)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.index_store import index_store
+from services.service import FileService
+
+DEFAULT_CONTENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content", "SD-Com.txt")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Compare the suffix-array search index against a line scan")
+    parser.add_argument("--content", default=DEFAULT_CONTENT, help="Course text to replicate")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[0.02, 1, 4],
+                        help="File sizes to test, in MB (the course text is repeated to fill them)")
+    parser.add_argument("--queries", type=int, default=200, help="Search terms per size")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    with open(args.content, "r", encoding="utf-8") as f:
+        content = f.read()
+    rng = random.Random(7)
+    terms = rng.sample(sorted(set(content.split())), args.queries)
+
+    print(f"{'size (MB)':>10} | {'first query (ms)':>16} | {'index build (s)':>15} | "
+          f"{'scan (ms/query)':>15} | {'index (ms/query)':>16} | {'speedup':>8}")
+    print("-" * 97)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(tmp_dir, f"course_{size_mb}.txt")
+            repeats = max(1, int(size_mb * 1024 * 1024) // len(content.encode("utf-8")))
+            with open(path, "w", encoding="utf-8") as f:
+                for i in range(repeats):
+                    # Un marcador por copia evita que todas las copias sean idénticas
+                    f.write(f"Copia {i}\n{content}")
+            actual_mb = os.path.getsize(path) / (1024 * 1024)
+
+            # The first query is answered by a scan while the index builds in the background
+            start = time.perf_counter()
+            FileService.search_in_file(path, terms[0])
+            first_ms = (time.perf_counter() - start) * 1000
+            index_store.wait_for_builds()
+            build_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for term in terms:
+                scanned = FileService._scan_file(path, term)
+            scan_ms = (time.perf_counter() - start) / len(terms) * 1000
+
+            start = time.perf_counter()
+            for term in terms:
+                indexed = FileService.search_in_file(path, term)
+            index_ms = (time.perf_counter() - start) / len(terms) * 1000
+            assert scanned == indexed
+
+            print(f"{actual_mb:>10.2f} | {first_ms:>16.1f} | {build_s:>15.2f} | "
+                  f"{scan_ms:>15.3f} | {index_ms:>16.3f} | {scan_ms / index_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
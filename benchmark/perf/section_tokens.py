@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tools.tools import list_text_sections, read_text_file, read_text_section
+from services.service import FileService
+
+DEFAULT_CONTENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content", "SD-Com.txt")
+CHARS_PER_TOKEN = 4
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Estimate question-creator input tokens: full-file read vs section index + one section"
+    )
+    parser.add_argument("--content", default=DEFAULT_CONTENT, help="Course text")
+    return parser.parse_args()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (no tokenizer dependency): ~4 characters per token."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def main():
+    args = parse_arguments()
+    full_tokens = estimate_tokens(read_text_file(args.content))
+    listing_tokens = estimate_tokens(list_text_sections(args.content))
+    sections = FileService.list_sections(args.content)
+    section_tokens = [estimate_tokens(read_text_section(args.content, s['id'])) for s in sections]
+    average_section = sum(section_tokens) / len(section_tokens)
+    ranged_tokens = listing_tokens + average_section
+
+    print(f"{len(sections)} sections in {os.path.basename(args.content)}")
+    print(f"{'tool output per question':>32} | {'est. tokens':>11}")
+    print("-" * 48)
+    print(f"{'read_text_file (before)':>32} | {full_tokens:>11,}")
+    print(f"{'list_sections':>32} | {listing_tokens:>11,}")
+    print(f"{'read_section (avg / max)':>32} | {average_section:>5,.0f} / {max(section_tokens):,}")
+    print(f"{'list + one section (after)':>32} | {ranged_tokens:>11,.0f}")
+    print(f"\nEstimated input-token reduction per generated question: "
+          f"{full_tokens - ranged_tokens:,.0f} tokens ({1 - ranged_tokens / full_tokens:.0%}). "
+          f"Measured totals appear as 'Average Input Tokens per Question' in benchmark reports.")
+
+
+if __name__ == "__main__":
+    main()
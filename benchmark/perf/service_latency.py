@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.service import MCQService
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Micro-benchmark MCQService read latency vs history length")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Answer history sizes to measure")
+    parser.add_argument("--reads", type=int, default=10_000, help="Reads timed per size")
+    return parser.parse_args()
+
+
+def populate_service(service: MCQService, answers: int):
+    """Fill the service with `answers` answered questions (alternating correctness)."""
+    options = ["A", "B", "C", "D"]
+    for i in range(answers):
+        question_id = service.store_question(f"Pregunta {i}", options, "A")
+        service.store_user_answer(question_id, "A" if i % 2 else "B", i % 2 == 1)
+
+
+def time_call(func, reads: int) -> float:
+    """Return mean latency of `func` in microseconds."""
+    start = time.perf_counter()
+    for _ in range(reads):
+        func()
+    return (time.perf_counter() - start) / reads * 1e6
+
+
+def main():
+    args = parse_arguments()
+    
+    print(f"{'answers':>10} | {'last_question_id (us)':>22} | {'compute_user_score (us)':>24}")
+    print("-" * 62)
+    for size in args.sizes:
+        service = MCQService()
+        populate_service(service, size)
+        
+        last_id_us = time_call(service.get_last_question_id, args.reads)
+        score_us = time_call(service.compute_user_score, args.reads)
+        print(f"{size:>10} | {last_id_us:>22.3f} | {score_us:>24.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.service import MCQService
+from services.compact_service import CompactMCQService
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+SERVICES = {
+    "MCQService": MCQService,
+    "CompactMCQService": CompactMCQService,
+}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Compare MCQService memory use per answered question")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Answered questions to store")
+    return parser.parse_args()
+
+
+def populate_service(service, answers: int):
+    """Store `answers` questions with distinct option texts and answer each one."""
+    for i in range(answers):
+        options = [f"Opción {letter} de la pregunta {i}" for letter in "ABCD"]
+        question_id = service.store_question(f"Pregunta número {i}", options, options[i % 4])
+        # Simula una respuesta deserializada (otro objeto str con el mismo texto)
+        user_answer = "".join(options[(i + 1) % 4])
+        service.store_user_answer(question_id, user_answer, False)
+
+
+def measure(service_cls, answers: int) -> tuple:
+    """Return (bytes retained, seconds to populate) for one service class."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    service = service_cls()
+    populate_service(service, answers)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del service
+    return retained, elapsed
+
+
+def main():
+    args = parse_arguments()
+    
+    print(f"{'answers':>10} | {'service':>18} | {'MiB':>9} | {'bytes/answer':>12} | {'populate (s)':>12}")
+    print("-" * 74)
+    for size in args.sizes:
+        for name, service_cls in SERVICES.items():
+            retained, elapsed = measure(service_cls, size)
+            print(f"{size:>10} | {name:>18} | {retained / 2**20:>9.1f} | "
+                  f"{retained / size:>12.0f} | {elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.concurrent_service import ThreadSafeMCQService
+from services.service import MCQService, RECENT_PERFORMANCE_SIZE
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Race-detection stress test: concurrent writers and lock-free readers on one MCQService")
+    parser.add_argument("--writers", type=int, default=4, help="Writer threads")
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads")
+    parser.add_argument("--answers", type=int, default=5_000, help="Answers written per writer")
+    parser.add_argument("--switch-interval", type=float, default=1e-6,
+                        help="sys.setswitchinterval value; tiny values force frequent thread switches")
+    return parser.parse_args()
+
+
+def writer(service, writer_id: int, answers: int, errors: list):
+    """Store questions and answers, re-answering older ones to exercise holes and compaction."""
+    question_ids = []
+    try:
+        for i in range(answers):
+            if i % 4 == 3:
+                question_id = question_ids[i // 2]
+            else:
+                question_id = service.store_question(f"w{writer_id} pregunta {i}", ["A", "B", "C", "D"], "A")
+                question_ids.append(question_id)
+            is_correct = (i * 7 + writer_id) % 3 != 0
+            service.store_user_answer(question_id, "A" if is_correct else "B", is_correct)
+    except Exception as e:
+        errors.append(f"writer {writer_id}: {type(e).__name__}: {e}")
+
+
+def reader(service, stop: threading.Event, errors: list, reads: list):
+    """Read through every public read path and check invariants on what comes back."""
+    count = 0
+    last_total = 0
+    while not stop.is_set():
+        try:
+            score = service.compute_user_score()
+            total = score['total_questions']
+            if total != score['correct_count'] + score['incorrect_count']:
+                errors.append(f"inconsistent score: {score['correct_count']} + {score['incorrect_count']} != {total}")
+            if len(score['recent_performance']) > RECENT_PERFORMANCE_SIZE:
+                errors.append(f"recent_performance has {len(score['recent_performance'])} entries")
+            if total < last_total:
+                errors.append(f"total went backwards: {last_total} -> {total}")
+            last_total = total
+
+            analytics = service.get_mastery_analytics()
+            if analytics['window_correct'] > analytics['window_answers']:
+                errors.append(f"window_correct {analytics['window_correct']} > window_answers {analytics['window_answers']}")
+
+            last_id = service.get_last_question_id()
+            if last_id is not None and service.get_question(last_id) is None:
+                errors.append(f"last question {last_id} not stored")
+
+            if count % 50 == 0:
+                history = service.get_answer_history()
+                seen = {entry['question_id'] for entry in history}
+                if len(seen) != len(history):
+                    errors.append(f"history repeats question ids ({len(history)} entries, {len(seen)} unique)")
+                for _ in zip(range(20), service.iter_answer_history()):
+                    pass
+            count += 1
+        except Exception as e:
+            errors.append(f"reader: {type(e).__name__}: {e}")
+    reads.append(count)
+
+
+def run(service_class, args) -> tuple:
+    service = service_class()
+    errors, reads = [], []
+    stop = threading.Event()
+    writers = [
+        threading.Thread(target=writer, args=(service, i, args.answers, errors))
+        for i in range(args.writers)
+    ]
+    readers = [
+        threading.Thread(target=reader, args=(service, stop, errors, reads))
+        for _ in range(args.readers)
+    ]
+    start = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Cada writer responde `answers` veces, pero un cuarto son re-respuestas
+    expected = args.writers * (args.answers - args.answers // 4)
+    final = service.compute_user_score()
+    if final['total_questions'] != expected:
+        errors.append(f"final total {final['total_questions']} != expected {expected}")
+    if len(service.get_answer_history()) != expected:
+        errors.append(f"final history has {len(service.get_answer_history())} entries, expected {expected}")
+    return errors, sum(reads), elapsed
+
+
+def main():
+    args = parse_arguments()
+    sys.setswitchinterval(args.switch_interval)
+    print(f"{args.writers} writers x {args.answers} answers, {args.readers} readers, "
+          f"switch interval {args.switch_interval}s")
+    print(f"{'service':>22} | {'errors':>7} | {'reads':>9} | {'elapsed (s)':>11} | first error")
+    print("-" * 90)
+    failed = False
+    for service_class in (MCQService, ThreadSafeMCQService):
+        errors, reads, elapsed = run(service_class, args)
+        first = errors[0][:60] if errors else "-"
+        print(f"{service_class.__name__:>22} | {len(errors):>7} | {reads:>9} | {elapsed:>11.2f} | {first}")
+        if service_class is ThreadSafeMCQService and errors:
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.registry import MCQServiceRegistry, session_scope
+from tools.tools import get_mcq_service, mcq_registry
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Stress the per-session MCQService registry from many threads")
+    parser.add_argument("--sessions", type=int, default=5_000, help="Concurrent student sessions")
+    parser.add_argument("--answers", type=int, default=20, help="Answers written per session")
+    parser.add_argument("--workers", type=int, default=64, help="Worker threads")
+    return parser.parse_args()
+
+
+def simulate_session(session_id: str, answers: int) -> int:
+    """Create and answer questions for one session through the tools layer; return its correct count."""
+    with session_scope(session_id):
+        correct = 0
+        for i in range(answers):
+            service = get_mcq_service()
+            question_id = service.store_question(f"{session_id} pregunta {i}", ["A", "B", "C", "D"], "A")
+            is_correct = (hash((session_id, i)) % 3) != 0
+            service.store_user_answer(question_id, "A" if is_correct else "B", is_correct)
+            correct += is_correct
+        return correct
+
+
+def verify(registry: MCQServiceRegistry, expected: dict, answers: int):
+    """Check that no session lost or leaked answers."""
+    assert len(registry) == len(expected), f"expected {len(expected)} sessions, got {len(registry)}"
+    for session_id, correct in expected.items():
+        score = registry.get(session_id).compute_user_score()
+        assert score['total_questions'] == answers, f"{session_id}: {score['total_questions']} answers"
+        assert score['correct_count'] == correct, f"{session_id}: {score['correct_count']} correct"
+
+
+def main():
+    args = parse_arguments()
+    session_ids = [f"student-{i}" for i in range(args.sessions)]
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            session_id: executor.submit(simulate_session, session_id, args.answers)
+            for session_id in session_ids
+        }
+        expected = {session_id: future.result() for session_id, future in futures.items()}
+    elapsed = time.perf_counter() - start
+    
+    verify(mcq_registry, expected, args.answers)
+    
+    total_writes = args.sessions * args.answers * 2
+    print(f"{args.sessions} sessions x {args.answers} answers on {args.workers} threads: "
+          f"{elapsed:.2f}s ({total_writes / elapsed:,.0f} writes/s) - all sessions consistent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.sqlite_service import SqliteMCQService
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Measure SqliteMCQService write throughput and reopen time")
+    parser.add_argument("--answers", type=int, default=300_000, help="Answered questions to store")
+    parser.add_argument("--batch-size", type=int, default=256, help="Group-commit batch size")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "mcq.db")
+        
+        service = SqliteMCQService(db_path, batch_size=args.batch_size)
+        start = time.perf_counter()
+        for i in range(args.answers):
+            question_id = service.store_question(f"Pregunta {i}", ["A", "B", "C", "D"], "A")
+            service.store_user_answer(question_id, "A", i % 3 != 0)
+        service.close()
+        elapsed = time.perf_counter() - start
+        print(f"Stored {args.answers} questions+answers in {elapsed:.2f}s "
+              f"({2 * args.answers / elapsed:,.0f} writes/s)")
+        
+        start = time.perf_counter()
+        service = SqliteMCQService(db_path)
+        score = service.compute_user_score()
+        last_id = service.get_last_question_id()
+        startup_ms = (time.perf_counter() - start) * 1000
+        print(f"Reopen + first score read: {startup_ms:.1f} ms "
+              f"(total={score['total_questions']}, last={last_id})")
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
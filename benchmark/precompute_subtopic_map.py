@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.retrieval import load_subtopics
+from services.subtopic_map import DEFAULT_PASSAGES_PER_SUBTOPIC, load_subtopic_map, subtopic_map_path
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Precompute the subtopic -> course passage map and store it in the on-disk cache"
+    )
+    parser.add_argument("--content", default=os.path.join(BENCHMARK_DIR, "content", "SD-Com.txt"),
+                        help="Course text file or directory of documents")
+    parser.add_argument("--subtopics", default=os.path.join(BENCHMARK_DIR, "content", "subtopics.json"),
+                        help="JSON list of subtopics")
+    parser.add_argument("--k", type=int, default=DEFAULT_PASSAGES_PER_SUBTOPIC, help="Passages kept per subtopic")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute even if a cached map exists")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    subtopics = load_subtopics(args.subtopics)
+
+    start = time.perf_counter()
+    subtopic_map = load_subtopic_map(args.content, subtopics, args.k, rebuild=args.rebuild)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    unmapped = [s for i, s in enumerate(subtopics) if subtopic_map.location(i) is None]
+    print(f"Subtopic map: {len(subtopics)} subtopics, {len(subtopics) - len(unmapped)} found in the course text "
+          f"({elapsed_ms:.0f} ms)")
+    print(f"Cache file: {subtopic_map_path(args.content, subtopics, args.k)}")
+    for subtopic_id, subtopic in enumerate(subtopics):
+        location = subtopic_map.location(subtopic_id)
+        where = (f"{location['section_title']} (lines {location['start_line']}-{location['end_line']}, "
+                 f"score {location['score']:.2f})" if location else "-")
+        print(f"  [{subtopic_id:>2}] {subtopic:<45} -> {where}")
+    if unmapped:
+        print(f"\nNot found in the course text: {', '.join(unmapped)}")
+
+
+if __name__ == "__main__":
+    main()
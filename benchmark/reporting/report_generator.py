@@ -50,11 +50,30 @@ class BenchmarkReportGenerator:
         accuracy = (total_correct / total_turns) * 100
         avg_difficulty = sum(r['difficulty_score'] for r in results) / total_turns
         
-        return (
+        summary = (
             f"## Summary\n"
             f"- **Accuracy**: {accuracy:.2f}%\n"
             f"- **Average Difficulty**: {avg_difficulty:.2f}\n"
         )
+        if any('input_tokens' in r for r in results):
+            avg_input_tokens = sum(r.get('input_tokens', 0) for r in results) / total_turns
+            summary += f"- **Average Input Tokens per Question**: {avg_input_tokens:,.0f}\n"
+        if any('first_visible_token_s' in r for r in results):
+            timed = [r for r in results if 'first_visible_token_s' in r]
+            summary += (
+                f"- **Time to First Answer Text** (presented question or system message): "
+                f"{sum(r['first_visible_token_s'] for r in timed) / len(timed):.2f}s average "
+                f"(turn latency {sum(r['turn_latency_s'] for r in timed) / len(timed):.2f}s)\n"
+            )
+        calls = [call for r in results for call in r.get('prompt_cache_calls', [])]
+        if calls:
+            input_tokens = sum(call['input_tokens'] for call in calls)
+            cached_tokens = sum(call['cached_tokens'] for call in calls)
+            summary += (
+                f"- **Prompt Cache**: {cached_tokens / input_tokens if input_tokens else 0:.0%} of input tokens "
+                f"served from the provider cache over {len(calls)} LLM calls\n"
+            )
+        return summary
 
     def _generate_objective_metrics_section(
         self, 
@@ -77,10 +96,10 @@ class BenchmarkReportGenerator:
     def _generate_coverage_matrix(self, coverage_metrics: CoverageMetricsCalculator) -> str:
         """Generate topic coverage matrix using dedicated generator."""
         topic_statuses = coverage_metrics.identify_topic_statuses()
-        subtopics = SubtopicLoader().load_subtopics()
+        loader = SubtopicLoader()
         
         section = CoverageMatrixSection()
-        return section.generate_section(topic_statuses, subtopics)
+        return section.generate_section(topic_statuses, loader.load_subtopics(), loader.load_subtopic_map())
 
     def _generate_adaptivity_table(self, results: List[Dict[str, Any]]) -> str:
         """Generate adaptivity analysis table."""
@@ -1,17 +1,27 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from services.subtopic_map import SubtopicMap
 
 
 class CoverageMatrixSection:
     """Generates topic coverage matrix visualization."""
     
-    def generate_section(self, topic_statuses: Dict[int, str], subtopics: List[str]) -> str:
+    def generate_section(
+        self,
+        topic_statuses: Dict[int, str],
+        subtopics: List[str],
+        subtopic_map: Optional[SubtopicMap] = None
+    ) -> str:
         """
         Generate topic coverage matrix showing per-topic performance.
         
         Args:
             topic_statuses: Dictionary mapping topic_id -> status string
             subtopics: List of subtopic names
+            subtopic_map: Optional subtopic -> passage map, to show where failed and
+                missed topics are covered in the course text
         """
+        self.subtopic_map = subtopic_map
         mastered = []
         recovered = []
         failed = []
@@ -39,10 +49,10 @@ class CoverageMatrixSection:
             report += self._generate_topic_list("🔄 Recovered (Improved After Failure)", recovered)
         
         if failed:
-            report += self._generate_topic_list("❌ Failed (Never Answered Correctly)", failed)
+            report += self._generate_topic_list("❌ Failed (Never Answered Correctly)", failed, with_location=True)
         
         if missed:
-            report += self._generate_topic_list("⚪ Missed (System Never Asked)", missed)
+            report += self._generate_topic_list("⚪ Missed (System Never Asked)", missed, with_location=True)
         
         return report
     
@@ -64,15 +74,21 @@ class CoverageMatrixSection:
             f"- **Missed**: {missed} topics ({missed/total*100 if total > 0 else 0:.1f}%)\n"
         )
     
-    def _generate_topic_list(self, title: str, topics: List[tuple]) -> str:
+    def _generate_topic_list(self, title: str, topics: List[tuple], with_location: bool = False) -> str:
         """Generate a formatted list of topics."""
         if not topics:
             return ""
         
         result = f"### {title}\n\n"
         for topic_id, topic_name in topics:
-            result += f"- `[{topic_id}]` {topic_name}\n"
+            result += f"- `[{topic_id}]` {topic_name}{self._format_location(topic_id) if with_location else ''}\n"
         result += "\n"
         
         return result
 
+    def _format_location(self, topic_id: int) -> str:
+        """Where the topic is covered in the course text, from the subtopic map."""
+        location = self.subtopic_map.location(topic_id) if self.subtopic_map else None
+        if location is None:
+            return " — not found in the course text"
+        return f" — section \"{location['section_title']}\", lines {location['start_line']}-{location['end_line']}"
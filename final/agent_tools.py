@@ -1,38 +1,105 @@
-from langchain_core.tools import tool
+import asyncio
+from typing import List, Optional
+from langchain_core.tools import BaseTool, tool
 from tools.tools import (
     read_text_file,
+    list_text_sections,
+    read_text_section,
+    read_text_range,
+    retrieve_passages,
     search_in_text_file,
+    search_many_in_text_file,
     list_multiple_choice_questions,
     get_user_performance,
     get_answer_history_detailed
 )
 
 
+def async_tool(tool_obj: BaseTool) -> BaseTool:
+    """Gives the tool a coroutine that runs it in a worker thread.
+
+    The tools read files, indexes and the question store, which block; with
+    the coroutine, an agent run through ainvoke awaits them without stalling
+    the event loop. The thread inherits the context, so the session follows.
+    """
+    func = tool_obj.func
+
+    async def coroutine(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    tool_obj.coroutine = coroutine
+    return tool_obj
+
+
+@async_tool
 @tool
 def read_text_file_tool(file_path: str) -> str:
     """Read complete file content"""
     return read_text_file(file_path)
 
 
+@async_tool
+@tool
+def list_sections_tool(file_path: str) -> str:
+    """List the sections of a file or document directory (id, title, line range) without reading it"""
+    return list_text_sections(file_path)
+
+
+@async_tool
+@tool
+def read_section_tool(file_path: str, section_id: int) -> str:
+    """Read a single section of a file by id"""
+    return read_text_section(file_path, section_id)
+
+
+@async_tool
+@tool
+def read_range_tool(file_path: str, start_line: int, end_line: int) -> str:
+    """Read lines start_line..end_line (inclusive) of a file (for a directory, use the document's path)"""
+    return read_text_range(file_path, start_line, end_line)
+
+
+@async_tool
+@tool
+def retrieve_passages_tool(file_path: str, query: str, k: int = 4) -> str:
+    """Retrieve the k passages of a file most relevant to a subtopic or free-text query (BM25)"""
+    return retrieve_passages(file_path, query, k)
+
+
+@async_tool
+@tool
+def search_in_text_file_tool(file_path: str, search_term: str, case_sensitive: bool = False,
+                             cursor: Optional[str] = None, stem: bool = False) -> str:
+    """Search for term in file, ignoring accents and case unless case_sensitive (stem=True also matches
+    plural/gender variants). Returns the first page of matches; pass the returned cursor for more"""
+    return search_in_text_file(file_path, search_term, case_sensitive, cursor=cursor, stem=stem)
+
+
+@async_tool
 @tool
-def search_in_text_file_tool(file_path: str, search_term: str, case_sensitive: bool = False) -> str:
-    """Search for term in file"""
-    return search_in_text_file(file_path, search_term, case_sensitive)
+def search_many_in_text_file_tool(file_path: str, search_terms: List[str], case_sensitive: bool = False,
+                                  stem: bool = False) -> str:
+    """Search several terms (or /regex/) in one pass, ignoring accents and case unless case_sensitive;
+    results grouped per term"""
+    return search_many_in_text_file(file_path, search_terms, case_sensitive, stem=stem)
 
 
+@async_tool
 @tool
-def list_questions_tool(limit: int = 20) -> str:
-    """List recent questions"""
-    return list_multiple_choice_questions(limit)
+def list_questions_tool(limit: int = 20, cursor: Optional[str] = None) -> str:
+    """List recent questions, newest first. Pass the returned cursor to see older ones"""
+    return list_multiple_choice_questions(limit, cursor)
 
 
+@async_tool
 @tool
 def get_performance_tool() -> str:
     """Get user performance stats"""
     return get_user_performance()
 
 
+@async_tool
 @tool
-def get_history_tool() -> str:
-    """Get answer history"""
-    return get_answer_history_detailed()
+def get_history_tool(limit: int = 20, cursor: Optional[str] = None) -> str:
+    """Get answer history, newest first. Pass the returned cursor to see older answers"""
+    return get_answer_history_detailed(limit, cursor)
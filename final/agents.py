@@ -1,44 +1,181 @@
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
 from langchain.agents import create_agent
+from final.llm_cache import llm_cache_for
 from final.agent_tools import (
     read_text_file_tool,
+    list_sections_tool,
+    read_section_tool,
+    read_range_tool,
+    retrieve_passages_tool,
     search_in_text_file_tool,
-    list_questions_tool,
+    search_many_in_text_file_tool,
     get_performance_tool,
     get_history_tool
 )
 
 
-def create_model():
+# One HTTP pool shared by every model in the process: keep-alive connections
+# to the API are reused across nodes, turns and benchmark components
+HTTP_MAX_CONNECTIONS = int(os.environ.get("MCQ_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("MCQ_HTTP_KEEPALIVE_EXPIRY", "60"))
+
+_registry_lock = threading.Lock()
+_http_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+_models: Dict[str, ChatOpenAI] = {}
+_agents: Dict[str, Any] = {}
+
+
+def _registered(registry: Dict[str, Any], name: str, build: Callable[[], Any]):
+    """Registry value for `name`, built exactly once even when several threads ask at the same time"""
+    value = registry.get(name)
+    if value is not None:
+        return value
+    with _registry_lock:
+        value = registry.get(name)
+        if value is None:
+            value = build()
+            registry[name] = value
+    return value
+
+
+def get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """Process-wide sync and async HTTP clients sharing one keep-alive connection pool"""
+    global _http_clients
+    if _http_clients is None:
+        with _registry_lock:
+            if _http_clients is None:
+                limits = httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                )
+                _http_clients = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+    return _http_clients
+
+
+def create_model(cache=None):
+    """New ChatOpenAI on the shared HTTP pool; `cache` is its LLM response cache (None: no cache)"""
+    http_client, http_async_client = get_http_clients()
     return ChatOpenAI(
         model="gpt-4o",  # or "gpt-4", "gpt-3.5-turbo", etc.
         temperature=0.7,
         max_tokens=2048,
         timeout=None,
-        max_retries=2
+        max_retries=2,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        cache=cache
     )
 
 
+def get_model(component: str = "agents"):
+    """Process-wide model of a component ("agents", "evaluator", "topic_labeler", "student").
+
+    ChatOpenAI keeps no per-call state, so threads can share it. Components
+    differ only in their response cache, enabled per component by MCQ_LLM_CACHE.
+    """
+    return _registered(_models, component, lambda: create_model(cache=llm_cache_for(component)))
+
+
 def create_question_creator_agent():
-    tools = [read_text_file_tool, search_in_text_file_tool, list_questions_tool]
-    llm = create_model()
+    # Repeated questions are caught by the near-duplicate index, so the creator
+    # no longer needs list_questions_tool to stream old questions into context
+    tools = [
+        list_sections_tool,
+        read_section_tool,
+        read_range_tool,
+        retrieve_passages_tool,
+        search_in_text_file_tool,
+        search_many_in_text_file_tool,
+        read_text_file_tool
+    ]
+    llm = get_model()
     return create_agent(llm, tools)
 
 
 def create_difficulty_reviewer_agent():
     tools = [get_performance_tool]
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
 
 
 def create_feedback_agent():
     tools = [get_performance_tool, get_history_tool]
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
 
 
 def create_orchestrator_agent():
     tools = [get_performance_tool]
-    llm = create_model()
+    llm = get_model()
     return create_agent(llm, tools)
+
+
+# Each compiled agent is built once per process. The graph keeps no state
+# between invocations (messages travel in the input), so the nodes and the
+# question pool threads can invoke the same agent concurrently.
+AGENT_BUILDERS: Dict[str, Callable[[], Any]] = {
+    "question_creator": create_question_creator_agent,
+    "difficulty_reviewer": create_difficulty_reviewer_agent,
+    "feedback": create_feedback_agent,
+    "orchestrator": create_orchestrator_agent,
+}
+
+
+def get_agent(name: str):
+    """Registered agent with that name, built the first time it is requested"""
+    if name not in AGENT_BUILDERS:
+        raise ValueError(f"Agente desconocido: {name}")
+    return _registered(_agents, name, AGENT_BUILDERS[name])
+
+
+def get_question_creator_agent():
+    return get_agent("question_creator")
+
+
+def get_difficulty_reviewer_agent():
+    return get_agent("difficulty_reviewer")
+
+
+def get_feedback_agent():
+    return get_agent("feedback")
+
+
+def get_orchestrator_agent():
+    return get_agent("orchestrator")
+
+
+def reset_agents():
+    """Drops the registered agents, models and HTTP clients (e.g. after changing the configuration)"""
+    global _http_clients
+    with _registry_lock:
+        _agents.clear()
+        _models.clear()
+        clients, _http_clients = _http_clients, None
+    if clients is not None:
+        http_client, http_async_client = clients
+        http_client.close()
+        _close_async_client(http_async_client)
+
+
+# Closes scheduled on a running event loop, referenced until they finish
+_closing_tasks = set()
+
+
+def _close_async_client(client: httpx.AsyncClient):
+    """Closes the async client: right away when no event loop is running, else as a task on it"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(client.aclose())
+        return
+    task = loop.create_task(client.aclose())
+    _closing_tasks.add(task)
+    task.add_done_callback(_closing_tasks.discard)
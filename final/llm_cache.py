@@ -0,0 +1,291 @@
+"""Disk-backed exact-match cache of LLM responses, shared by every process that opens it."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from services.disk_cache import cache_dir
+
+
+# Components that can use the cache (MCQ_LLM_CACHE=evaluator,topic_labeler or "all")
+COMPONENTS = ("agents", "evaluator", "topic_labeler", "student")
+DEFAULT_MAX_MB = 256.0
+DEFAULT_TTL = 30 * 24 * 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    component TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses(created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_size INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN
+    UPDATE meta SET total_size = total_size + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN
+    UPDATE meta SET total_size = total_size + NEW.size - OLD.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN
+    UPDATE meta SET total_size = total_size - OLD.size WHERE id = 1;
+END;
+INSERT OR IGNORE INTO meta (id, total_size) SELECT 1, COALESCE(SUM(size), 0) FROM responses;
+"""
+
+_SELECT_RESPONSE = "SELECT response, input_tokens, output_tokens, created_at FROM responses WHERE key = ?"
+_TOUCH_RESPONSE = "UPDATE responses SET accessed_at = ? WHERE key = ?"
+# An upsert (not INSERT OR REPLACE) so the size triggers see the replaced row as an update
+_UPSERT_RESPONSE = (
+    "INSERT INTO responses "
+    "(key, component, response, size, input_tokens, output_tokens, created_at, accessed_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET component = excluded.component, response = excluded.response, "
+    "size = excluded.size, input_tokens = excluded.input_tokens, output_tokens = excluded.output_tokens, "
+    "created_at = excluded.created_at, accessed_at = excluded.accessed_at"
+)
+_DELETE_EXPIRED = "DELETE FROM responses WHERE created_at < ?"
+_SELECT_TOTAL_SIZE = "SELECT total_size FROM meta WHERE id = 1"
+_SELECT_LRU = "SELECT key, size FROM responses ORDER BY accessed_at LIMIT ?"
+
+# Message fields that change between runs without changing what the model sees
+_VOLATILE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        if value.get("lc") == 1 and value.get("type") == "not_implemented":
+            # Non-serializable parameters (HTTP clients) carry a repr with a memory address
+            return None
+        if value.get("lc") == 1 and isinstance(value.get("kwargs"), dict):
+            value = {**value, "kwargs": {k: v for k, v in value["kwargs"].items() if k not in _VOLATILE_FIELDS}}
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def _canonical_json(text: str) -> str:
+    try:
+        return json.dumps(_canonical(json.loads(text)), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    except ValueError:
+        return text
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """SHA-256 of the model, its call parameters and the canonicalized messages.
+
+    `prompt` is the serialized message list and `llm_string` the serialized
+    model plus its call parameters (tools, stop), as LangChain passes them.
+    """
+    model, _, params = llm_string.partition("---")
+    canonical = "\n".join((_canonical_json(model), params, _canonical_json(prompt)))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _usage(return_val: RETURN_VAL_TYPE) -> Tuple[int, int]:
+    input_tokens = output_tokens = 0
+    for generation in return_val:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+        input_tokens += usage.get("input_tokens", 0)
+        output_tokens += usage.get("output_tokens", 0)
+    return input_tokens, output_tokens
+
+
+class ResponseStore:
+    """SQLite (WAL) table of responses, bounded by size (LRU) and age (TTL).
+
+    Several processes can share the file: SQLite serializes writers and the
+    connection timeout makes them wait for the lock instead of failing. Eviction runs after each
+    insert, in the same transaction: expired rows first, then the least
+    recently read until the table fits in `max_bytes`. A `ttl` of 0 disables expiry.
+    The total size lives in a one-row meta table that triggers keep in step with
+    every insert, update and delete, so eviction never sums the whole table.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("BEGIN IMMEDIATE;" + _SCHEMA + "COMMIT;")
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and created_at < now - self.ttl
+
+    def get(self, key: str) -> Optional[Tuple[str, int, int]]:
+        """Stored response and its tokens (input, output), or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(_SELECT_RESPONSE, (key,)).fetchone()
+            if row is None or self._expired(row[3], now):
+                return None
+            self._conn.execute(_TOUCH_RESPONSE, (now, key))
+        return row[0], row[1], row[2]
+
+    def put(self, key: str, component: str, response: str, input_tokens: int, output_tokens: int):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(_UPSERT_RESPONSE, (key, component, response, size,
+                                                      input_tokens, output_tokens, now, now))
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now: float):
+        if self.ttl > 0:
+            self._conn.execute(_DELETE_EXPIRED, (now - self.ttl,))
+        excess = self._conn.execute(_SELECT_TOTAL_SIZE).fetchone()[0] - self.max_bytes
+        while excess > 0:
+            rows = self._conn.execute(_SELECT_LRU, (64,)).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                excess -= size
+                if excess <= 0:
+                    break
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def record(self, component: str, hit: bool, input_tokens: int = 0, output_tokens: int = 0):
+        with self._lock:
+            stats = self._stats.setdefault(component, {
+                "hits": 0, "misses": 0, "saved_input_tokens": 0, "saved_output_tokens": 0
+            })
+            if hit:
+                stats["hits"] += 1
+                stats["saved_input_tokens"] += input_tokens
+                stats["saved_output_tokens"] += output_tokens
+            else:
+                stats["misses"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {component: dict(stats) for component, stats in self._stats.items()}
+
+
+class LLMResponseCache(BaseCache):
+    """LangChain cache for one component's model, backed by the shared ResponseStore.
+
+    The key covers the model and its parameters, so components with different
+    settings never share entries even though they share the file.
+    """
+
+    def __init__(self, store: ResponseStore, component: str):
+        self.store = store
+        self.component = component
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        row = self.store.get(cache_key(prompt, llm_string))
+        if row is not None:
+            try:
+                generations = loads(row[0])
+            except (ValueError, TypeError, KeyError):
+                generations = None
+            if generations is not None:
+                self.store.record(self.component, True, row[1], row[2])
+                return generations
+        self.store.record(self.component, False)
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        input_tokens, output_tokens = _usage(return_val)
+        try:
+            self.store.put(cache_key(prompt, llm_string), self.component, dumps(return_val),
+                           input_tokens, output_tokens)
+        except sqlite3.Error as e:
+            print(f"No se pudo guardar la respuesta en el cache de LLM: {e}")
+
+    def clear(self, **kwargs) -> None:
+        self.store.clear()
+
+
+def enabled_components() -> Tuple[str, ...]:
+    """Components listed in MCQ_LLM_CACHE ("all" enables every one; unset or "none" disables the cache)"""
+    value = os.environ.get("MCQ_LLM_CACHE", "").strip().lower()
+    if value == "all":
+        return COMPONENTS
+    return tuple(c.strip() for c in value.split(",") if c.strip() in COMPONENTS)
+
+
+def cache_path() -> str:
+    """MCQ_LLM_CACHE_PATH, or llm_responses.sqlite in the course content's cache directory"""
+    configured = os.environ.get("MCQ_LLM_CACHE_PATH")
+    if configured:
+        return configured
+    return os.path.join(cache_dir(os.environ.get("CONTENT_PATH", "SD-Com.txt")), "llm_responses.sqlite")
+
+
+_stores: Dict[str, ResponseStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _store() -> ResponseStore:
+    path = cache_path()
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = ResponseStore(
+                path,
+                max_bytes=int(float(os.environ.get("MCQ_LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024),
+                ttl=float(os.environ.get("MCQ_LLM_CACHE_TTL", DEFAULT_TTL))
+            )
+            _stores[path] = store
+        return store
+
+
+def llm_cache_for(component: str) -> Optional[LLMResponseCache]:
+    """Cache for the component's model, or None if MCQ_LLM_CACHE does not enable it"""
+    if component not in enabled_components():
+        return None
+    return LLMResponseCache(_store(), component)
+
+
+def llm_cache_stats() -> Dict:
+    """Hits, misses and tokens saved in this process, per component and in total"""
+    with _stores_lock:
+        stores = list(_stores.values())
+    components: Dict[str, Dict[str, int]] = {}
+    for store in stores:
+        for component, stats in store.stats().items():
+            totals = components.setdefault(component, dict.fromkeys(stats, 0))
+            for name, value in stats.items():
+                totals[name] += value
+    total = {"hits": 0, "misses": 0, "saved_input_tokens": 0, "saved_output_tokens": 0}
+    for stats in components.values():
+        for name in total:
+            total[name] += stats[name]
+    return {
+        "enabled": list(enabled_components()),
+        "path": cache_path() if enabled_components() else None,
+        **total,
+        "components": components
+    }
@@ -1,31 +1,78 @@
-"""Logging utilities for multi-agent system."""
+"""Logging utilities for multi-agent system.
+
+Each log_* call is a progress event. Inside progress_scope(sink) the event is
+handed to the sink (the streaming driver renders it alongside the LLM tokens);
+otherwise it is printed right away, as before.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
 
 from colorama import Fore, Style
 
 
+progress_sink: ContextVar[Optional[Callable[[Dict], None]]] = ContextVar("progress_sink", default=None)
+
+# Prefix printed for each source of progress events
+PREFIXES = {
+    "orchestrator": f"{Fore.CYAN}🎯 [ORCHESTRATOR]{Style.RESET_ALL}",
+    "question_creator": f"{Fore.GREEN}✨ [QUESTION CREATOR]{Style.RESET_ALL}",
+    "difficulty_reviewer": f"{Fore.YELLOW}⚖️  [DIFFICULTY REVIEWER]{Style.RESET_ALL}",
+    "feedback_agent": f"{Fore.MAGENTA}💡 [FEEDBACK AGENT]{Style.RESET_ALL}",
+    "user_input": f"{Fore.BLUE}👤 [USER INPUT]{Style.RESET_ALL}",
+    "user_output": f"{Fore.WHITE}{Style.BRIGHT}📢 [SYSTEM → USER]{Style.RESET_ALL}",
+}
+
+
+@contextmanager
+def progress_scope(sink: Callable[[Dict], None]) -> Iterator[None]:
+    """Sends progress events to `sink` instead of printing them while the block runs (threads and tasks inherit it)."""
+    token = progress_sink.set(sink)
+    try:
+        yield
+    finally:
+        progress_sink.reset(token)
+
+
+def format_progress(event: Dict) -> str:
+    if event["source"] == "separator":
+        return f"{Fore.LIGHTBLACK_EX}{'=' * 80}{Style.RESET_ALL}"
+    return f"{PREFIXES[event['source']]} {event['message']}"
+
+
+def emit_progress(source: str, message: str = ""):
+    event = {"type": "progress", "source": source, "message": message}
+    sink = progress_sink.get()
+    if sink is None:
+        print(format_progress(event))
+    else:
+        sink(event)
+
+
 def log_orchestrator(message: str):
-    print(f"{Fore.CYAN}🎯 [ORCHESTRATOR]{Style.RESET_ALL} {message}")
+    emit_progress("orchestrator", message)
 
 
 def log_question_creator(message: str):
-    print(f"{Fore.GREEN}✨ [QUESTION CREATOR]{Style.RESET_ALL} {message}")
+    emit_progress("question_creator", message)
 
 
 def log_difficulty_reviewer(message: str):
-    print(f"{Fore.YELLOW}⚖️  [DIFFICULTY REVIEWER]{Style.RESET_ALL} {message}")
+    emit_progress("difficulty_reviewer", message)
 
 
 def log_feedback_agent(message: str):
-    print(f"{Fore.MAGENTA}💡 [FEEDBACK AGENT]{Style.RESET_ALL} {message}")
+    emit_progress("feedback_agent", message)
 
 
 def log_user_input(message: str):
-    print(f"{Fore.BLUE}👤 [USER INPUT]{Style.RESET_ALL} {message}")
+    emit_progress("user_input", message)
 
 
 def log_user_output(message: str):
-    print(f"{Fore.WHITE}{Style.BRIGHT}📢 [SYSTEM → USER]{Style.RESET_ALL} {message}")
+    emit_progress("user_output", message)
 
 
 def log_separator():
-    print(f"{Fore.LIGHTBLACK_EX}{'=' * 80}{Style.RESET_ALL}")
+    emit_progress("separator")
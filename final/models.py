@@ -1,5 +1,6 @@
 """Data models for multi-agent system."""
 
+import operator
 from typing import TypedDict, Annotated
 from pydantic import BaseModel, Field
 from langgraph.graph.message import add_messages
@@ -21,6 +22,7 @@ class DifficultyReviewOutput(BaseModel):
 class AgentState(TypedDict):
     """Shared state for multi-agent workflow."""
     messages: Annotated[list, add_messages]
+    session_id: str
     current_question: str
     question_options: list
     question_correct_index: int
@@ -29,4 +31,8 @@ class AgentState(TypedDict):
     score_data: dict
     iteration_count: int
     question_approved: bool
+    duplicate_feedback: str
+    duplicate_retries: int
+    input_tokens: Annotated[int, operator.add]
+    prompt_cache_calls: Annotated[list, operator.add]
     next_action: str
@@ -1,16 +1,30 @@
 """Workflow nodes and routing functions for multi-agent system."""
 
+import asyncio
+import functools
+import inspect
 import json
 import re
-from typing import Literal
+from typing import Literal, Optional
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from tools.tools import register_multiple_choice_question, get_user_performance, mcq_service
+from services.registry import session_scope
+from tools.tools import (
+    register_multiple_choice_question,
+    get_user_performance,
+    get_mcq_service,
+    format_mastery_analytics,
+    find_duplicate_question,
+    next_subtopic,
+    retrieve_subtopic_passages
+)
 from final.models import AgentState, QuestionOutput, DifficultyReviewOutput
+from final.question_pool import QuestionPool, BAND_HINTS, current_topic, difficulty_band
 from final.agents import (
-    create_question_creator_agent,
-    create_difficulty_reviewer_agent,
-    create_feedback_agent,
-    create_orchestrator_agent
+    get_model,
+    get_question_creator_agent,
+    get_difficulty_reviewer_agent,
+    get_feedback_agent,
+    get_orchestrator_agent
 )
 from final.logs import (
     log_question_creator,
@@ -26,6 +40,13 @@ from final.prompts import (
     FEEDBACK_AGENT_PROMPT,
     ORCHESTRATOR_PROMPT
 )
+from final.prompt_cache import (
+    prompt_cache_usage,
+    static_context_enabled,
+    static_system_message,
+    summarize_prompt_cache,
+    supports_cache_control
+)
 
 
 def extract_json_from_response(content: str) -> dict:
@@ -55,12 +76,44 @@ def extract_json_from_response(content: str) -> dict:
     raise ValueError(f"Could not extract JSON from response: {content[:200]}")
 
 
+def count_input_tokens(messages: list) -> int:
+    """Sums the prompt tokens the LLM reported for every call in an agent run."""
+    return sum(
+        (getattr(message, "usage_metadata", None) or {}).get("input_tokens", 0)
+        for message in messages
+    )
+
+
+MAX_DUPLICATE_RETRIES = 3
+
+
+def session_node(node):
+    """Runs the node (and the tools its agent calls) against the state's session.
+
+    Works for async nodes too: the session lives in a ContextVar, so it follows
+    the node's task and the worker threads it starts with asyncio.to_thread.
+    """
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state: AgentState):
+            with session_scope(state.get("session_id")):
+                return await node(state)
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state: AgentState):
+        with session_scope(state.get("session_id")):
+            return node(state)
+    return wrapper
+
+
 import os
 
-def question_creator_node(state: AgentState):
-    """Executes Question Creator agent."""
-    log_question_creator("Iniciando creación de pregunta...")
-    agent = create_question_creator_agent()
+DEFAULT_RETRIEVAL_K = 4
+
+
+def _question_creator_messages(state: AgentState) -> list:
+    """Builds the creator's input: instructions plus feedback, target subtopic and passages."""
     context = ""
     if state.get("difficulty_feedback"):
         context = f"\n\nFeedback del revisor de dificultad: {state['difficulty_feedback']}"
@@ -68,46 +121,126 @@ def question_creator_node(state: AgentState):
     if state.get("user_feedback"):
         context += f"\n\nFeedback sobre el usuario: {state['user_feedback']}"
 
+    if state.get("duplicate_feedback"):
+        context += f"\n\nPregunta descartada por repetida: {state['duplicate_feedback']}"
+
     content_path = os.environ.get("CONTENT_PATH", "SD-Com.txt")
+    retrieval_k = int(os.environ.get("MCQ_RETRIEVAL_K", DEFAULT_RETRIEVAL_K))
+    subtopic = next_subtopic(content_path) if retrieval_k > 0 else None
+    # Static-context mode: the course text goes in a stable system prefix the provider
+    # caches, and only the per-call context (feedback, target subtopic) changes after it
+    system_message = None
+    if static_context_enabled():
+        system_message = static_system_message(
+            QUESTION_CREATOR_PROMPT, content_path, supports_cache_control(get_model())
+        )
+    if subtopic and system_message is not None:
+        log_question_creator(f"Subtema objetivo: {subtopic}")
+        context += f"\n\nSubtema objetivo: {subtopic}"
+    elif subtopic:
+        passages = retrieve_subtopic_passages(content_path, subtopic, retrieval_k)
+        if not passages.startswith("Error"):
+            log_question_creator(f"Subtema objetivo: {subtopic}")
+            context += (
+                f"\n\nSubtema objetivo: {subtopic}\n{passages}\n"
+                f"Basa la pregunta en estos fragmentos; no hace falta leer el archivo."
+            )
+
     message = f"Crea una nueva pregunta de opción múltiple basada en {content_path}.{context}"
+    return [
+        system_message or SystemMessage(content=QUESTION_CREATOR_PROMPT),
+        HumanMessage(content=message)
+    ]
+
+
+def _question_creator_update(state: AgentState, result: dict) -> dict:
+    """Validates the creator's answer and rejects near-duplicates."""
+    input_tokens = count_input_tokens(result["messages"])
+    cache_calls = prompt_cache_usage(result["messages"], "question_creator")
+    cache_summary = summarize_prompt_cache(cache_calls)
+    if cache_summary["calls"]:
+        log_question_creator(
+            f"Cache de prompt: {cache_summary['cached_tokens']}/{cache_summary['input_tokens']} tokens "
+            f"de entrada en cache ({cache_summary['cached_ratio']:.0%}) en {cache_summary['calls']} llamadas"
+        )
+    response_content = result["messages"][-1].content
+    if isinstance(response_content, QuestionOutput):
+        validated = response_content
+    else:
+        json_data = extract_json_from_response(response_content)
+        validated = QuestionOutput(**json_data)
+
+    duplicate = find_duplicate_question(validated.question)
+    retries = state.get("duplicate_retries", 0)
+    if duplicate and retries < MAX_DUPLICATE_RETRIES:
+        log_question_creator(
+            f"Pregunta casi repetida ({duplicate['similarity']:.0%} similar a "
+            f"'{duplicate['question']}'), regenerando..."
+        )
+        return {
+            "duplicate_feedback": (
+                f"'{validated.question}' repite la pregunta existente '{duplicate['question']}'. "
+                f"Crea una pregunta sobre otro concepto."
+            ),
+            "duplicate_retries": retries + 1,
+            "input_tokens": input_tokens,
+            "prompt_cache_calls": cache_calls,
+            "messages": [AIMessage(content=f"Pregunta repetida descartada: {validated.question}")],
+            "next_action": "create_question"
+        }
+
+    log_question_creator(f"Pregunta creada: {validated.question}")
+
+    return {
+        "current_question": validated.question,
+        "question_options": validated.options,
+        "question_correct_index": validated.correct_index,
+        "input_tokens": input_tokens,
+        "prompt_cache_calls": cache_calls,
+        "messages": [AIMessage(content=f"Pregunta propuesta: {validated.question}")],
+        "next_action": "review_difficulty"
+    }
+
+
+def _question_creator_error(e: Exception) -> dict:
+    log_question_creator(f"Error al crear pregunta: {str(e)}")
+    return {
+        "messages": [AIMessage(content=f"Error al crear pregunta: {str(e)}")],
+        "next_action": "create_question"
+    }
 
+
+@session_node
+def question_creator_node(state: AgentState):
+    """Executes Question Creator agent."""
+    log_question_creator("Iniciando creación de pregunta...")
+    agent = get_question_creator_agent()
     try:
-        result = agent.invoke({
-            "messages": [
-                SystemMessage(content=QUESTION_CREATOR_PROMPT),
-                HumanMessage(content=message)
-            ]
-        })
-
-        response_content = result["messages"][-1].content
-        if isinstance(response_content, QuestionOutput):
-            validated = response_content
-        else:
-            json_data = extract_json_from_response(response_content)
-            validated = QuestionOutput(**json_data)
+        messages = _question_creator_messages(state)
+        result = agent.invoke({"messages": messages})
+        return _question_creator_update(state, result)
+    except Exception as e:
+        return _question_creator_error(e)
 
-        log_question_creator(f"Pregunta creada: {validated.question}")
 
-        return {
-            "current_question": validated.question,
-            "question_options": validated.options,
-            "question_correct_index": validated.correct_index,
-            "messages": [AIMessage(content=f"Pregunta propuesta: {validated.question}")],
-            "next_action": "review_difficulty"
-        }
+@session_node
+async def aquestion_creator_node(state: AgentState):
+    """Async Question Creator: awaits the LLM and runs file and store work in a worker thread."""
+    log_question_creator("Iniciando creación de pregunta...")
+    agent = get_question_creator_agent()
+    try:
+        messages = await asyncio.to_thread(_question_creator_messages, state)
+        result = await agent.ainvoke({"messages": messages})
+        return await asyncio.to_thread(_question_creator_update, state, result)
     except Exception as e:
-        log_question_creator(f"Error al crear pregunta: {str(e)}")
-        return {
-            "messages": [AIMessage(content=f"Error al crear pregunta: {str(e)}")],
-            "next_action": "create_question"
-        }
+        return _question_creator_error(e)
 
 
-def difficulty_reviewer_node(state: AgentState):
-    """Executes Difficulty Reviewer agent."""
-    log_difficulty_reviewer("Revisando dificultad de la pregunta propuesta...")
-    agent = create_difficulty_reviewer_agent()
-    score_data = mcq_service.compute_user_score()
+def _difficulty_reviewer_messages(state: AgentState) -> list:
+    """Builds the reviewer's input: the proposed question plus the user's recent performance."""
+    service = get_mcq_service()
+    score_data = service.compute_user_score()
+    analytics = service.get_mastery_analytics()
     recent_correct = sum(1 for p in score_data['recent_performance'] if p['is_correct'])
     recent_total = len(score_data['recent_performance'])
 
@@ -133,77 +266,111 @@ Respuesta correcta: {chr(65 + state['question_correct_index'])}
 
 Contexto rápido: El usuario ha respondido {score_data['total_questions']} preguntas totales.
 Rendimiento reciente: {recent_correct}/{recent_total} correctas en las últimas respuestas.
-
+{format_mastery_analytics(analytics)}
 INSTRUCCIÓN: Analiza si esta pregunta es apropiadamente desafiante para el nivel actual del usuario.
 """
 
     message = f"Revisa la siguiente pregunta y determina si la dificultad es apropiada:\n\n{question_info}"
 
-    try:
-        result = agent.invoke({
-            "messages": [
-                SystemMessage(content=DIFFICULTY_REVIEWER_PROMPT),
-                HumanMessage(content=message)
-            ]
-        })
-
-        response_content = result["messages"][-1].content
-        if isinstance(response_content, DifficultyReviewOutput):
-            validated = response_content
-        else:
-            json_data = extract_json_from_response(response_content)
-            validated = DifficultyReviewOutput(**json_data)
+    return [
+        SystemMessage(content=DIFFICULTY_REVIEWER_PROMPT),
+        HumanMessage(content=message)
+    ]
+
+
+def _difficulty_reviewer_update(state: AgentState, result: dict) -> dict:
+    """Approves the question, or sends it back to the creator up to 3 times."""
+    input_tokens = count_input_tokens(result["messages"])
+    cache_calls = prompt_cache_usage(result["messages"], "difficulty_reviewer")
+    response_content = result["messages"][-1].content
+    if isinstance(response_content, DifficultyReviewOutput):
+        validated = response_content
+    else:
+        json_data = extract_json_from_response(response_content)
+        validated = DifficultyReviewOutput(**json_data)
 
-        approved = validated.approved
-        feedback = validated.feedback
+    approved = validated.approved
+    feedback = validated.feedback
 
-        log_difficulty_reviewer(f"Decisión: {'✓ APROBADA' if approved else '✗ RECHAZADA'}")
-        log_difficulty_reviewer(f"Feedback: {feedback}")
+    log_difficulty_reviewer(f"Decisión: {'✓ APROBADA' if approved else '✗ RECHAZADA'}")
+    log_difficulty_reviewer(f"Feedback: {feedback}")
 
-        if approved:
+    if approved:
+        return {
+            "question_approved": True,
+            "difficulty_feedback": feedback,
+            "input_tokens": input_tokens,
+            "prompt_cache_calls": cache_calls,
+            "messages": [AIMessage(content=f"Pregunta aprobada: {feedback}")],
+            "next_action": "present_question"
+        }
+    else:
+        iteration = state.get("iteration_count", 0) + 1
+        if iteration >= 3:
+            log_difficulty_reviewer("Máximo de iteraciones alcanzado, aprobando pregunta...")
             return {
                 "question_approved": True,
-                "difficulty_feedback": feedback,
-                "messages": [AIMessage(content=f"Pregunta aprobada: {feedback}")],
+                "difficulty_feedback": "Aprobada tras múltiples iteraciones",
+                "input_tokens": input_tokens,
+                "prompt_cache_calls": cache_calls,
+                "messages": [AIMessage(content="Pregunta aprobada tras revisión")],
                 "next_action": "present_question"
             }
         else:
-            iteration = state.get("iteration_count", 0) + 1
-            if iteration >= 3:
-                log_difficulty_reviewer("Máximo de iteraciones alcanzado, aprobando pregunta...")
-                return {
-                    "question_approved": True,
-                    "difficulty_feedback": "Aprobada tras múltiples iteraciones",
-                    "messages": [AIMessage(content="Pregunta aprobada tras revisión")],
-                    "next_action": "present_question"
-                }
-            else:
-                log_difficulty_reviewer(
-                    f"⚠️  Pregunta rechazada - Intento {iteration}/3. "
-                    f"Solicitando ajuste de dificultad..."
-                )
-                return {
-                    "question_approved": False,
-                    "difficulty_feedback": feedback,
-                    "iteration_count": iteration,
-                    "messages": [AIMessage(content=f"Pregunta rechazada: {feedback}")],
-                    "next_action": "create_question"
-                }
+            log_difficulty_reviewer(
+                f"⚠️  Pregunta rechazada - Intento {iteration}/3. "
+                f"Solicitando ajuste de dificultad..."
+            )
+            return {
+                "question_approved": False,
+                "difficulty_feedback": feedback,
+                "iteration_count": iteration,
+                "input_tokens": input_tokens,
+                "prompt_cache_calls": cache_calls,
+                "messages": [AIMessage(content=f"Pregunta rechazada: {feedback}")],
+                "next_action": "create_question"
+            }
+
+
+def _difficulty_reviewer_error(e: Exception) -> dict:
+    log_difficulty_reviewer(f"Error: {str(e)}")
+    return {
+        "question_approved": True,
+        "difficulty_feedback": "Aprobada por defecto tras error",
+        "messages": [AIMessage(content=f"Pregunta aprobada (error: {str(e)})")],
+        "next_action": "present_question"
+    }
+
+
+@session_node
+def difficulty_reviewer_node(state: AgentState):
+    """Executes Difficulty Reviewer agent."""
+    log_difficulty_reviewer("Revisando dificultad de la pregunta propuesta...")
+    agent = get_difficulty_reviewer_agent()
+    try:
+        messages = _difficulty_reviewer_messages(state)
+        result = agent.invoke({"messages": messages})
+        return _difficulty_reviewer_update(state, result)
     except Exception as e:
-        log_difficulty_reviewer(f"Error: {str(e)}")
-        return {
-            "question_approved": True,
-            "difficulty_feedback": "Aprobada por defecto tras error",
-            "messages": [AIMessage(content=f"Pregunta aprobada (error: {str(e)})")],
-            "next_action": "present_question"
-        }
+        return _difficulty_reviewer_error(e)
 
 
-def feedback_agent_node(state: AgentState):
-    """Executes Feedback Agent."""
-    log_feedback_agent("Analizando patrones de aprendizaje del usuario...")
+@session_node
+async def adifficulty_reviewer_node(state: AgentState):
+    """Async Difficulty Reviewer: awaits the LLM and reads the store in a worker thread."""
+    log_difficulty_reviewer("Revisando dificultad de la pregunta propuesta...")
+    agent = get_difficulty_reviewer_agent()
+    try:
+        messages = await asyncio.to_thread(_difficulty_reviewer_messages, state)
+        result = await agent.ainvoke({"messages": messages})
+        return await asyncio.to_thread(_difficulty_reviewer_update, state, result)
+    except Exception as e:
+        return _difficulty_reviewer_error(e)
+
 
-    score_data = mcq_service.compute_user_score()
+def _feedback_skip() -> Optional[dict]:
+    """Update that skips the analysis when the user has fewer than 3 answers, else None."""
+    score_data = get_mcq_service().compute_user_score()
 
     if score_data['total_questions'] < 3:
         log_feedback_agent("Historial insuficiente, omitiendo análisis detallado")
@@ -212,28 +379,67 @@ def feedback_agent_node(state: AgentState):
             "messages": [AIMessage(content="Historial insuficiente para análisis")],
             "next_action": "create_question"
         }
+    return None
 
-    agent = create_feedback_agent()
 
-    message = "Analiza el rendimiento del usuario e identifica patrones, fortalezas y áreas de mejora."
+FEEDBACK_AGENT_MESSAGE = "Analiza el rendimiento del usuario e identifica patrones, fortalezas y áreas de mejora."
 
-    result = agent.invoke({
-        "messages": [
-            SystemMessage(content=FEEDBACK_AGENT_PROMPT),
-            HumanMessage(content=message)
-        ]
-    })
+
+def _feedback_update(result: dict) -> dict:
+    input_tokens = count_input_tokens(result["messages"])
+    cache_calls = prompt_cache_usage(result["messages"], "feedback")
     response_content = result["messages"][-1].content
 
     log_feedback_agent(f"Análisis: {response_content[:200]}...")
 
     return {
         "user_feedback": response_content,
+        "input_tokens": input_tokens,
+        "prompt_cache_calls": cache_calls,
         "messages": [AIMessage(content=response_content)],
         "next_action": "create_question"
     }
 
 
+@session_node
+def feedback_agent_node(state: AgentState):
+    """Executes Feedback Agent."""
+    log_feedback_agent("Analizando patrones de aprendizaje del usuario...")
+
+    skip = _feedback_skip()
+    if skip is not None:
+        return skip
+
+    agent = get_feedback_agent()
+    result = agent.invoke({
+        "messages": [
+            SystemMessage(content=FEEDBACK_AGENT_PROMPT),
+            HumanMessage(content=FEEDBACK_AGENT_MESSAGE)
+        ]
+    })
+    return _feedback_update(result)
+
+
+@session_node
+async def afeedback_agent_node(state: AgentState):
+    """Async Feedback Agent: awaits the LLM instead of blocking a thread."""
+    log_feedback_agent("Analizando patrones de aprendizaje del usuario...")
+
+    skip = await asyncio.to_thread(_feedback_skip)
+    if skip is not None:
+        return skip
+
+    agent = get_feedback_agent()
+    result = await agent.ainvoke({
+        "messages": [
+            SystemMessage(content=FEEDBACK_AGENT_PROMPT),
+            HumanMessage(content=FEEDBACK_AGENT_MESSAGE)
+        ]
+    })
+    return _feedback_update(result)
+
+
+@session_node
 def orchestrator_node(state: AgentState):
     """Executes Orchestrator agent."""
     log_orchestrator("Procesando solicitud del usuario...")
@@ -241,7 +447,7 @@ def orchestrator_node(state: AgentState):
     last_message = state["messages"][-1]
     user_request = last_message.content.lower()
 
-    score_data = mcq_service.compute_user_score()
+    score_data = get_mcq_service().compute_user_score()
     log_orchestrator(
         f"Score actual: {score_data['score_percentage']:.1f}% "
         f"({score_data['correct_count']}/{score_data['total_questions']})"
@@ -251,12 +457,10 @@ def orchestrator_node(state: AgentState):
     if "pregunta" in user_request or "question" in user_request or "nueva" in user_request:
         log_orchestrator("Solicitud de nueva pregunta detectada")
 
-        if score_data['total_questions'] >= 3:
-            log_orchestrator("Historial suficiente, consultando Feedback Agent primero")
-            return {"next_action": "get_feedback"}
-        else:
-            log_orchestrator("Historial insuficiente, procediendo directamente a crear pregunta")
-            return {"next_action": "create_question"}
+        if question_pool.enabled:
+            log_orchestrator("Consultando pool de preguntas pre-generadas")
+            return {"next_action": "present_question"}
+        return {"next_action": route_new_question(score_data)}
 
     elif "rendimiento" in user_request or "puntaje" in user_request or "score" in user_request:
         log_orchestrator("Solicitud de rendimiento detectada")
@@ -269,8 +473,46 @@ def orchestrator_node(state: AgentState):
         return {"next_action": "create_question"}
 
 
+def route_new_question(score_data: dict) -> Literal["get_feedback", "create_question"]:
+    """Chooses how to generate a question on demand."""
+    if score_data['total_questions'] >= 3:
+        log_orchestrator("Historial suficiente, consultando Feedback Agent primero")
+        return "get_feedback"
+    log_orchestrator("Historial insuficiente, procediendo directamente a crear pregunta")
+    return "create_question"
+
+
+@session_node
 def present_question_node(state: AgentState):
-    """Presents approved question to user."""
+    """Presents approved question to user, taking it from the question pool when none was just reviewed."""
+    update = {}
+    if not state.get("question_approved"):
+        service = get_mcq_service()
+        topic = current_topic()
+        band = difficulty_band(service.get_mastery_analytics())
+        session_id = state.get("session_id")
+        pooled = question_pool.pop(
+            topic, band, session_id, accept=lambda q: find_duplicate_question(q["question"]) is None
+        )
+        question_pool.refill(topic, band, session_id)
+        if pooled is None:
+            log_orchestrator(f"Pool sin preguntas para nivel '{band}', generando en línea...")
+            return {"next_action": route_new_question(service.compute_user_score())}
+
+        stats = question_pool.stats()
+        log_orchestrator(
+            f"Pregunta tomada del pool (nivel '{band}', "
+            f"{stats['hits']} aciertos / {stats['misses']} fallos del pool)"
+        )
+        update = {
+            "current_question": pooled["question"],
+            "question_options": pooled["options"],
+            "question_correct_index": pooled["correct_index"],
+            "difficulty_feedback": pooled["difficulty_feedback"],
+            "question_approved": True
+        }
+        state = {**state, **update}
+
     log_orchestrator("Pregunta aprobada, registrando y presentando al usuario...")
 
     question_id = register_multiple_choice_question(
@@ -284,12 +526,60 @@ def present_question_node(state: AgentState):
     log_separator()
 
     return {
+        **update,
         "messages": [AIMessage(content=f"Pregunta presentada: {question_id}")],
         "next_action": "end"
     }
 
 
-def route_orchestrator(state: AgentState) -> Literal["get_feedback", "create_question", "end"]:
+async def aorchestrator_node(state: AgentState):
+    """Async Orchestrator: no LLM call, so the sync node runs in a worker thread (the store may block)."""
+    return await asyncio.to_thread(orchestrator_node, state)
+
+
+async def apresent_question_node(state: AgentState):
+    """Async present_question: registers the question in a worker thread."""
+    return await asyncio.to_thread(present_question_node, state)
+
+
+MAX_PRODUCER_STEPS = 12
+
+
+def produce_reviewed_question(topic: str, band: str, session_id: Optional[str] = None):
+    """Runs the creator/reviewer chain off the request path; returns an approved question or None.
+
+    The creator reads CONTENT_PATH, which is the topic key (see current_topic), and
+    the band hint stands in for the Feedback Agent analysis.
+    """
+    state = {
+        "messages": [],
+        "session_id": session_id or "",
+        "user_feedback": BAND_HINTS[band],
+        "difficulty_feedback": "",
+        "duplicate_feedback": "",
+        "duplicate_retries": 0,
+        "iteration_count": 0
+    }
+    node = question_creator_node
+    for _ in range(MAX_PRODUCER_STEPS):
+        update = node(state)
+        state.update({key: value for key, value in update.items() if key != "messages"})
+        next_action = update.get("next_action")
+        if next_action == "present_question":
+            return {
+                "question": state["current_question"],
+                "options": state["question_options"],
+                "correct_index": state["question_correct_index"],
+                "difficulty_feedback": state["difficulty_feedback"]
+            }
+        node = difficulty_reviewer_node if next_action == "review_difficulty" else question_creator_node
+    return None
+
+
+question_pool = QuestionPool(produce_reviewed_question)
+
+
+def route_orchestrator(state: AgentState) -> Literal["get_feedback", "create_question", "present_question", "end"]:
     next_action = state.get("next_action", "create_question")
     log_orchestrator(f"Routing: {next_action}")
     return next_action
@@ -311,3 +601,7 @@ def route_after_difficulty_review(state: AgentState) -> Literal["create_question
     else:
         log_difficulty_reviewer("Pregunta rechazada, volviendo a Question Creator")
         return "create_question"
+
+
+def route_after_present(state: AgentState) -> Literal["get_feedback", "create_question", "end"]:
+    return state.get("next_action", "end")
@@ -0,0 +1,76 @@
+"""Stable, cache-marked system prefix with the course text, and per-call prompt-cache usage."""
+
+import os
+from typing import Dict, List, Optional
+
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import SystemMessage
+
+from tools.tools import read_text_file
+
+
+STATIC_CONTEXT_HEADER = (
+    "\n\nMATERIAL DEL CURSO ({path}). Está completo a continuación: no necesitas "
+    "las herramientas de lectura ni de búsqueda.\n\n"
+)
+
+
+def static_context_enabled() -> bool:
+    """MCQ_STATIC_CONTEXT=1 puts the full course text in the creator's system prompt"""
+    return os.environ.get("MCQ_STATIC_CONTEXT", "0") == "1"
+
+
+def supports_cache_control(llm) -> bool:
+    """Anthropic caches only up to explicit cache_control breakpoints; OpenAI caches identical prefixes on its own"""
+    return isinstance(llm, ChatAnthropic)
+
+
+def static_system_message(prompt: str, content_path: str, cache_marks: bool) -> Optional[SystemMessage]:
+    """System message with the instructions and the full course text, byte-identical across calls.
+
+    Everything that changes per call (reviewer feedback, target subtopic) must
+    go in the messages after it, so the provider can reuse the cached prefix:
+    with `cache_marks` the block ends in an Anthropic cache_control breakpoint,
+    and OpenAI reuses any identical prefix of 1024+ tokens automatically.
+    Returns None if the course text cannot be read.
+    """
+    course = read_text_file(content_path)
+    if course.startswith("Error"):
+        return None
+    text = prompt + STATIC_CONTEXT_HEADER.format(path=content_path) + course
+    if not cache_marks:
+        return SystemMessage(content=text)
+    return SystemMessage(content=[{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}])
+
+
+def prompt_cache_usage(messages: list, node: str) -> List[Dict]:
+    """Input tokens, cached (read) tokens and cache writes of every LLM call in an agent run."""
+    calls = []
+    for message in messages:
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            continue
+        details = usage.get("input_token_details") or {}
+        input_tokens = usage.get("input_tokens", 0)
+        cached_tokens = details.get("cache_read") or 0
+        calls.append({
+            "node": node,
+            "input_tokens": input_tokens,
+            "cached_tokens": cached_tokens,
+            "cache_creation_tokens": details.get("cache_creation") or 0,
+            "cached_ratio": cached_tokens / input_tokens if input_tokens else 0.0
+        })
+    return calls
+
+
+def summarize_prompt_cache(calls: List[Dict]) -> Dict:
+    """Totals and overall cached-token ratio of a list of calls"""
+    input_tokens = sum(call["input_tokens"] for call in calls)
+    cached_tokens = sum(call["cached_tokens"] for call in calls)
+    return {
+        "calls": len(calls),
+        "input_tokens": input_tokens,
+        "cached_tokens": cached_tokens,
+        "cache_creation_tokens": sum(call["cache_creation_tokens"] for call in calls),
+        "cached_ratio": cached_tokens / input_tokens if input_tokens else 0.0
+    }
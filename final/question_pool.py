@@ -0,0 +1,196 @@
+"""Background pool of pre-generated, already-reviewed questions per session, topic and difficulty band."""
+
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from final.logs import progress_scope
+
+
+DEFAULT_POOL_DEPTH = 0
+DEFAULT_POOL_MAX_AGE = 1800.0
+DEFAULT_POOL_MAX_KEYS = 256
+DEFAULT_POOL_WORKERS = 2
+
+# (topic, band, session_id): a pooled question was reviewed against that session's history
+PoolKey = Tuple[str, str, Optional[str]]
+
+# Bandas de dificultad según la precisión EMA del usuario (0-100)
+BAND_HINTS = {
+    "inicial": "Usuario nuevo sin historial: crea una pregunta de dificultad introductoria.",
+    "bajo": "Nivel objetivo bajo (precisión reciente menor a 50%): refuerza conceptos fundamentales.",
+    "medio": "Nivel objetivo medio (precisión reciente entre 50% y 80%): combina conceptos relacionados.",
+    "alto": "Nivel objetivo alto (precisión reciente sobre 80%): exige aplicar y comparar conceptos.",
+}
+
+
+def difficulty_band(analytics: Dict) -> str:
+    """Maps mastery analytics to the difficulty band used as pool key."""
+    accuracy = analytics.get("ema_accuracy")
+    if accuracy is None:
+        return "inicial"
+    if accuracy < 50:
+        return "bajo"
+    if accuracy < 80:
+        return "medio"
+    return "alto"
+
+
+def current_topic() -> str:
+    """Topic key for pooled questions: the course content they were generated from."""
+    return os.environ.get("CONTENT_PATH", "SD-Com.txt")
+
+
+def _discard_progress(event: Dict):
+    pass
+
+
+class QuestionPool:
+    """Bounded pool of reviewed questions keyed by (topic, band, session), refilled in the background.
+
+    `producer(topic, band, session_id)` runs the creator/reviewer chain against that
+    session's store (its history, duplicates and performance) and returns a question
+    dict or None, so a pooled question is only ever served to the learner it was
+    reviewed for. Eviction: each key keeps at most `depth` questions (overflow drops
+    the oldest), questions older than `max_age` seconds expire, and beyond
+    `max_keys` the least recently used pool is dropped. A depth of 0 (the default)
+    disables the pool.
+
+    Each background job runs in a copy of the caller's context, so it sees the
+    same session ContextVars, but with its progress events discarded: they would
+    otherwise be printed over whatever turn is rendering at the time.
+    """
+
+    def __init__(self, producer: Callable[[str, str, Optional[str]], Optional[Dict]],
+                 depth: Optional[int] = None, max_age: Optional[float] = None,
+                 max_keys: Optional[int] = None, workers: Optional[int] = None):
+        if depth is None:
+            depth = int(os.environ.get("MCQ_POOL_DEPTH", DEFAULT_POOL_DEPTH))
+        if max_age is None:
+            max_age = float(os.environ.get("MCQ_POOL_MAX_AGE", DEFAULT_POOL_MAX_AGE))
+        if max_keys is None:
+            max_keys = int(os.environ.get("MCQ_POOL_MAX_KEYS", DEFAULT_POOL_MAX_KEYS))
+        if workers is None:
+            workers = int(os.environ.get("MCQ_POOL_WORKERS", DEFAULT_POOL_WORKERS))
+        self.producer = producer
+        self.depth = depth
+        self.max_age = max_age
+        self.max_keys = max_keys
+        self.workers = workers
+        self._pools: "OrderedDict[PoolKey, deque]" = OrderedDict()
+        self._pending: Dict[PoolKey, int] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "produced": 0,
+            "failed": 0,
+            "rejected": 0,
+            "evicted_overflow": 0,
+            "evicted_expired": 0,
+            "evicted_keys": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.depth > 0
+
+    def _queue(self, key: PoolKey) -> deque:
+        queue = self._pools.get(key)
+        if queue is None:
+            queue = self._pools[key] = deque()
+            while len(self._pools) > self.max_keys:
+                _, dropped = self._pools.popitem(last=False)
+                self._stats["evicted_keys"] += len(dropped)
+        self._pools.move_to_end(key)
+        now = time.monotonic()
+        while queue and now - queue[0]["pooled_at"] > self.max_age:
+            queue.popleft()
+            self._stats["evicted_expired"] += 1
+        return queue
+
+    def pop(self, topic: str, band: str, session_id: Optional[str] = None,
+            accept: Optional[Callable[[Dict], bool]] = None) -> Optional[Dict]:
+        """Takes the oldest fresh question for (topic, band, session); questions failing `accept` are discarded."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            queue = self._queue((topic, band, session_id or None))
+            while queue:
+                question = queue.popleft()
+                if accept is None or accept(question):
+                    self._stats["hits"] += 1
+                    return question
+                self._stats["rejected"] += 1
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, topic: str, band: str, question: Dict, session_id: Optional[str] = None):
+        """Adds a reviewed question, evicting the oldest one if the key is full."""
+        with self._lock:
+            self._append((topic, band, session_id or None), question)
+
+    def _append(self, key: PoolKey, question: Dict):
+        queue = self._queue(key)
+        queue.append({**question, "pooled_at": time.monotonic()})
+        while len(queue) > self.depth:
+            queue.popleft()
+            self._stats["evicted_overflow"] += 1
+
+    def refill(self, topic: str, band: str, session_id: Optional[str] = None):
+        """Schedules background production until (topic, band, session) holds `depth` questions."""
+        if not self.enabled:
+            return
+        session_id = session_id or None
+        key = (topic, band, session_id)
+        with self._lock:
+            missing = self.depth - len(self._queue(key)) - self._pending.get(key, 0)
+            if missing <= 0:
+                return
+            self._pending[key] = self._pending.get(key, 0) + missing
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="question-pool")
+            executor = self._executor
+        for _ in range(missing):
+            executor.submit(contextvars.copy_context().run, self._produce, topic, band, session_id)
+
+    def _produce(self, topic: str, band: str, session_id: Optional[str]):
+        try:
+            with progress_scope(_discard_progress):
+                question = self.producer(topic, band, session_id)
+        except Exception:
+            question = None
+        with self._lock:
+            key = (topic, band, session_id)
+            self._pending[key] = max(self._pending.get(key, 0) - 1, 0)
+            self._stats["produced" if question else "failed"] += 1
+            if question:
+                self._append(key, question)
+
+    def stats(self) -> Dict:
+        """Hit/miss and eviction counters plus the current pool sizes."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else None,
+                "pending": sum(self._pending.values()),
+                "sizes": {
+                    f"{topic}:{band}:{session_id or '-'}": len(queue)
+                    for (topic, band, session_id), queue in self._pools.items()
+                },
+            }
+
+    def close(self, wait: bool = False):
+        """Stops background production; queued refills are cancelled."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
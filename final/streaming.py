@@ -0,0 +1,139 @@
+"""Runs the graph streaming LLM tokens and progress events, and times the first text of the answer."""
+
+import asyncio
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from colorama import Fore, Style
+from langchain_core.messages import AIMessageChunk
+
+from final.logs import format_progress, progress_scope
+
+
+# Nodes whose LLM tokens reach the user, and what their text is. The creator is
+# not streamed: its drafts may still be rejected by the reviewer, so only the
+# approved question is shown, by the present step.
+STREAMED_NODES = {
+    "get_feedback": "feedback",
+}
+
+# Progress sources that are the answer to the user's request (the presented
+# question, the performance report), not agent status
+VISIBLE_SOURCES = {"user_output"}
+
+STREAM_HEADERS = {
+    "feedback": f"{Fore.MAGENTA}💡 [FEEDBACK AGENT]{Style.RESET_ALL} Análisis: ",
+}
+
+
+class TokenStream:
+    """Turns LLM chunks of the streamed nodes into text events, one stream per LLM call."""
+
+    def feed(self, node: str, call_id: str, content) -> Optional[Dict]:
+        kind = STREAMED_NODES.get(node)
+        if kind is None or not isinstance(content, str) or not content:
+            return None
+        return {"type": "token", "kind": kind, "call_id": call_id, "text": content}
+
+
+class TurnTimer:
+    """Time to the first text of the answer (the presented question or a system message) and total turn latency.
+
+    Streamed analysis tokens are rendered while the user waits but do not stop
+    the clock: they are not what the user asked for.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_visible: Optional[float] = None
+
+    def observe(self, event: Dict):
+        if self.first_visible is None and event.get("source") in VISIBLE_SOURCES:
+            self.first_visible = time.perf_counter() - self.start
+
+    def finish(self) -> Dict:
+        total = time.perf_counter() - self.start
+        return {
+            "first_visible_token_s": self.first_visible if self.first_visible is not None else total,
+            "turn_latency_s": total
+        }
+
+
+class ConsoleRenderer:
+    """Prints progress events and streamed tokens; each LLM call's text starts on its own line."""
+
+    def __init__(self):
+        self._open_call: Optional[str] = None
+
+    def __call__(self, event: Dict):
+        if event["type"] == "token":
+            if event["call_id"] != self._open_call:
+                if self._open_call is not None:
+                    print()
+                print(STREAM_HEADERS[event["kind"]], end="")
+                self._open_call = event["call_id"]
+            print(event["text"], end="", flush=True)
+            return
+        if self._open_call is not None:
+            print()
+            self._open_call = None
+        print(format_progress(event))
+
+
+def stream_turn(app, state: Dict, on_event: Callable[[Dict], None]) -> Tuple[Dict, Dict]:
+    """Runs the sync graph with app.stream; returns the final state and the turn timing."""
+    timer, tokens = TurnTimer(), TokenStream()
+    result = None
+
+    def sink(event: Dict):
+        timer.observe(event)
+        on_event(event)
+
+    with progress_scope(sink):
+        for mode, payload in app.stream(state, stream_mode=["messages", "values"]):
+            if mode == "values":
+                result = payload
+                continue
+            chunk, metadata = payload
+            if isinstance(chunk, AIMessageChunk):
+                event = tokens.feed(metadata.get("langgraph_node"), chunk.id or "", chunk.content)
+                if event is not None:
+                    sink(event)
+    return result or {}, timer.finish()
+
+
+async def astream_turn(app, state: Dict, on_event: Callable[[Dict], None]) -> Tuple[Dict, Dict]:
+    """Runs the async graph with astream_events; returns the final state and the turn timing.
+
+    Progress events may come from worker threads, so both they and the tokens
+    go through one queue and are rendered in order on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    timer, tokens = TurnTimer(), TokenStream()
+
+    def sink(event: Optional[Dict]):
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    async def produce() -> Dict:
+        result = {}
+        try:
+            with progress_scope(sink):
+                async for event in app.astream_events(state, version="v2"):
+                    if event["event"] == "on_chat_model_stream":
+                        token = tokens.feed(
+                            event["metadata"].get("langgraph_node"), event["run_id"], event["data"]["chunk"].content
+                        )
+                        if token is not None:
+                            sink(token)
+                    elif event["event"] == "on_chain_end" and not event.get("parent_ids"):
+                        result = event["data"].get("output") or {}
+        finally:
+            sink(None)
+        return result
+
+    task = asyncio.create_task(produce())
+    while (event := await queue.get()) is not None:
+        timer.observe(event)
+        on_event(event)
+    return await task, timer.finish()
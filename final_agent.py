@@ -1,9 +1,20 @@
-from langgraph.graph import StateGraph, END, START
+import asyncio
+import os
+import sys
+
 from dotenv import load_dotenv
+
+# Before the project imports: the default store, the session registry, the question
+# pool and the HTTP clients read their MCQ_* settings when their modules load
+load_dotenv()
+
+from langgraph.graph import StateGraph, END, START
 from colorama import Fore, Style, init as colorama_init
 from langchain_core.messages import HumanMessage
 
-from tools.tools import check_last_multiple_choice_answer, mcq_service
+from services.registry import session_scope
+from services.service import FileService
+from tools.tools import check_last_multiple_choice_answer, get_mcq_service
 from final.models import AgentState
 from final.nodes import (
     orchestrator_node,
@@ -11,25 +22,41 @@ from final.nodes import (
     question_creator_node,
     difficulty_reviewer_node,
     present_question_node,
+    aorchestrator_node,
+    afeedback_agent_node,
+    aquestion_creator_node,
+    adifficulty_reviewer_node,
+    apresent_question_node,
     route_orchestrator,
     route_after_feedback,
     route_after_question_creation,
-    route_after_difficulty_review
+    route_after_difficulty_review,
+    route_after_present,
+    question_pool
 )
+from final.question_pool import current_topic, difficulty_band
 from final.logs import log_separator, log_user_input, log_user_output
+from final.streaming import ConsoleRenderer, astream_turn, stream_turn
 
-load_dotenv()
 colorama_init(autoreset=True)
 
 
-def build_workflow():
+def build_workflow(use_async: bool = False):
+    """Compiles the graph; with use_async the nodes await the LLM and must be run with ainvoke."""
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("orchestrator", orchestrator_node)
-    workflow.add_node("get_feedback", feedback_agent_node)
-    workflow.add_node("create_question", question_creator_node)
-    workflow.add_node("review_difficulty", difficulty_reviewer_node)
-    workflow.add_node("present_question", present_question_node)
+    if use_async:
+        workflow.add_node("orchestrator", aorchestrator_node)
+        workflow.add_node("get_feedback", afeedback_agent_node)
+        workflow.add_node("create_question", aquestion_creator_node)
+        workflow.add_node("review_difficulty", adifficulty_reviewer_node)
+        workflow.add_node("present_question", apresent_question_node)
+    else:
+        workflow.add_node("orchestrator", orchestrator_node)
+        workflow.add_node("get_feedback", feedback_agent_node)
+        workflow.add_node("create_question", question_creator_node)
+        workflow.add_node("review_difficulty", difficulty_reviewer_node)
+        workflow.add_node("present_question", present_question_node)
 
     workflow.add_edge(START, "orchestrator")
     workflow.add_conditional_edges(
@@ -38,6 +65,7 @@ def build_workflow():
         {
             "get_feedback": "get_feedback",
             "create_question": "create_question",
+            "present_question": "present_question",
             "end": END
         }
     )
@@ -51,7 +79,10 @@ def build_workflow():
     workflow.add_conditional_edges(
         "create_question",
         route_after_question_creation,
-        {"review_difficulty": "review_difficulty"}
+        {
+            "review_difficulty": "review_difficulty",
+            "create_question": "create_question"
+        }
     )
 
     workflow.add_conditional_edges(
@@ -63,19 +94,61 @@ def build_workflow():
         }
     )
 
-    workflow.add_edge("present_question", END)
+    workflow.add_conditional_edges(
+        "present_question",
+        route_after_present,
+        {
+            "get_feedback": "get_feedback",
+            "create_question": "create_question",
+            "end": END
+        }
+    )
 
     return workflow.compile()
 
 
-def main():
-    """Main execution loop."""
+def initial_state(user_input: str, session_id: str) -> dict:
+    return {
+        "messages": [HumanMessage(content=user_input)],
+        "session_id": session_id,
+        "current_question": "",
+        "question_options": [],
+        "question_correct_index": 0,
+        "difficulty_feedback": "",
+        "user_feedback": "",
+        "score_data": {},
+        "iteration_count": 0,
+        "question_approved": False,
+        "duplicate_feedback": "",
+        "duplicate_retries": 0,
+        "next_action": ""
+    }
+
+
+def is_answer(user_input: str) -> bool:
+    return user_input.lower().startswith(('a)', 'b)', 'c)', 'd)')) or \
+        (len(user_input) == 1 and user_input.upper() in 'ABCD')
+
+
+def start_session(session_id: str):
+    """Banner, corpus stats and the first pool refill, before the REPL starts."""
     log_separator()
     print(f"{Fore.CYAN}{Style.BRIGHT}🚀 SISTEMA MULTI-AGENTE DE GENERACIÓN DE PREGUNTAS{Style.RESET_ALL}")
     log_separator()
 
-    app = build_workflow()
-    waiting_for_answer = False
+    # Index a directory of course documents before the pool threads start using it
+    if os.path.isdir(current_topic()):
+        stats = FileService.corpus_stats(current_topic())
+        log_user_output(
+            f"Corpus: {stats['documents']} documentos, {stats['bytes'] / (1 << 20):.1f} MB indexados en "
+            f"{stats['seconds']:.2f}s con {stats['workers']} procesos "
+            f"({stats['mb_per_s'] or 0:.2f} MB/s, {stats['mb_per_s_per_core'] or 0:.2f} MB/s por núcleo)"
+        )
+
+    # Pre-generate questions for the user's current level while they read the menu
+    with session_scope(session_id):
+        band = difficulty_band(get_mcq_service().get_mastery_analytics())
+    question_pool.refill(current_topic(), band, session_id)
 
     print("\nComandos disponibles:")
     print("  - 'pregunta' / 'nueva pregunta': Genera una nueva pregunta")
@@ -84,74 +157,127 @@ def main():
     print("  - 'salir' / 'exit': Termina el programa")
     print()
 
-    while True:
-        log_separator()
 
-        # Change prompt based on whether we're waiting for an answer
-        if waiting_for_answer:
-            prompt_text = f"{Fore.YELLOW}💭 Tu respuesta (A/B/C/D): {Style.RESET_ALL}"
-        else:
-            prompt_text = f"{Fore.BLUE}👤 Tu mensaje: {Style.RESET_ALL}"
+def prompt_text(waiting_for_answer: bool) -> str:
+    # Change prompt based on whether we're waiting for an answer
+    if waiting_for_answer:
+        return f"{Fore.YELLOW}💭 Tu respuesta (A/B/C/D): {Style.RESET_ALL}"
+    return f"{Fore.BLUE}👤 Tu mensaje: {Style.RESET_ALL}"
+
+
+def handle_answer(user_input: str, session_id: str):
+    """Checks the answer against the last question and shows the updated score."""
+    with session_scope(session_id):
+        result_msg = check_last_multiple_choice_answer(user_input)
+        score_data = get_mcq_service().compute_user_score()
+    log_separator()
+    log_user_output("\n" + result_msg + "\n")
+    log_separator()
+
+    if score_data['total_questions'] > 0:
+        print(
+            f"\n{Fore.CYAN}📊 Score actual: {score_data['score_percentage']:.1f}% " +
+            f"({score_data['correct_count']}/{score_data['total_questions']} correctas)"
+            f"{Style.RESET_ALL}\n"
+        )
+
+    print(
+        f"{Fore.GREEN}✅ Respuesta registrada. "
+        f"Puedes pedir otra pregunta o ver tu rendimiento.{Style.RESET_ALL}\n"
+    )
+
+
+def handle_result(result: dict, timing: dict) -> bool:
+    """True if a question was just presented and the next input is its answer."""
+    print(
+        f"{Fore.LIGHTBLACK_EX}⏱️  Primer texto de la respuesta en {timing['first_visible_token_s']:.2f}s, "
+        f"turno completo en {timing['turn_latency_s']:.2f}s{Style.RESET_ALL}"
+    )
+    if result.get("current_question"):
+        print(f"\n{Fore.YELLOW}⏳ Esperando tu respuesta...{Style.RESET_ALL}\n")
+        return True
+    return False
+
 
-        user_input = input(prompt_text).strip()
+def main():
+    """Main execution loop."""
+    app = build_workflow()
+    session_id = os.environ.get("SESSION_ID", "")
+    waiting_for_answer = False
+    start_session(session_id)
+
+    while True:
+        log_separator()
+        user_input = input(prompt_text(waiting_for_answer)).strip()
 
         if not user_input:
             continue
 
         # Check for exit commands
         if user_input.lower() in ['salir', 'exit', 'quit']:
+            question_pool.close()
             log_user_output("¡Hasta luego!")
             break
 
         log_user_input(user_input)
         log_separator()
 
-        if user_input.lower().startswith(('a)', 'b)', 'c)', 'd)')) or \
-           (len(user_input) == 1 and user_input.upper() in 'ABCD'):
-            result_msg = check_last_multiple_choice_answer(user_input)
-            log_separator()
-            log_user_output("\n" + result_msg + "\n")
-            log_separator()
-
-            score_data = mcq_service.compute_user_score()
-            if score_data['total_questions'] > 0:
-                print(
-                    f"\n{Fore.CYAN}📊 Score actual: {score_data['score_percentage']:.1f}% " +
-                    f"({score_data['correct_count']}/{score_data['total_questions']} correctas)"
-                    f"{Style.RESET_ALL}\n"
-                )
-
+        if is_answer(user_input):
+            handle_answer(user_input, session_id)
             waiting_for_answer = False
-            print(
-                f"{Fore.GREEN}✅ Respuesta registrada. "
-                f"Puedes pedir otra pregunta o ver tu rendimiento.{Style.RESET_ALL}\n"
-            )
             continue
 
-        # Process other commands through the multi-agent system
-        initial_state = {
-            "messages": [HumanMessage(content=user_input)],
-            "current_question": "",
-            "question_options": [],
-            "question_correct_index": 0,
-            "difficulty_feedback": "",
-            "user_feedback": "",
-            "score_data": {},
-            "iteration_count": 0,
-            "question_approved": False,
-            "next_action": ""
-        }
+        # Process other commands through the multi-agent system, streaming progress and tokens
+        try:
+            result, timing = stream_turn(app, initial_state(user_input, session_id), ConsoleRenderer())
+            waiting_for_answer = handle_result(result, timing)
+        except Exception as e:
+            log_user_output(f"Error en el sistema: {str(e)}")
+            continue
+
+
+async def run_turn(app, user_input: str, session_id: str) -> dict:
+    """One turn of a session on the async graph; many sessions can run concurrently in one event loop."""
+    return await app.ainvoke(initial_state(user_input, session_id))
+
+
+async def amain():
+    """Async REPL: input() runs in a worker thread and each turn is streamed with astream_events."""
+    app = build_workflow(use_async=True)
+    session_id = os.environ.get("SESSION_ID", "")
+    waiting_for_answer = False
+    await asyncio.to_thread(start_session, session_id)
+
+    while True:
+        log_separator()
+        user_input = (await asyncio.to_thread(input, prompt_text(waiting_for_answer))).strip()
+
+        if not user_input:
+            continue
+
+        if user_input.lower() in ['salir', 'exit', 'quit']:
+            question_pool.close()
+            log_user_output("¡Hasta luego!")
+            break
+
+        log_user_input(user_input)
+        log_separator()
+
+        if is_answer(user_input):
+            await asyncio.to_thread(handle_answer, user_input, session_id)
+            waiting_for_answer = False
+            continue
 
         try:
-            result = app.invoke(initial_state)
-            # Check if a question was just presented
-            if result.get("current_question"):
-                waiting_for_answer = True
-                print(f"\n{Fore.YELLOW}⏳ Esperando tu respuesta...{Style.RESET_ALL}\n")
+            result, timing = await astream_turn(app, initial_state(user_input, session_id), ConsoleRenderer())
+            waiting_for_answer = handle_result(result, timing)
         except Exception as e:
             log_user_output(f"Error en el sistema: {str(e)}")
             continue
 
 
 if __name__ == "__main__":
-    main()
+    if "--async" in sys.argv[1:] or os.environ.get("MCQ_ASYNC") == "1":
+        asyncio.run(amain())
+    else:
+        main()
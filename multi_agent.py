@@ -9,8 +9,18 @@ from dotenv import load_dotenv
 from colorama import Fore, Style, init as colorama_init
 import json
 
-from services.service import FileService, MCQService
+# Antes de importar el proyecto: el servicio por defecto (MCQ_STORE, MCQ_DB_PATH) se crea al cargar tools.tools
+load_dotenv()
+
+from services.service import FileService
+from final.prompt_cache import (
+    prompt_cache_usage,
+    static_context_enabled,
+    static_system_message,
+    summarize_prompt_cache
+)
 from tools.tools import (
+    mcq_service,
     read_text_file,
     search_in_text_file,
     list_multiple_choice_questions,
@@ -20,11 +30,9 @@ from tools.tools import (
     get_answer_history_detailed
 )
 
-load_dotenv()
 colorama_init(autoreset=True)
 
 file_service = FileService()
-mcq_service = MCQService()
 
 
 def create_claude_model():
@@ -276,7 +284,22 @@ def question_creator_node(state: AgentState):
     
     message = f"Crea una nueva pregunta de opción múltiple basada en SD-Com.txt.{context}"
     
-    result = agent.invoke({"messages": [SystemMessage(content=QUESTION_CREATOR_PROMPT), HumanMessage(content=message)]})
+    # Con MCQ_STATIC_CONTEXT=1 el curso va en el prompt de sistema, marcado con cache_control
+    # para que Claude lo lea de su cache en cada llamada después de la primera
+    system_message = None
+    if static_context_enabled():
+        system_message = static_system_message(QUESTION_CREATOR_PROMPT, "SD-Com.txt", cache_marks=True)
+    
+    result = agent.invoke({"messages": [
+        system_message or SystemMessage(content=QUESTION_CREATOR_PROMPT),
+        HumanMessage(content=message)
+    ]})
+    cache_summary = summarize_prompt_cache(prompt_cache_usage(result["messages"], "question_creator"))
+    if cache_summary["calls"]:
+        log_question_creator(
+            f"Cache de prompt: {cache_summary['cached_tokens']}/{cache_summary['input_tokens']} tokens "
+            f"de entrada en cache ({cache_summary['cached_ratio']:.0%})"
+        )
     response_content = result["messages"][-1].content
     
     log_question_creator(f"Respuesta recibida: {response_content[:200]}...")
@@ -0,0 +1,65 @@
+from collections import deque
+from typing import Dict, Iterator, List, Set, Tuple
+
+
+class AhoCorasick:
+    """Autómata de Aho-Corasick: encuentra todas las ocurrencias de varios patrones en una pasada.
+
+    Construirlo cuesta O(suma de largos de los patrones); recorrer un texto cuesta
+    O(largo del texto + ocurrencias), sin importar cuántos patrones haya.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(index)
+
+        # Enlaces de falla en BFS: cada estado hereda las salidas de su sufijo más largo.
+        # Con ellos se arma la tabla de transiciones completa (un dict por estado), así
+        # recorrer el texto es un solo lookup por carácter, sin seguir enlaces de falla
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            fail = self._fail[state]
+            self._out[state] = self._out[state] + self._out[fail]
+            self._delta[state] = {**self._delta[fail], **self._goto[state]}
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                if state:
+                    self._fail[next_state] = self._delta[fail].get(ch, 0)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Genera (posición final exclusiva, índice de patrón) por cada ocurrencia"""
+        delta, out = self._delta, self._out
+        for index in out[0]:
+            yield 0, index
+        state = 0
+        for pos, ch in enumerate(text, start=1):
+            state = delta[state].get(ch, 0)
+            for index in out[state]:
+                yield pos, index
+
+    def matching_patterns(self, text: str) -> Set[int]:
+        """Índices de los patrones que aparecen al menos una vez en el texto"""
+        delta, out = self._delta, self._out
+        found = set(out[0])
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
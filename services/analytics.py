@@ -0,0 +1,100 @@
+import os
+from collections import deque
+from typing import Dict, Optional
+
+
+DEFAULT_WINDOW_SIZE = 10
+DEFAULT_EMA_ALPHA = 0.3
+
+
+class AnswerAnalytics:
+    """Métricas de dominio actualizadas en O(1) por cada respuesta registrada.
+
+    Mantiene la precisión de las últimas `window_size` respuestas (ventana
+    deslizante con suma acumulada), una precisión con promedio móvil exponencial
+    y las rachas de aciertos/errores. Re-responder una pregunta cuenta como un
+    evento nuevo: las métricas siguen el flujo de respuestas, no el estado final.
+    """
+
+    def __init__(self, window_size: Optional[int] = None, ema_alpha: Optional[float] = None):
+        if window_size is None:
+            window_size = int(os.environ.get("MCQ_ANALYTICS_WINDOW", DEFAULT_WINDOW_SIZE))
+        if ema_alpha is None:
+            ema_alpha = float(os.environ.get("MCQ_ANALYTICS_EMA_ALPHA", DEFAULT_EMA_ALPHA))
+        if window_size < 1:
+            raise ValueError("window_size debe ser mayor a 0")
+        if not 0 < ema_alpha <= 1:
+            raise ValueError("ema_alpha debe estar en (0, 1]")
+        self.window_size = window_size
+        self.ema_alpha = ema_alpha
+        self._window: deque = deque(maxlen=window_size)
+        self._window_correct = 0
+        self._ema: Optional[float] = None
+        self._streak = 0
+        self._best_correct_streak = 0
+        self._worst_incorrect_streak = 0
+        self._events = 0
+
+    def record(self, is_correct: bool):
+        """Incorpora una respuesta a todas las métricas"""
+        if len(self._window) == self.window_size and self._window[0]:
+            self._window_correct -= 1
+        self._window.append(is_correct)
+        if is_correct:
+            self._window_correct += 1
+
+        value = 1.0 if is_correct else 0.0
+        if self._ema is None:
+            self._ema = value
+        else:
+            self._ema += self.ema_alpha * (value - self._ema)
+
+        # _streak > 0: aciertos seguidos; _streak < 0: errores seguidos
+        if is_correct:
+            self._streak = self._streak + 1 if self._streak > 0 else 1
+            self._best_correct_streak = max(self._best_correct_streak, self._streak)
+        else:
+            self._streak = self._streak - 1 if self._streak < 0 else -1
+            self._worst_incorrect_streak = max(self._worst_incorrect_streak, -self._streak)
+        self._events += 1
+
+    def snapshot(self) -> Dict:
+        """Retorna las métricas actuales (porcentajes en 0-100, None sin datos)"""
+        window_answers = len(self._window)
+        return {
+            'answers_recorded': self._events,
+            'window_size': self.window_size,
+            'window_answers': window_answers,
+            'window_correct': self._window_correct,
+            'window_accuracy': (self._window_correct / window_answers) * 100 if window_answers else None,
+            'ema_alpha': self.ema_alpha,
+            'ema_accuracy': self._ema * 100 if self._ema is not None else None,
+            'current_streak': abs(self._streak),
+            'current_streak_correct': self._streak > 0 if self._streak else None,
+            'best_correct_streak': self._best_correct_streak,
+            'worst_incorrect_streak': self._worst_incorrect_streak
+        }
+
+    def to_state(self) -> Dict:
+        """Estado serializable para persistir junto al historial"""
+        return {
+            'window_size': self.window_size,
+            'ema_alpha': self.ema_alpha,
+            'window': [int(value) for value in self._window],
+            'ema': self._ema,
+            'streak': self._streak,
+            'best_correct_streak': self._best_correct_streak,
+            'worst_incorrect_streak': self._worst_incorrect_streak,
+            'events': self._events
+        }
+
+    def load_state(self, state: Dict):
+        """Restaura un estado de to_state() conservando la configuración actual de ventana"""
+        self._window.clear()
+        self._window.extend(bool(value) for value in state['window'][-self.window_size:])
+        self._window_correct = sum(self._window)
+        self._ema = state['ema']
+        self._streak = state['streak']
+        self._best_correct_streak = state['best_correct_streak']
+        self._worst_incorrect_streak = state['worst_incorrect_streak']
+        self._events = state['events']
@@ -0,0 +1,465 @@
+import uuid
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional, Sequence, Tuple
+
+from services.analytics import AnswerAnalytics
+from services.service import RECENT_PERFORMANCE_SIZE
+
+
+_NO_ANSWER = -1
+_NOT_AN_OPTION = -1
+_EMPTY = -1
+_COMPACTION_MIN_DEAD = 1024
+_MAX_OPTION_INDEX = 127
+_FIELD_SEP = "\x1f"
+_ID_SIZE = 16
+_ID_HYPHENS = (8, 13, 18, 23)
+
+
+def _get_bit(bits: bytearray, index: int) -> bool:
+    return bool(bits[index >> 3] & (1 << (index & 7)))
+
+
+def _set_bit(bits: bytearray, index: int, value: bool):
+    if value:
+        bits[index >> 3] |= 1 << (index & 7)
+    else:
+        bits[index >> 3] &= ~(1 << (index & 7))
+
+
+def _option_index(options: Sequence[str], text: str) -> int:
+    try:
+        index = options.index(text)
+    except ValueError:
+        return _NOT_AN_OPTION
+    return index if index <= _MAX_OPTION_INDEX else _NOT_AN_OPTION
+
+
+class CompactMCQService:
+    """MCQService con almacenamiento columnar compacto.
+
+    Preguntas y respuestas se guardan en columnas (`array` y `bytearray`) en lugar
+    de un dict por registro, sin un objeto Python por pregunta ni por respuesta:
+
+    - IDs: los 16 bytes del UUID en un bytearray, con una tabla hash de
+      direccionamiento abierto (array('q')) para buscar la fila de un ID.
+    - Texto de la pregunta y opciones: UTF-8 en un único bytearray con offsets.
+    - Respuesta correcta y respuesta del usuario: índice de la opción (array('b'));
+      sólo los textos que no son una de las opciones quedan en un dict aparte.
+    - Timestamps epoch en array('d') y aciertos en un bitmap.
+
+    Los métodos que retornan dicts devuelven vistas de sólo lectura que decodifican
+    las columnas al accederse.
+    """
+
+    def __init__(self):
+        self._q_uuid = bytearray()
+        self._q_id_table = array('q', [_EMPTY] * 8)
+        self._q_text = bytearray()
+        self._q_text_end = array('q')
+        # Preguntas cuyo texto u opciones contienen el separador de campos
+        self._q_text_overflow: Dict[int, Tuple[str, tuple]] = {}
+        self._q_correct = array('b')
+        self._q_correct_text: Dict[int, str] = {}
+        self._q_created = array('d')
+        self._q_answer_slot = array('l')
+
+        # Un slot por respuesta en orden cronológico; re-responder deja el slot
+        # anterior como muerto (bit en _a_live) y agrega uno nuevo al final
+        self._a_qrow = array('l')
+        self._a_time = array('d')
+        self._a_choice = array('b')
+        self._a_free_text: Dict[int, str] = {}
+        self._a_correct = bytearray()
+        self._a_live = bytearray()
+        self._dead_slots = 0
+
+        self._correct_count = 0
+        self._incorrect_count = 0
+        self._recent: deque = deque(maxlen=RECENT_PERFORMANCE_SIZE)
+        self._analytics = AnswerAnalytics()
+
+    def store_question(self, question: str, options: List[str], correct_answer: str) -> str:
+        """Almacena una pregunta de opción múltiple y retorna su ID"""
+        question_uuid = uuid.uuid4()
+        row = len(self._q_created)
+        self._q_uuid += question_uuid.bytes
+        self._index_id(row)
+        fields = [question, *options]
+        if any(_FIELD_SEP in field for field in fields):
+            self._q_text_overflow[row] = (question, tuple(options))
+        else:
+            self._q_text += _FIELD_SEP.join(fields).encode("utf-8")
+        self._q_text_end.append(len(self._q_text))
+        correct_index = _option_index(options, correct_answer)
+        self._q_correct.append(correct_index)
+        if correct_index == _NOT_AN_OPTION:
+            self._q_correct_text[row] = correct_answer
+        self._q_created.append(datetime.now().timestamp())
+        self._q_answer_slot.append(_NO_ANSWER)
+        return str(question_uuid)
+
+    def _index_id(self, row: int):
+        """Agrega la fila a la tabla hash de IDs, duplicándola al superar media carga"""
+        if 2 * (row + 1) > len(self._q_id_table):
+            self._q_id_table = array('q', [_EMPTY] * (2 * len(self._q_id_table)))
+            for existing in range(row):
+                self._place_id(existing)
+        self._place_id(row)
+
+    def _place_id(self, row: int):
+        table = self._q_id_table
+        mask = len(table) - 1
+        i = self._id_hash(row) & mask
+        while table[i] != _EMPTY:
+            i = (i + 1) & mask
+        table[i] = row
+
+    def _id_hash(self, row: int) -> int:
+        start = row * _ID_SIZE
+        return int.from_bytes(self._q_uuid[start:start + 8], "little")
+
+    def _question_id(self, row: int) -> str:
+        start = row * _ID_SIZE
+        h = self._q_uuid[start:start + _ID_SIZE].hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def _row_of(self, question_id: str) -> Optional[int]:
+        # Sólo la forma canónica de str(uuid) (minúsculas, con guiones), como un dict por ID
+        if (not isinstance(question_id, str) or len(question_id) != 36
+                or any(question_id[i] != "-" for i in _ID_HYPHENS)):
+            return None
+        digits = question_id.replace("-", "")
+        try:
+            key_bytes = bytes.fromhex(digits)
+        except ValueError:
+            return None
+        if len(key_bytes) != _ID_SIZE or key_bytes.hex() != digits:
+            return None
+        table = self._q_id_table
+        mask = len(table) - 1
+        i = int.from_bytes(key_bytes[:8], "little") & mask
+        while (row := table[i]) != _EMPTY:
+            start = row * _ID_SIZE
+            if self._q_uuid[start:start + _ID_SIZE] == key_bytes:
+                return row
+            i = (i + 1) & mask
+        return None
+
+    def _question_texts(self, row: int) -> Tuple[str, tuple]:
+        """(texto de la pregunta, opciones) decodificados de la columna de texto"""
+        overflow = self._q_text_overflow.get(row)
+        if overflow is not None:
+            return overflow
+        start = self._q_text_end[row - 1] if row else 0
+        question, *options = self._q_text[start:self._q_text_end[row]].decode("utf-8").split(_FIELD_SEP)
+        return question, tuple(options)
+
+    def _correct_answer(self, row: int, options: tuple) -> str:
+        index = self._q_correct[row]
+        if index == _NOT_AN_OPTION:
+            return self._q_correct_text[row]
+        return options[index]
+
+    def _user_answer(self, slot: int, options: Optional[tuple] = None) -> str:
+        index = self._a_choice[slot]
+        if index == _NOT_AN_OPTION:
+            return self._a_free_text[slot]
+        if options is None:
+            options = self._question_texts(self._a_qrow[slot])[1]
+        return options[index]
+
+    def get_question(self, question_id: str) -> Optional[Mapping]:
+        """Obtiene una pregunta por su ID"""
+        row = self._row_of(question_id)
+        if row is None:
+            return None
+        return _QuestionView(self, row)
+
+    def store_user_answer(self, question_id: str, user_answer: str, is_correct: bool) -> bool:
+        """Almacena la respuesta del usuario y si fue correcta"""
+        row = self._row_of(question_id)
+        if row is None:
+            return False
+
+        previous_slot = self._q_answer_slot[row]
+        if previous_slot != _NO_ANSWER:
+            self._kill_slot(previous_slot)
+
+        slot = len(self._a_qrow)
+        if slot & 7 == 0:
+            self._a_correct.append(0)
+            self._a_live.append(0)
+        self._a_qrow.append(row)
+        self._a_time.append(datetime.now().timestamp())
+        choice = _option_index(self._question_texts(row)[1], user_answer)
+        self._a_choice.append(choice)
+        if choice == _NOT_AN_OPTION:
+            self._a_free_text[slot] = user_answer
+        _set_bit(self._a_correct, slot, is_correct)
+        _set_bit(self._a_live, slot, True)
+        self._q_answer_slot[row] = slot
+
+        if is_correct:
+            self._correct_count += 1
+        else:
+            self._incorrect_count += 1
+        self._analytics.record(is_correct)
+
+        if previous_slot != _NO_ANSWER and self._dead_slots >= max(_COMPACTION_MIN_DEAD, len(self._a_qrow) // 2):
+            self._compact_answers()
+        elif previous_slot != _NO_ANSWER and previous_slot in self._recent:
+            self._rebuild_recent()
+        else:
+            self._recent.append(slot)
+        return True
+
+    def _kill_slot(self, slot: int):
+        if _get_bit(self._a_correct, slot):
+            self._correct_count -= 1
+        else:
+            self._incorrect_count -= 1
+        _set_bit(self._a_live, slot, False)
+        self._a_free_text.pop(slot, None)
+        self._dead_slots += 1
+
+    def _compact_answers(self):
+        """Reescribe las columnas de respuestas sin los slots muertos"""
+        live_slots = list(self._iter_live_slots())
+        qrow, times, choices, free_text = array('l'), array('d'), array('b'), {}
+        correct, live = bytearray((len(live_slots) + 7) // 8), bytearray((len(live_slots) + 7) // 8)
+        for new_slot, slot in enumerate(live_slots):
+            row = self._a_qrow[slot]
+            qrow.append(row)
+            times.append(self._a_time[slot])
+            choices.append(self._a_choice[slot])
+            if slot in self._a_free_text:
+                free_text[new_slot] = self._a_free_text[slot]
+            _set_bit(correct, new_slot, _get_bit(self._a_correct, slot))
+            _set_bit(live, new_slot, True)
+            self._q_answer_slot[row] = new_slot
+        self._a_qrow, self._a_time = qrow, times
+        self._a_choice, self._a_free_text = choices, free_text
+        self._a_correct, self._a_live = correct, live
+        self._dead_slots = 0
+        self._rebuild_recent()
+
+    def _rebuild_recent(self):
+        self._recent.clear()
+        slot = len(self._a_qrow) - 1
+        while slot >= 0 and len(self._recent) < self._recent.maxlen:
+            if _get_bit(self._a_live, slot):
+                self._recent.appendleft(slot)
+            slot -= 1
+
+    def _iter_live_slots(self) -> Iterator[int]:
+        for slot in range(len(self._a_qrow)):
+            if _get_bit(self._a_live, slot):
+                yield slot
+
+    def _question_field(self, row: int, key: str):
+        if key == 'question':
+            return self._question_texts(row)[0]
+        if key == 'options':
+            return list(self._question_texts(row)[1])
+        if key == 'correct_answer':
+            return self._correct_answer(row, self._question_texts(row)[1])
+        if key == 'created_at':
+            return datetime.fromtimestamp(self._q_created[row])
+        raise KeyError(key)
+
+    def _answer_field(self, row: int, key: str):
+        slot = self._q_answer_slot[row]
+        if key == 'user_answer':
+            return self._user_answer(slot)
+        if key == 'is_correct':
+            return _get_bit(self._a_correct, slot)
+        if key == 'answered_at':
+            return datetime.fromtimestamp(self._a_time[slot])
+        raise KeyError(key)
+
+    def get_user_answer(self, question_id: str) -> Optional[Mapping]:
+        """Obtiene la respuesta del usuario para una pregunta"""
+        row = self._row_of(question_id)
+        if row is None or self._q_answer_slot[row] == _NO_ANSWER:
+            return None
+        return _AnswerView(self, row)
+
+    def get_all_questions(self) -> Mapping:
+        """Obtiene todas las preguntas almacenadas (vista de sólo lectura)"""
+        return _QuestionsView(self)
+
+    def get_all_answers(self) -> Mapping:
+        """Obtiene todas las respuestas almacenadas (vista de sólo lectura, en orden cronológico)"""
+        return _AnswersView(self)
+
+    def get_last_question_id(self) -> Optional[str]:
+        """Retorna el ID de la pregunta creada más recientemente"""
+        return self._question_id(len(self._q_created) - 1) if self._q_created else None
+
+    def compute_user_score(self) -> Dict:
+        """Calcula el puntaje y métricas de rendimiento del usuario"""
+        total_questions = self._correct_count + self._incorrect_count
+        if total_questions == 0:
+            return {
+                'total_questions': 0,
+                'correct_count': 0,
+                'incorrect_count': 0,
+                'score_percentage': 0.0,
+                'recent_performance': []
+            }
+
+        return {
+            'total_questions': total_questions,
+            'correct_count': self._correct_count,
+            'incorrect_count': self._incorrect_count,
+            'score_percentage': (self._correct_count / total_questions) * 100,
+            'recent_performance': [
+                {
+                    'question_id': self._question_id(self._a_qrow[slot]),
+                    'is_correct': _get_bit(self._a_correct, slot),
+                    'answered_at': datetime.fromtimestamp(self._a_time[slot])
+                }
+                for slot in self._recent
+            ]
+        }
+
+    def get_mastery_analytics(self) -> Dict:
+        """Retorna precisión en ventana, precisión EMA y rachas (actualizadas en O(1) por respuesta)"""
+        return self._analytics.snapshot()
+
+    def iter_questions(self, cursor: Optional[str] = None,
+                       since: Optional[datetime] = None) -> Iterator[Tuple[str, Mapping]]:
+        """Itera (id, vista de pregunta) de la más reciente a la más antigua.
+
+        `cursor` es el ID de la última pregunta ya vista; `since` corta la iteración
+        en preguntas más viejas.
+        """
+        row = self._cursor_row(cursor) - 1 if cursor is not None else len(self._q_created) - 1
+        min_ts = since.timestamp() if since is not None else float("-inf")
+        while row >= 0 and self._q_created[row] >= min_ts:
+            yield self._question_id(row), _QuestionView(self, row)
+            row -= 1
+
+    def iter_answer_history(self, cursor: Optional[str] = None,
+                            since: Optional[datetime] = None) -> Iterator[Dict]:
+        """Itera el historial de respuestas de la más reciente a la más antigua.
+
+        `cursor` es el question_id de la última respuesta ya vista; `since` corta la
+        iteración en respuestas más viejas.
+        """
+        if cursor is None:
+            slot = len(self._a_qrow) - 1
+        else:
+            slot = self._q_answer_slot[self._cursor_row(cursor)]
+            if slot == _NO_ANSWER:
+                raise ValueError(f"Cursor desconocido: {cursor}")
+            slot -= 1
+        min_ts = since.timestamp() if since is not None else float("-inf")
+        while slot >= 0 and self._a_time[slot] >= min_ts:
+            if _get_bit(self._a_live, slot):
+                yield self._history_entry(slot)
+            slot -= 1
+
+    def _cursor_row(self, cursor: str) -> int:
+        row = self._row_of(cursor)
+        if row is None:
+            raise ValueError(f"Cursor desconocido: {cursor}")
+        return row
+
+    def _history_entry(self, slot: int) -> Dict:
+        row = self._a_qrow[slot]
+        question, options = self._question_texts(row)
+        return {
+            'question_id': self._question_id(row),
+            'question': question,
+            'user_answer': self._user_answer(slot, options),
+            'correct_answer': self._correct_answer(row, options),
+            'is_correct': _get_bit(self._a_correct, slot),
+            'answered_at': datetime.fromtimestamp(self._a_time[slot])
+        }
+
+    def get_answer_history(self) -> List[Dict]:
+        """Retorna historial cronológico de respuestas"""
+        return [self._history_entry(slot) for slot in self._iter_live_slots()]
+
+
+class _QuestionView(Mapping):
+    __slots__ = ("_service", "_row")
+    _KEYS = ('question', 'options', 'correct_answer', 'created_at')
+
+    def __init__(self, service: CompactMCQService, row: int):
+        self._service = service
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._service._question_field(self._row, key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+
+class _AnswerView(Mapping):
+    __slots__ = ("_service", "_row")
+    _KEYS = ('user_answer', 'is_correct', 'answered_at')
+
+    def __init__(self, service: CompactMCQService, row: int):
+        self._service = service
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._service._answer_field(self._row, key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+
+class _QuestionsView(Mapping):
+    __slots__ = ("_service",)
+
+    def __init__(self, service: CompactMCQService):
+        self._service = service
+
+    def __getitem__(self, question_id):
+        row = self._service._row_of(question_id)
+        if row is None:
+            raise KeyError(question_id)
+        return _QuestionView(self._service, row)
+
+    def __iter__(self):
+        service = self._service
+        for row in range(len(service._q_created)):
+            yield service._question_id(row)
+
+    def __len__(self):
+        return len(self._service._q_created)
+
+
+class _AnswersView(Mapping):
+    __slots__ = ("_service",)
+
+    def __init__(self, service: CompactMCQService):
+        self._service = service
+
+    def __getitem__(self, question_id):
+        answer = self._service.get_user_answer(question_id)
+        if answer is None:
+            raise KeyError(question_id)
+        return answer
+
+    def __iter__(self):
+        service = self._service
+        for slot in service._iter_live_slots():
+            yield service._question_id(service._a_qrow[slot])
+
+    def __len__(self):
+        return self._service._correct_count + self._service._incorrect_count
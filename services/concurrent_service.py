@@ -0,0 +1,113 @@
+import functools
+import threading
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional
+
+from services.service import MCQService, _iter_newest_first
+
+
+class ThreadSafeMCQService(MCQService):
+    """MCQService seguro para hilos: escrituras serializadas, lecturas sin lock.
+
+    Las escrituras toman un lock y, al terminar, publican en un único atributo
+    un snapshot inmutable del puntaje y la analítica (copy-on-write). Las
+    lecturas frecuentes (compute_user_score, get_mastery_analytics,
+    get_last_question_id) sólo leen ese atributo, por lo que nunca bloquean ni
+    iteran estructuras que otro hilo está modificando. El historial se recorre
+    sobre el índice de orden vigente al empezar, que las escrituras sólo extienden.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._write_lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        self._published = (super().compute_user_score(), super().get_mastery_analytics())
+
+    def store_question(self, question: str, options: List[str], correct_answer: str) -> str:
+        """Almacena una pregunta de opción múltiple y retorna su ID"""
+        with self._write_lock:
+            question_id = super().store_question(question, options, correct_answer)
+        return question_id
+
+    def store_user_answer(self, question_id: str, user_answer: str, is_correct: bool) -> bool:
+        """Almacena la respuesta del usuario y si fue correcta"""
+        with self._write_lock:
+            stored = super().store_user_answer(question_id, user_answer, is_correct)
+            if stored:
+                self._publish()
+        return stored
+
+    def compute_user_score(self) -> Dict:
+        """Calcula el puntaje y métricas de rendimiento del usuario"""
+        score, _ = self._published
+        return {**score, 'recent_performance': list(score['recent_performance'])}
+
+    def get_mastery_analytics(self) -> Dict:
+        """Retorna precisión en ventana, precisión EMA y rachas (actualizadas en O(1) por respuesta)"""
+        _, analytics = self._published
+        return dict(analytics)
+
+    def iter_answer_history(self, cursor: Optional[str] = None,
+                            since: Optional[datetime] = None) -> Iterator[Dict]:
+        """Itera el historial de respuestas de la más reciente a la más antigua.
+
+        Toma el índice de orden vigente bajo el lock (la compactación lo reemplaza
+        en vez de mutarlo) y lo recorre sin lock.
+        """
+        with self._write_lock:
+            order, positions = self._answer_order, self._answer_pos
+        for qid in _iter_newest_first(order, positions, cursor):
+            ans = self._answers.get(qid)
+            if ans is None:
+                # Se está re-respondiendo: la nueva respuesta queda más adelante en el orden
+                continue
+            if since is not None and ans['answered_at'] < since:
+                return
+            question_data = self._questions.get(qid, {})
+            yield {
+                'question_id': qid,
+                'question': question_data.get('question', ''),
+                'user_answer': ans['user_answer'],
+                'correct_answer': question_data.get('correct_answer', ''),
+                'is_correct': ans['is_correct'],
+                'answered_at': ans['answered_at']
+            }
+
+    def get_answer_history(self) -> List[Dict]:
+        """Retorna historial cronológico de respuestas"""
+        history = list(self.iter_answer_history())
+        history.reverse()
+        return history
+
+    def get_last_question_id(self) -> Optional[str]:
+        """Retorna el ID de la pregunta creada más recientemente"""
+        return self._last_question_id
+
+
+class LockedMCQService:
+    """Envuelve cualquier store (compact, eventlog...) serializando cada llamada con un lock.
+
+    Los métodos iter_* se consumen completos bajo el lock y se retornan como
+    iterador sobre esa copia, de modo que nunca se recorre una estructura que
+    otro hilo está modificando. Los atributos que no son métodos se leen tal cual.
+    """
+
+    def __init__(self, service):
+        self._service = service
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._service, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def locked(*args, **kwargs):
+            with self._lock:
+                result = attr(*args, **kwargs)
+                if name.startswith("iter_"):
+                    result = iter(list(result))
+            return result
+        return locked
@@ -0,0 +1,173 @@
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+DEFAULT_MMAP_THRESHOLD = 1 << 20
+DEFAULT_MAX_ENTRIES = 16
+
+
+def _close_quietly(resource):
+    try:
+        resource.close()
+    except BufferError:
+        # Un índice en uso todavía exporta vistas del mapeo: se cierra cuando se liberan
+        pass
+
+
+class CachedContent:
+    """Una versión concreta de un archivo: su clave (ruta, mtime, tamaño), el texto decodificado,
+    los índices construidos sobre él y los recursos abiertos para él (archivos de índices
+    mapeados), que se descartan y cierran junto con la versión"""
+
+    __slots__ = ('key', 'text', '_buffer', '_indexes', '_resources')
+
+    def __init__(self, key: Tuple[str, int, int], text: str, buffer=None):
+        self.key = key
+        self.text = text
+        self._buffer = buffer
+        self._indexes: Dict[str, Any] = {}
+        self._resources: Dict[str, Any] = {}
+
+    def index(self, name: str, build: Callable[[str], Any]) -> Any:
+        """Retorna el índice `name` de esta versión, construyéndolo con build(text) la primera vez"""
+        value = self._indexes.get(name)
+        if value is None:
+            value = self._indexes.setdefault(name, build(self.text))
+        return value
+
+    def peek(self, name: str) -> Any:
+        """El índice `name` si ya se construyó, sin construirlo"""
+        return self._indexes.get(name)
+
+    def resource(self, name: str, open_resource: Callable[[], Any]) -> Any:
+        """Recurso `name` de esta versión, abierto con open_resource() la primera vez (puede ser None).
+
+        Queda a cargo de la entrada: se cierra en close(), al salir la versión del cache.
+        """
+        try:
+            return self._resources[name]
+        except KeyError:
+            pass
+        opened = open_resource()
+        value = self._resources.setdefault(name, opened)
+        if value is not opened and opened is not None:
+            _close_quietly(opened)
+        return value
+
+    def close(self):
+        """Descarta los índices y cierra los recursos de la versión"""
+        self._indexes.clear()
+        resources, self._resources = self._resources, {}
+        for resource in resources.values():
+            if resource is not None:
+                _close_quietly(resource)
+
+    def raw(self) -> memoryview:
+        """Bytes del archivo sin copiar (mapeados en memoria para archivos grandes)"""
+        if self._buffer is None:
+            self._buffer = self.text.encode('utf-8')
+        return memoryview(self._buffer)
+
+
+class ContentCache:
+    """Cache de archivos de texto ya decodificados, invalidado por (ruta, mtime, tamaño).
+
+    Cada lectura hace sólo un os.stat: si mtime o tamaño cambiaron, el archivo se
+    relee y la versión anterior se descarta. Los archivos desde `mmap_threshold`
+    bytes se mapean en memoria y se decodifican directo del mapeo, sin un buffer
+    intermedio. Mantiene a lo sumo `max_entries` archivos (LRU); las versiones
+    reemplazadas o desalojadas se cierran (ver CachedContent.close).
+    """
+
+    def __init__(self, mmap_threshold: Optional[int] = None, max_entries: Optional[int] = None):
+        if mmap_threshold is None:
+            mmap_threshold = int(os.environ.get("MCQ_MMAP_THRESHOLD", DEFAULT_MMAP_THRESHOLD))
+        if max_entries is None:
+            max_entries = int(os.environ.get("MCQ_CONTENT_CACHE_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.mmap_threshold = mmap_threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedContent]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_read = 0
+        self._bytes_saved = 0
+
+    def get(self, file_path: str) -> CachedContent:
+        """Retorna la versión vigente del archivo, leyéndolo sólo si cambió"""
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key[0])
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(key[0])
+                self._hits += 1
+                self._bytes_saved += stat.st_size
+                return entry
+
+        entry = self._load(file_path, key)
+        evicted = []
+        with self._lock:
+            self._misses += 1
+            self._bytes_read += stat.st_size
+            current = self._entries.get(key[0])
+            if current is not None and current.key == key:
+                # Otro hilo cargó la misma versión mientras tanto: se conserva la suya
+                self._entries.move_to_end(key[0])
+                return current
+            if current is not None:
+                evicted.append(current)
+            self._entries[key[0]] = entry
+            self._entries.move_to_end(key[0])
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return entry
+
+    def read_text(self, file_path: str) -> str:
+        return self.get(file_path).text
+
+    def _load(self, file_path: str, key: Tuple[str, int, int]) -> CachedContent:
+        size = key[2]
+        with open(file_path, 'rb') as f:
+            if size >= self.mmap_threshold and size > 0:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+        text = str(buffer, 'utf-8')
+        if '\r' in text:
+            # Mismos saltos de línea universales que open(..., 'r')
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return CachedContent(key, text, buffer)
+
+    def invalidate(self, file_path: Optional[str] = None):
+        """Descarta un archivo (o todos) del cache"""
+        with self._lock:
+            if file_path is None:
+                evicted = list(self._entries.values())
+                self._entries.clear()
+            else:
+                evicted = [self._entries.pop(os.path.abspath(file_path), None)]
+        for entry in evicted:
+            if entry is not None:
+                entry.close()
+
+    def stats(self) -> Dict:
+        """Aciertos, fallos, tasa de acierto y bytes leídos/ahorrados"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else None,
+                'bytes_read': self._bytes_read,
+                'bytes_saved': self._bytes_saved,
+                'entries': len(self._entries)
+            }
+
+
+content_cache = ContentCache()
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from services.content_cache import content_cache
+from services.index_store import index_store
+from services.retrieval import BM25Index, build_passages, passage_terms
+from services.sections import split_sections
+from services.suffix_index import LineSuffixIndex
+
+
+# Con menos bytes pendientes, arrancar el pool de procesos cuesta más que indexar en serie
+DEFAULT_MIN_PARALLEL_BYTES = 1 << 20
+
+
+def list_documents(directory: str) -> List[str]:
+    """Archivos .txt del directorio (y subdirectorios) en orden estable; su posición es el doc_id"""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith('.txt'))
+    return paths
+
+
+def _document_key(file_path: str) -> Tuple[str, int, int]:
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def ingest_document(file_path: str) -> Dict:
+    """Lee e indexa un documento: secciones, pasajes con sus términos e índice de sufijos.
+
+    Se ejecuta en los procesos del pool, así que sólo usa y retorna datos serializables.
+    """
+    entry = content_cache.get(file_path)
+    text = entry.text
+    sections = split_sections(text)
+    passages = build_passages(text, sections)
+    return {
+        'key': entry.key,
+        'sections': sections,
+        'passages': passages,
+        'term_counts': [passage_terms(p) for p in passages],
+        # Del archivo de índices en disco si el documento no cambió desde la última ingesta
+        'suffix_ci': index_store.get(entry, "suffix_ci", lambda text: LineSuffixIndex.from_text(text, False))
+    }
+
+
+class Corpus:
+    """Varios documentos del curso indexados como uno solo.
+
+    Las secciones y pasajes llevan ids globales y el doc_id/file_path del documento
+    del que vienen; los números de línea son siempre los del propio documento.
+    El índice BM25 se arma sobre los pasajes de todos los documentos, así los
+    puntajes son comparables entre documentos.
+    """
+
+    def __init__(self, directory: str, documents: List[Dict], stats: Dict):
+        self.directory = directory
+        self.documents = documents
+        self.signature = tuple(doc['key'] for doc in documents)
+        self.stats = stats
+        self.sections: List[Dict] = []
+        self.passages: List[Dict] = []
+        term_counts = []
+        for doc in documents:
+            section_ids = {}
+            for section in doc['sections']:
+                section_ids[section['id']] = len(self.sections) + 1
+                self.sections.append({
+                    **section,
+                    'id': len(self.sections) + 1,
+                    'doc_id': doc['doc_id'],
+                    'document': doc['name'],
+                    'file_path': doc['file_path']
+                })
+            for passage, counts in zip(doc['passages'], doc['term_counts']):
+                self.passages.append({
+                    **passage,
+                    'id': len(self.passages),
+                    'section_id': section_ids[passage['section_id']],
+                    'doc_id': doc['doc_id'],
+                    'document': doc['name'],
+                    'file_path': doc['file_path']
+                })
+                term_counts.append(counts)
+        self.bm25 = BM25Index.from_term_counts(term_counts)
+
+    def read_text(self) -> str:
+        """Texto de todos los documentos, cada uno precedido por su nombre"""
+        return "\n\n".join(
+            f"=== {doc['name']} ===\n" + "\n".join(doc['suffix_ci'].lines)
+            for doc in self.documents
+        )
+
+    def read_section(self, section_id: int) -> Dict:
+        if not 1 <= section_id <= len(self.sections):
+            raise ValueError(f"Sección no encontrada: {section_id}")
+        section = self.sections[section_id - 1]
+        lines = self.documents[section['doc_id']]['suffix_ci'].lines
+        return {**section, 'content': "\n".join(lines[section['start_line'] - 1:section['end_line']])}
+
+    def search_passages(self, query: str, k: int = 5) -> List[Dict]:
+        return [{**self.passages[i], 'score': score} for i, score in self.bm25.search(query, k)]
+
+
+class CorpusLoader:
+    """Ingiere directorios de documentos y conserva el corpus mientras los archivos no cambien.
+
+    Los documentos nuevos o modificados se indexan en paralelo en un pool de
+    `workers` procesos (por defecto uno por núcleo); los que no cambiaron se
+    reutilizan de la ingesta anterior.
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_parallel_bytes: Optional[int] = None):
+        if workers is None:
+            workers = int(os.environ.get("MCQ_INGEST_WORKERS", os.cpu_count() or 1))
+        if min_parallel_bytes is None:
+            min_parallel_bytes = int(os.environ.get("MCQ_INGEST_MIN_PARALLEL_BYTES", DEFAULT_MIN_PARALLEL_BYTES))
+        self.workers = max(1, workers)
+        self.min_parallel_bytes = min_parallel_bytes
+        self._corpora: Dict[str, Corpus] = {}
+        self._lock = threading.Lock()
+
+    def load(self, directory: str) -> Corpus:
+        """Corpus vigente del directorio, reindexando sólo los documentos que cambiaron"""
+        directory = os.path.abspath(directory)
+        paths = list_documents(directory)
+        if not paths:
+            raise FileNotFoundError(f"No hay archivos .txt en el directorio: {directory}")
+        keys = [_document_key(path) for path in paths]
+        with self._lock:
+            corpus = self._corpora.get(directory)
+            if corpus is not None and corpus.signature == tuple(keys):
+                return corpus
+            corpus = self._ingest(directory, paths, keys, corpus)
+            self._corpora[directory] = corpus
+            return corpus
+
+    def _ingest(self, directory: str, paths: List[str], keys: List[Tuple],
+                previous: Optional[Corpus]) -> Corpus:
+        reusable = {doc['key']: doc for doc in previous.documents} if previous else {}
+        pending = [path for path, key in zip(paths, keys) if key not in reusable]
+        pending_bytes = sum(key[2] for key in keys if key not in reusable)
+        workers = min(self.workers, len(pending))
+        if pending_bytes < self.min_parallel_bytes:
+            workers = min(workers, 1)
+
+        started = time.perf_counter()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                ingested = list(pool.map(ingest_document, pending))
+        else:
+            ingested = [ingest_document(path) for path in pending]
+        seconds = time.perf_counter() - started
+
+        by_path = {path: result for path, result in zip(pending, ingested)}
+        documents = []
+        for doc_id, (path, key) in enumerate(zip(paths, keys)):
+            result = by_path.get(path) or reusable[key]
+            documents.append({
+                **result,
+                'doc_id': doc_id,
+                'file_path': path,
+                'name': os.path.relpath(path, directory)
+            })
+
+        megabytes = pending_bytes / (1 << 20)
+        mb_per_s = megabytes / seconds if seconds > 0 else None
+        stats = {
+            'documents': len(documents),
+            'ingested': len(pending),
+            'reused': len(documents) - len(pending),
+            'bytes': pending_bytes,
+            'seconds': seconds,
+            'workers': max(workers, 1),
+            'mb_per_s': mb_per_s,
+            'mb_per_s_per_core': mb_per_s / max(workers, 1) if mb_per_s is not None else None
+        }
+        return Corpus(directory, documents, stats)
+
+
+corpus_loader = CorpusLoader()
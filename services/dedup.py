@@ -0,0 +1,105 @@
+import hashlib
+import random
+import re
+import unicodedata
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_words(text: str) -> List[str]:
+    """Minúsculas, sin acentos y separado en palabras"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _WORD_RE.findall(stripped)
+
+
+class NearDuplicateIndex:
+    """Índice MinHash/LSH sobre shingles de palabras para detectar preguntas casi repetidas.
+
+    Cada texto se resume en una firma de `num_perm` mínimos; la firma se divide
+    en `bands` bandas y dos textos son candidatos si coinciden en alguna banda
+    completa. Entre los candidatos se estima la similitud de Jaccard como la
+    fracción de mínimos iguales y se reporta el más parecido sobre `threshold`.
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 2, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._signatures: Dict[Hashable, Tuple[int, ...]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[Hashable]] = {}
+
+    def _shingles(self, text: str) -> set:
+        """Shingles de `shingle_size` palabras más las palabras de contenido (más de 3 letras)
+
+        Las palabras sueltas toleran inserciones y reordenamientos en preguntas
+        cortas; excluir las cortas evita que artículos y preposiciones las igualen.
+        """
+        words = normalize_words(text)
+        shingles = {word for word in words if len(word) > 3}
+        shingles.update(
+            " ".join(words[i:i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        )
+        if not shingles and words:
+            shingles.add(" ".join(words))
+        return shingles
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """Calcula la firma MinHash del texto"""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            for shingle in self._shingles(text)
+        ]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._perms
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def add(self, key: Hashable, text: str):
+        """Indexa un texto bajo `key` (reindexar la misma key no duplica entradas)"""
+        if key in self._signatures:
+            return
+        signature = self.signature(text)
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def query(self, text: str) -> Optional[Tuple[Hashable, float]]:
+        """Retorna (key, similitud estimada) del texto indexado más parecido sobre el umbral"""
+        signature = self.signature(text)
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best = None
+        for key in candidates:
+            other = self._signatures[key]
+            similarity = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def __len__(self) -> int:
+        return len(self._signatures)
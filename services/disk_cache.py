@@ -0,0 +1,36 @@
+import hashlib
+import os
+import tempfile
+
+from services.content_cache import CachedContent
+
+
+CACHE_DIR_NAME = ".mcq_cache"
+
+
+def entry_hash(entry: CachedContent) -> str:
+    """SHA-256 de una versión cacheada de un archivo"""
+    return entry.index("sha256", lambda text: hashlib.sha256(entry.raw()).hexdigest())
+
+
+def cache_dir(file_path: str) -> str:
+    """Directorio de caches en disco: MCQ_CACHE_DIR o .mcq_cache junto al contenido"""
+    configured = os.environ.get("MCQ_CACHE_DIR")
+    if configured:
+        return configured
+    base = file_path if os.path.isdir(file_path) else os.path.dirname(os.path.abspath(file_path))
+    return os.path.join(base, CACHE_DIR_NAME)
+
+
+def write_atomic(path: str, data: bytes):
+    """Escribe a un temporal y lo renombra: otro proceso nunca lee un archivo a medias"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
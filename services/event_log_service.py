@@ -0,0 +1,166 @@
+import atexit
+import json
+import os
+from datetime import datetime
+from typing import List
+
+from services.service import MCQService
+
+
+SNAPSHOT_VERSION = 1
+
+
+class EventLogMCQService(MCQService):
+    """MCQService persistido como log de eventos append-only con snapshots compactos.
+
+    Cada escritura agrega una línea JSON (question_created / answer_recorded) a
+    events.log. Cada `snapshot_every` eventos se reescribe snapshot.json con el
+    estado completo y el offset del log que cubre, de modo que al reiniciar sólo
+    se reproduce la cola del log posterior al último snapshot.
+    """
+
+    # Se puede cerrar y reabrir sin perder datos (ver MCQServiceRegistry)
+    persistent = True
+
+    def __init__(self, log_dir: str, snapshot_every: int = 1000, fsync: bool = False):
+        super().__init__()
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_dir = log_dir
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._log_path = os.path.join(log_dir, "events.log")
+        self._snapshot_path = os.path.join(log_dir, "snapshot.json")
+        self._events_since_snapshot = 0
+
+        self._replaying = True
+        offset = self._load_snapshot()
+        offset = self._replay_log(offset)
+        self._replaying = False
+        self._log = open(self._log_path, "ab")
+        if self._log.tell() != offset:
+            # Descarta una línea final incompleta (escritura interrumpida) y deja
+            # la posición del archivo en el nuevo final
+            self._log.truncate(offset)
+            self._log.seek(offset)
+        atexit.register(self.close)
+
+    def _load_snapshot(self) -> int:
+        """Restaura el estado del snapshot y retorna el offset del log que ya incluye"""
+        if not os.path.exists(self._snapshot_path):
+            return 0
+        with open(self._snapshot_path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Versión de snapshot no soportada: {snapshot.get('version')}")
+
+        for question_id, question, options, correct_answer, created_at in snapshot["questions"]:
+            self._apply_question(question_id, question, options, correct_answer,
+                                 datetime.fromtimestamp(created_at))
+        for question_id, user_answer, is_correct, answered_at in snapshot["answers"]:
+            self._apply_answer(question_id, user_answer, bool(is_correct),
+                               datetime.fromtimestamp(answered_at))
+        if "analytics" in snapshot:
+            # El snapshot sólo guarda la última respuesta por pregunta; las métricas
+            # del flujo completo de respuestas se restauran tal cual se guardaron
+            self._analytics.load_state(snapshot["analytics"])
+        return snapshot["log_offset"]
+
+    def _replay_log(self, offset: int) -> int:
+        """Aplica los eventos posteriores a `offset` y retorna el final de la última línea válida.
+
+        Sólo la última línea puede estar incompleta (escritura interrumpida); una
+        línea inválida seguida de más eventos es corrupción y se reporta en vez de
+        descartar los eventos válidos que le siguen.
+        """
+        if not os.path.exists(self._log_path):
+            return 0
+        with open(self._log_path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    event = json.loads(line) if line.endswith(b"\n") else None
+                except json.JSONDecodeError:
+                    event = None
+                if event is None:
+                    if f.read(1):
+                        raise ValueError(f"Evento corrupto en {self._log_path} (offset {offset})")
+                    break
+                self._apply_event(event)
+                offset += len(line)
+                self._events_since_snapshot += 1
+        return offset
+
+    def _apply_event(self, event: dict):
+        if event["type"] == "question_created":
+            self._apply_question(event["id"], event["question"], event["options"],
+                                 event["correct_answer"], datetime.fromtimestamp(event["ts"]))
+        elif event["type"] == "answer_recorded":
+            self._apply_answer(event["question_id"], event["user_answer"], event["is_correct"],
+                               datetime.fromtimestamp(event["ts"]))
+        else:
+            raise ValueError(f"Tipo de evento desconocido: {event['type']}")
+
+    def _append_event(self, event: dict):
+        self._log.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._events_since_snapshot += 1
+        if self._events_since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _apply_question(self, question_id: str, question: str, options: List[str],
+                        correct_answer: str, created_at: datetime):
+        super()._apply_question(question_id, question, options, correct_answer, created_at)
+        if not self._replaying:
+            self._append_event({
+                "type": "question_created",
+                "id": question_id,
+                "question": question,
+                "options": options,
+                "correct_answer": correct_answer,
+                "ts": created_at.timestamp()
+            })
+
+    def _apply_answer(self, question_id: str, user_answer: str, is_correct: bool, answered_at: datetime):
+        super()._apply_answer(question_id, user_answer, is_correct, answered_at)
+        if not self._replaying:
+            self._append_event({
+                "type": "answer_recorded",
+                "question_id": question_id,
+                "user_answer": user_answer,
+                "is_correct": is_correct,
+                "ts": answered_at.timestamp()
+            })
+
+    def snapshot(self):
+        """Escribe atómicamente un snapshot del estado actual y del offset del log"""
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            # Cada evento se escribe con flush, así que el tamaño del archivo es el fin del log
+            "log_offset": os.fstat(self._log.fileno()).st_size,
+            "questions": [
+                [qid, q['question'], q['options'], q['correct_answer'], q['created_at'].timestamp()]
+                for qid, q in self._questions.items()
+            ],
+            "answers": [
+                [qid, a['user_answer'], a['is_correct'], a['answered_at'].timestamp()]
+                for qid, a in self._answers.items()
+            ],
+            "analytics": self._analytics.to_state()
+        }
+        tmp_path = self._snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+        self._events_since_snapshot = 0
+
+    def close(self):
+        """Cierra el log de eventos"""
+        if self._log is None:
+            return
+        self._log.close()
+        self._log = None
+        atexit.unregister(self.close)
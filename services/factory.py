@@ -0,0 +1,75 @@
+import hashlib
+import os
+import re
+from typing import Optional
+
+from services.service import MCQService
+
+
+def create_mcq_service(session_id: Optional[str] = None):
+    """Crea el MCQService configurado por MCQ_STORE ('memory' por defecto, 'threadsafe', 'compact', 'sqlite' o 'eventlog')
+
+    Con el pool de preguntas activo (MCQ_POOL_DEPTH > 0) sus hilos leen el servicio
+    de la sesión mientras el turno escribe, así que 'memory' pasa a 'threadsafe' y
+    'compact' y 'eventlog' se envuelven en LockedMCQService ('sqlite' ya es seguro).
+
+    Con session_id, el store sqlite usa un archivo propio por sesión junto a MCQ_DB_PATH
+    y el store eventlog un subdirectorio propio dentro de MCQ_LOG_DIR.
+    """
+    store = os.environ.get("MCQ_STORE", "memory").lower()
+    if _question_pool_enabled():
+        if store == "memory":
+            store = "threadsafe"
+        elif store in ("compact", "eventlog"):
+            from services.concurrent_service import LockedMCQService
+            return LockedMCQService(_create_store(store, session_id))
+    return _create_store(store, session_id)
+
+
+def _create_store(store: str, session_id: Optional[str]):
+    if store == "memory":
+        return MCQService()
+    if store == "threadsafe":
+        from services.concurrent_service import ThreadSafeMCQService
+        return ThreadSafeMCQService()
+    if store == "compact":
+        from services.compact_service import CompactMCQService
+        return CompactMCQService()
+    if store == "sqlite":
+        from services.sqlite_service import SqliteMCQService
+        db_path = os.environ.get("MCQ_DB_PATH", "mcq.db")
+        if session_id:
+            db_path = _session_db_path(db_path, session_id)
+        return SqliteMCQService(db_path)
+    if store == "eventlog":
+        from services.event_log_service import EventLogMCQService
+        log_dir = os.environ.get("MCQ_LOG_DIR", "mcq_events")
+        if session_id:
+            log_dir = os.path.join(log_dir, _safe_session_id(session_id))
+        return EventLogMCQService(log_dir)
+    raise ValueError(f"MCQ_STORE no soportado: {store}")
+
+
+def _question_pool_enabled() -> bool:
+    try:
+        return int(os.environ.get("MCQ_POOL_DEPTH", "0")) > 0
+    except ValueError:
+        return False
+
+
+def _session_db_path(db_path: str, session_id: str) -> str:
+    base, ext = os.path.splitext(db_path)
+    return f"{base}.{_safe_session_id(session_id)}{ext or '.db'}"
+
+
+def _safe_session_id(session_id: str) -> str:
+    """Nombre de archivo único por sesión.
+
+    Un id que ya es seguro se usa tal cual (los archivos existentes siguen
+    valiendo); si no, se sanea y se agrega un hash del id original tras un
+    punto, que nunca aparece en un id seguro: 'a/b' y 'a_b' no comparten store.
+    """
+    if re.fullmatch(r"[A-Za-z0-9_-]{1,64}", session_id):
+        return session_id
+    digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:16]
+    return f"{re.sub(r'[^A-Za-z0-9_-]', '_', session_id)[:64]}.{digest}"
@@ -0,0 +1,308 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from services.content_cache import CachedContent
+from services.disk_cache import cache_dir, entry_hash, write_atomic
+from services.normalize import NormalizedLineIndex
+from services.retrieval import BM25Index, PassageIndex
+from services.suffix_index import LineSuffixIndex, split_lines
+
+
+# Subir la versión ante cualquier cambio del formato o de cómo se construye un índice
+INDEX_FORMAT_VERSION = 1
+MAGIC = b"MCQINDEX"
+# Archivos hasta este tamaño construyen sus índices dentro de la consulta (el arreglo de sufijos cuesta ~14 s/MB)
+DEFAULT_SYNC_BUILD_MAX_BYTES = 32 * 1024
+# magic, versión, reservado, cantidad de secciones, SHA-256 del contenido
+_HEADER = struct.Struct("<8sHHI32s")
+# nombre, offset, largo, crc32
+_ENTRY = struct.Struct("<24sQQI4x")
+_CRC = struct.Struct("<I")
+_ALIGNMENT = 8
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % _ALIGNMENT)
+
+
+def _int_array_bytes(values, typecode: str) -> bytes:
+    """Enteros/reales en little-endian, el orden del archivo"""
+    values = array(typecode, values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _int_array_view(payload: memoryview, typecode: str):
+    """Vista sin copia de los valores (copia sólo en máquinas big-endian)"""
+    if sys.byteorder == "little":
+        return payload.cast(typecode)
+    values = array(typecode)
+    values.frombytes(payload)
+    values.byteswap()
+    return values
+
+
+class IndexFile:
+    """Archivo de índices de una versión del contenido, mapeado en memoria.
+
+    Formato: encabezado (magic, versión, cantidad de secciones y SHA-256 del
+    contenido), tabla de secciones (nombre, offset, largo y crc32), crc32 del
+    encabezado y la tabla, y las secciones alineadas a 8 bytes. Cada sección
+    se verifica contra su crc32 la primera vez que se lee.
+    """
+
+    def __init__(self, buffer: mmap.mmap, sections: Dict[str, Tuple[int, int, int]]):
+        self._buffer = buffer
+        self._sections = sections
+        self._verified = set()
+
+    @classmethod
+    def open(cls, path: str, digest: str) -> Optional["IndexFile"]:
+        """Abre el archivo si existe, es de esta versión del formato y corresponde al contenido; si no, None"""
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < _HEADER.size:
+                    return None
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        magic, version, _, count, content_digest = _HEADER.unpack_from(buffer, 0)
+        table_end = _HEADER.size + count * _ENTRY.size
+        if (magic != MAGIC or version != INDEX_FORMAT_VERSION or content_digest.hex() != digest
+                or len(buffer) < table_end + _CRC.size
+                or _CRC.unpack_from(buffer, table_end)[0] != zlib.crc32(buffer[:table_end])):
+            buffer.close()
+            return None
+        sections = {}
+        for i in range(count):
+            name, offset, length, crc = _ENTRY.unpack_from(buffer, _HEADER.size + i * _ENTRY.size)
+            if offset + length > len(buffer):
+                buffer.close()
+                return None
+            sections[name.rstrip(b"\0").decode('utf-8')] = (offset, length, crc)
+        return cls(buffer, sections)
+
+    def names(self):
+        return list(self._sections)
+
+    def close(self):
+        """Cierra el mapeo; falla con BufferError mientras haya vistas de una sección en uso"""
+        self._buffer.close()
+
+    def section(self, name: str) -> Optional[memoryview]:
+        """Bytes de la sección (sin copiar), o None si no está, su crc32 no coincide o el archivo se cerró"""
+        location = self._sections.get(name)
+        if location is None or self._buffer.closed:
+            return None
+        offset, length, crc = location
+        payload = memoryview(self._buffer)[offset:offset + length]
+        if name not in self._verified:
+            if zlib.crc32(payload) != crc:
+                return None
+            self._verified.add(name)
+        return payload
+
+    @staticmethod
+    def encode(digest: str, sections: Dict[str, bytes]) -> bytes:
+        table_end = _HEADER.size + len(sections) * _ENTRY.size
+        offset = table_end + _CRC.size
+        offset += len(_padding(offset))
+        table, body = [], []
+        for name, payload in sections.items():
+            table.append(_ENTRY.pack(name.encode('utf-8'), offset, len(payload), zlib.crc32(payload)))
+            body.append(payload + _padding(len(payload)))
+            offset += len(body[-1])
+        head = _HEADER.pack(MAGIC, INDEX_FORMAT_VERSION, 0, len(sections), bytes.fromhex(digest)) + b"".join(table)
+        head += _CRC.pack(zlib.crc32(head))
+        return head + _padding(len(head)) + b"".join(body)
+
+
+class IndexCodec(NamedTuple):
+    encode: Callable[[Any], bytes]
+    decode: Callable[[str, memoryview], Any]
+
+
+def _suffix_codec(make: Callable[[str, Any], LineSuffixIndex]) -> IndexCodec:
+    """Sólo se guarda el arreglo de sufijos: el texto indexado se recalcula en O(n) al abrir"""
+    return IndexCodec(
+        encode=lambda index: _int_array_bytes(index.suffix_array, 'i'),
+        decode=lambda text, payload: make(text, _int_array_view(payload, 'i'))
+    )
+
+
+def _encode_passages(index: PassageIndex) -> bytes:
+    ids, weights, counts = array('i'), array('d'), []
+    for term_ids, term_weights in index.bm25.postings.values():
+        ids.extend(term_ids)
+        weights.extend(term_weights)
+        counts.append(len(term_ids))
+    meta = json.dumps({
+        'passages': index.passages,
+        'size': index.bm25.size,
+        'k1': index.bm25.k1,
+        'b': index.bm25.b,
+        'terms': list(index.bm25.postings),
+        'counts': counts
+    }, ensure_ascii=False).encode('utf-8')
+    id_bytes = _int_array_bytes(ids, 'i')
+    return (struct.pack("<Q", len(meta)) + meta + _padding(len(meta))
+            + id_bytes + _padding(len(id_bytes)) + _int_array_bytes(weights, 'd'))
+
+
+def _decode_passages(text: str, payload: memoryview) -> PassageIndex:
+    (meta_length,) = struct.unpack_from("<Q", payload, 0)
+    meta = json.loads(bytes(payload[8:8 + meta_length]))
+    total = sum(meta['counts'])
+    ids_start = 8 + meta_length + len(_padding(meta_length))
+    weights_start = ids_start + total * 4 + len(_padding(total * 4))
+    ids = _int_array_view(payload[ids_start:ids_start + total * 4], 'i')
+    weights = _int_array_view(payload[weights_start:weights_start + total * 8], 'd')
+    postings, position = {}, 0
+    for term, count in zip(meta['terms'], meta['counts']):
+        postings[term] = (ids[position:position + count], weights[position:position + count])
+        position += count
+    return PassageIndex.from_parts(
+        meta['passages'], BM25Index.from_postings(meta['size'], postings, meta['k1'], meta['b'])
+    )
+
+
+# Índices de CachedContent que se persisten, por nombre
+CODECS: Dict[str, IndexCodec] = {
+    "suffix_ci": _suffix_codec(lambda text, sa: LineSuffixIndex(split_lines(text), False, sa)),
+    "suffix_cs": _suffix_codec(lambda text, sa: LineSuffixIndex(split_lines(text), True, sa)),
+    "normalized": _suffix_codec(lambda text, sa: NormalizedLineIndex(split_lines(text), False, sa)),
+    "normalized_stem": _suffix_codec(lambda text, sa: NormalizedLineIndex(split_lines(text), True, sa)),
+    "sections": IndexCodec(
+        encode=lambda sections: json.dumps(sections, ensure_ascii=False).encode('utf-8'),
+        decode=lambda text, payload: json.loads(bytes(payload))
+    ),
+    "passages": IndexCodec(encode=_encode_passages, decode=_decode_passages),
+}
+
+
+class IndexStore:
+    """Persiste cada índice de un archivo en su propio <archivo>.<índice>.idx dentro de cache_dir.
+
+    Cada archivo de índice se abre (mapeado en memoria) la primera vez que se
+    pide ese índice para la versión del contenido, es decir, en la primera
+    búsqueda que lo usa; si ya está, no se reconstruye. Un índice construido se
+    escribe de forma atómica en su archivo, sin reescribir los de los otros
+    índices. El mapeo queda a cargo de la entrada del cache de contenido y se
+    cierra cuando ésta sale del cache. Si el contenido cambia, el hash no
+    coincide y el archivo se ignora y reemplaza. MCQ_INDEX_PERSIST=0 lo desactiva.
+
+    get_ready no espera construcciones largas: los índices que faltan en archivos
+    de más de `sync_build_max_bytes` se construyen en un hilo aparte.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, sync_build_max_bytes: Optional[int] = None):
+        if enabled is None:
+            enabled = os.environ.get("MCQ_INDEX_PERSIST", "1") != "0"
+        if sync_build_max_bytes is None:
+            sync_build_max_bytes = int(os.environ.get("MCQ_INDEX_SYNC_BUILD_MAX_BYTES", DEFAULT_SYNC_BUILD_MAX_BYTES))
+        self.enabled = enabled
+        self.sync_build_max_bytes = sync_build_max_bytes
+        self._builds: Dict[Tuple[Tuple, str], threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._loaded = 0
+        self._built = 0
+        self._written = 0
+
+    @staticmethod
+    def index_path(file_path: str, name: str) -> str:
+        return os.path.join(cache_dir(file_path), f"{os.path.basename(file_path)}.{name}.idx")
+
+    def get(self, entry: CachedContent, name: str, build: Callable[[str], Any]) -> Any:
+        """Índice `name` de la versión cacheada: del archivo de índices si está, si no build(text) y se guarda"""
+        codec = CODECS.get(name)
+        if not self.enabled or codec is None:
+            return build(entry.text)
+        index_file = self._open(entry, name)
+        payload = index_file.section(name) if index_file else None
+        if payload is not None:
+            try:
+                value = codec.decode(entry.text, payload)
+                with self._lock:
+                    self._loaded += 1
+                return value
+            except (ValueError, KeyError, TypeError, struct.error):
+                pass
+        value = build(entry.text)
+        self._save(entry, name, codec.encode(value))
+        return value
+
+    def has(self, entry: CachedContent, name: str) -> bool:
+        """Si el archivo de índices de esta versión ya trae el índice `name`"""
+        if not self.enabled or name not in CODECS:
+            return False
+        index_file = self._open(entry, name)
+        return index_file is not None and name in index_file.names()
+
+    def get_ready(self, entry: CachedContent, name: str, build: Callable[[str], Any]) -> Optional[Any]:
+        """Índice `name` de la versión cacheada sólo si no hay que esperar a construirlo.
+
+        Lo retorna si ya está en la entrada, en el archivo de índices o si el
+        archivo es chico; si no, agenda su construcción en segundo plano (una por
+        versión e índice) y retorna None, para que quien consulta siga sin índice.
+        """
+        value = entry.peek(name)
+        if value is not None:
+            return value
+        stored = lambda text: self.get(entry, name, build)
+        if entry.key[2] <= self.sync_build_max_bytes or self.has(entry, name):
+            return entry.index(name, stored)
+        job = (entry.key, name)
+        with self._lock:
+            if job not in self._builds:
+                thread = threading.Thread(target=self._build_in_background, args=(entry, name, stored, job),
+                                          name=f"index-build-{name}", daemon=True)
+                self._builds[job] = thread
+                thread.start()
+        return None
+
+    def _build_in_background(self, entry: CachedContent, name: str, build: Callable[[str], Any], job):
+        try:
+            entry.index(name, build)
+        finally:
+            with self._lock:
+                self._builds.pop(job, None)
+
+    def wait_for_builds(self, timeout: Optional[float] = None):
+        """Espera las construcciones en segundo plano en curso"""
+        with self._lock:
+            threads = list(self._builds.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def _open(self, entry: CachedContent, name: str) -> Optional[IndexFile]:
+        return entry.resource(
+            f"index_file:{name}",
+            lambda: IndexFile.open(self.index_path(entry.key[0], name), entry_hash(entry))
+        )
+
+    def _save(self, entry: CachedContent, name: str, payload: bytes):
+        # El índice ya quedó en la entrada: el archivo es para la próxima vez que se abra el contenido
+        with self._lock:
+            self._built += 1
+        try:
+            write_atomic(self.index_path(entry.key[0], name), IndexFile.encode(entry_hash(entry), {name: payload}))
+        except OSError:
+            return
+        with self._lock:
+            self._written += 1
+
+    def stats(self) -> Dict:
+        """Índices leídos del disco, construidos y archivos escritos"""
+        with self._lock:
+            return {'loaded': self._loaded, 'built': self._built, 'written': self._written}
+
+
+index_store = IndexStore()
@@ -0,0 +1,118 @@
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+from services.suffix_index import LineSuffixIndex, split_lines
+
+
+_WORD_RE = re.compile(r"\w+")
+_FOLDED: Dict[str, str] = {}
+
+
+def _fold_char(ch: str) -> str:
+    """Un carácter sin mayúsculas ni acentos; puede quedar vacío (marcas combinantes) o crecer (ß → ss)"""
+    folded = _FOLDED.get(ch)
+    if folded is None:
+        decomposed = unicodedata.normalize("NFKD", ch.casefold())
+        folded = _FOLDED[ch] = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return folded
+
+
+def light_stem(word: str) -> str:
+    """Stemming liviano para español: quita el plural y la vocal final de género.
+
+    "servidores", "servidor" → "servidor"; "sistemas", "sistema" → "sistem";
+    "distribuidos", "distribuida" → "distribuid". Sólo recorta el final, así que
+    la raíz es siempre un prefijo de la palabra. Espera una palabra ya normalizada.
+    """
+    if len(word) > 3 and word.endswith("s"):
+        word = word[:-1]
+    if len(word) > 3 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def normalize_text(text: str, stem: bool = False) -> Tuple[str, array]:
+    """Texto sin acentos ni mayúsculas (NFKD + casefold) y su mapa de offsets.
+
+    offsets[i] es la posición en `text` del carácter que originó el carácter i
+    del resultado. Los saltos de línea se conservan, así que el resultado tiene
+    las mismas líneas que el original. Con stem=True cada palabra se reemplaza
+    por su raíz (ver light_stem).
+    """
+    parts = []
+    offsets = array('i')
+    for position, ch in enumerate(text):
+        folded = ch.lower() if ch < "\x80" else _fold_char(ch)
+        parts.append(folded)
+        if len(folded) == 1:
+            offsets.append(position)
+        elif folded:
+            offsets.extend([position] * len(folded))
+    normalized = "".join(parts)
+    if not stem:
+        return normalized, offsets
+
+    parts = []
+    stemmed_offsets = array('i')
+    previous_end = 0
+    for match in _WORD_RE.finditer(normalized):
+        start, end = match.span()
+        root = light_stem(match.group())
+        parts.append(normalized[previous_end:start])
+        parts.append(root)
+        stemmed_offsets.extend(offsets[previous_end:start + len(root)])
+        previous_end = end
+    parts.append(normalized[previous_end:])
+    stemmed_offsets.extend(offsets[previous_end:])
+    return "".join(parts), stemmed_offsets
+
+
+def normalize_term(term: str, stem: bool = False) -> str:
+    """Término de búsqueda con la misma normalización que el índice"""
+    return normalize_text(term, stem)[0]
+
+
+class NormalizedLineIndex(LineSuffixIndex):
+    """Índice de sufijos sobre el texto normalizado (sin acentos ni mayúsculas, con stemming opcional).
+
+    "replicacion" encuentra "Replicación" y, con stem=True, "servidores" encuentra
+    "servidor". Se construye una vez por versión del archivo; cada consulta cuesta
+    lo mismo que una exacta. `offsets` lleva cada carácter normalizado a su
+    posición en el texto original (las líneas unidas con '\\n').
+    """
+
+    def __init__(self, lines: List[str], stem: bool = False, suffix_array=None):
+        self.stem = stem
+        super().__init__(lines, case_sensitive=False, suffix_array=suffix_array)
+        self.original_starts = array('i', [0])
+        for line in lines[:-1]:
+            self.original_starts.append(self.original_starts[-1] + len(line) + 1)
+
+    @classmethod
+    def from_text(cls, text: str, stem: bool = False) -> "NormalizedLineIndex":
+        return cls(split_lines(text), stem)
+
+    def _searchable_text(self, lines: List[str]) -> str:
+        normalized, self.offsets = normalize_text("\n".join(lines), self.stem)
+        return normalized
+
+    def _searchable_term(self, term: str) -> str:
+        return normalize_term(term, self.stem)
+
+    def find_spans(self, term: str) -> List[Tuple[int, int, int]]:
+        """(línea base 0, columna inicial, columna final exclusiva) de cada ocurrencia en el texto original"""
+        positions, length = self.find_positions(term)
+        if not length:
+            return []
+        spans = []
+        starts, original_starts = self.line_starts, self.original_starts
+        for position in positions:
+            line_index = bisect_right(starts, position) - 1
+            start = self.offsets[position]
+            end = self.offsets[position + length - 1] + 1
+            line_start = original_starts[line_index]
+            spans.append((line_index, start - line_start, end - line_start))
+        return spans
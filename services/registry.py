@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+DEFAULT_MAX_SESSIONS = 10_000
+DEFAULT_SESSION_IDLE_SECONDS = 3600.0
+
+current_session_id: ContextVar[Optional[str]] = ContextVar("current_session_id", default=None)
+
+# Sesiones con algún session_scope abierto (cuántos): su servicio está en uso y no se desaloja
+_active_sessions: Dict[str, int] = {}
+_active_lock = threading.Lock()
+
+
+@contextmanager
+def session_scope(session_id: Optional[str]) -> Iterator[None]:
+    """Asocia la sesión al contexto actual (hilo o tarea) mientras dure el bloque.
+
+    Mientras el bloque dure, la sesión queda fijada: ningún registro desaloja ni
+    cierra su servicio.
+    """
+    session_id = session_id or None
+    token = current_session_id.set(session_id)
+    if session_id is not None:
+        with _active_lock:
+            _active_sessions[session_id] = _active_sessions.get(session_id, 0) + 1
+    try:
+        yield
+    finally:
+        if session_id is not None:
+            with _active_lock:
+                if _active_sessions[session_id] == 1:
+                    del _active_sessions[session_id]
+                else:
+                    _active_sessions[session_id] -= 1
+        current_session_id.reset(token)
+
+
+class _Entry:
+    __slots__ = ("service", "last_used")
+
+    def __init__(self, service):
+        self.service = service
+        self.last_used = time.monotonic()
+
+
+class _Shard:
+    __slots__ = ("lock", "services")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.services = {}
+
+
+def _evictable(service) -> bool:
+    """Un servicio persistente (sqlite, eventlog) se reabre con sus datos; uno en memoria sólo se desaloja vacío"""
+    return getattr(service, "persistent", False) or service.get_last_question_id() is None
+
+
+def _close(service):
+    close = getattr(service, "close", None)
+    if close is not None:
+        close()
+
+
+class MCQServiceRegistry:
+    """Registro de un MCQService por sesión, repartido en shards con lock propio.
+
+    La lectura de una sesión existente no toma ningún lock (sólo anota la hora
+    de uso); sólo la creación de una sesión nueva bloquea su shard, así que
+    sesiones distintas no compiten por un dict global.
+
+    Al crear una sesión se desalojan las del shard sin uso hace más de
+    `idle_seconds` y, si el shard supera su parte de `max_sessions`, las menos
+    usadas recientemente; los servicios desalojados se cierran (sqlite y
+    eventlog confirman lo pendiente en disco y se reabren si la sesión vuelve).
+    Nunca se desaloja una sesión en uso (dentro de session_scope, que es donde
+    get_mcq_service la obtiene) ni una en memoria que ya tiene preguntas: su
+    historial no se podría recuperar, así que con muchas sesiones en memoria
+    `max_sessions` puede superarse. idle_seconds=0 desactiva el desalojo por
+    inactividad.
+    """
+
+    def __init__(self, factory: Callable[[str], object], shard_count: int = 64,
+                 max_sessions: Optional[int] = None, idle_seconds: Optional[float] = None):
+        if shard_count < 1:
+            raise ValueError("shard_count debe ser mayor a 0")
+        if max_sessions is None:
+            max_sessions = int(os.environ.get("MCQ_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+        if idle_seconds is None:
+            idle_seconds = float(os.environ.get("MCQ_SESSION_IDLE_SECONDS", DEFAULT_SESSION_IDLE_SECONDS))
+        if max_sessions < 1:
+            raise ValueError("max_sessions debe ser mayor a 0")
+        self._factory = factory
+        self._shards = [_Shard() for _ in range(shard_count)]
+        self._shard_capacity = max(1, -(-max_sessions // shard_count))
+        self.idle_seconds = idle_seconds
+        self._evicted = 0
+
+    def _shard_for(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def get(self, session_id: str):
+        """Retorna el servicio de la sesión, creándolo si no existe"""
+        shard = self._shard_for(session_id)
+        entry = shard.services.get(session_id)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            return entry.service
+        with shard.lock:
+            entry = shard.services.get(session_id)
+            if entry is None:
+                evicted = self._evict(shard)
+                entry = _Entry(self._factory(session_id))
+                shard.services[session_id] = entry
+            else:
+                evicted = []
+        for service in evicted:
+            _close(service)
+        return entry.service
+
+    def _evict(self, shard: _Shard) -> List:
+        """Quita del shard (con su lock tomado) las sesiones inactivas y las que exceden su capacidad"""
+        now = time.monotonic()
+        # Con _active_lock tomado ninguna sesión puede fijarse entre la elección y el pop:
+        # quien la fije después ya no la encuentra y crea (o reabre) su servicio
+        with _active_lock:
+            candidates = [
+                (entry.last_used, sid) for sid, entry in shard.services.items()
+                if sid not in _active_sessions and _evictable(entry.service)
+            ]
+            victims = []
+            if self.idle_seconds > 0:
+                victims = [sid for last_used, sid in candidates if now - last_used > self.idle_seconds]
+            overflow = len(shard.services) - len(victims) + 1 - self._shard_capacity
+            if overflow > 0:
+                idle = set(victims)
+                remaining = sorted(candidate for candidate in candidates if candidate[1] not in idle)
+                victims.extend(sid for _, sid in remaining[:overflow])
+            self._evicted += len(victims)
+            return [shard.services.pop(sid).service for sid in victims]
+
+    def discard(self, session_id: str):
+        """Elimina la sesión del registro (cerrando el servicio si corresponde)"""
+        shard = self._shard_for(session_id)
+        with shard.lock:
+            entry = shard.services.pop(session_id, None)
+        if entry is not None:
+            _close(entry.service)
+
+    @property
+    def evicted(self) -> int:
+        """Sesiones desalojadas por inactividad o capacidad desde que se creó el registro"""
+        return self._evicted
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._shard_for(session_id).services
+
+    def __len__(self) -> int:
+        return sum(len(shard.services) for shard in self._shards)
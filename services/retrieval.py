@@ -0,0 +1,135 @@
+import heapq
+import json
+import math
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from services.dedup import normalize_words
+from services.sections import split_sections
+from services.suffix_index import split_lines
+
+
+# Palabras vacías frecuentes en el material del curso; no aportan a la relevancia
+STOPWORDS = frozenset("""
+a al algo como con de del e el en entre es esta este esto la las lo los mas muy no o para pero
+por que se sin sobre su sus un una uno unos unas y ya ej
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Palabras sin acentos ni mayúsculas, sin palabras vacías"""
+    return [word for word in normalize_words(text) if word not in STOPWORDS]
+
+
+def build_passages(text: str, sections: Optional[List[Dict]] = None) -> List[Dict]:
+    """Un pasaje por párrafo de cada sección, con la sección a la que pertenece"""
+    lines = split_lines(text)
+    passages = []
+    for section in (split_sections(text) if sections is None else sections):
+        for paragraph in section['paragraphs']:
+            body = "\n".join(lines[paragraph['start_line'] - 1:paragraph['end_line']])
+            passages.append({
+                'id': len(passages),
+                'section_id': section['id'],
+                'section_title': section['title'],
+                'start_line': paragraph['start_line'],
+                'end_line': paragraph['end_line'],
+                'text': body
+            })
+    return passages
+
+
+class BM25Index:
+    """Índice BM25 sobre una lista de textos con una matriz término-pasaje dispersa.
+
+    Cada término guarda sus postings como dos arrays paralelos (ids de pasaje y
+    peso BM25 ya calculado con idf, tf y largo del pasaje), así que una consulta
+    sólo suma los arrays de sus términos en un acumulador denso: no se recorre
+    ningún pasaje que no contenga algún término de la consulta.
+    """
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self._build([Counter(tokenize(text)) for text in texts], k1, b)
+
+    @classmethod
+    def from_term_counts(cls, term_counts: List[Counter], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """Índice a partir de los conteos de términos ya tokenizados (p. ej. en otro proceso)"""
+        index = cls.__new__(cls)
+        index._build(term_counts, k1, b)
+        return index
+
+    @classmethod
+    def from_postings(cls, size: int, postings: Dict[str, Tuple], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """Índice con postings ya calculados (p. ej. leídos del índice en disco)"""
+        index = cls.__new__(cls)
+        index.size = size
+        index.k1 = k1
+        index.b = b
+        index._postings = postings
+        return index
+
+    @property
+    def postings(self) -> Dict[str, Tuple]:
+        """Término → (ids de pasaje, pesos BM25)"""
+        return self._postings
+
+    def _build(self, term_counts: List[Counter], k1: float, b: float):
+        self.size = len(term_counts)
+        self.k1 = k1
+        self.b = b
+        lengths = [sum(counts.values()) for counts in term_counts]
+        average_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+        document_frequency = Counter(term for counts in term_counts for term in counts)
+        total = len(term_counts)
+
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        for passage_id, counts in enumerate(term_counts):
+            norm = k1 * (1 - b + b * lengths[passage_id] / average_length)
+            for term, tf in counts.items():
+                df = document_frequency[term]
+                idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+                ids, weights = self._postings.setdefault(term, (array('i'), array('d')))
+                ids.append(passage_id)
+                weights.append(idf * tf * (k1 + 1) / (tf + norm))
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """(índice, puntaje) de los k textos con mayor puntaje BM25, de mayor a menor"""
+        scores = [0.0] * self.size
+        for term, query_tf in Counter(tokenize(query)).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            for passage_id, weight in zip(*postings):
+                scores[passage_id] += query_tf * weight
+        best = heapq.nlargest(k, ((score, i) for i, score in enumerate(scores) if score > 0))
+        return [(i, score) for score, i in best]
+
+
+def load_subtopics(subtopics_path: str) -> List[str]:
+    """Lista de subtemas del curso (JSON con una lista de strings, como benchmark/content/subtopics.json)"""
+    with open(subtopics_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def passage_terms(passage: Dict) -> Counter:
+    """Conteo de términos de un pasaje; el título de la sección se indexa junto al párrafo"""
+    return Counter(tokenize(f"{passage['section_title']}\n{passage['text']}"))
+
+
+class PassageIndex:
+    """Pasajes de un texto y su índice BM25"""
+
+    def __init__(self, text: str):
+        self.passages = build_passages(text)
+        self.bm25 = BM25Index.from_term_counts([passage_terms(p) for p in self.passages])
+
+    @classmethod
+    def from_parts(cls, passages: List[Dict], bm25: BM25Index) -> "PassageIndex":
+        index = cls.__new__(cls)
+        index.passages = passages
+        index.bm25 = bm25
+        return index
+
+    def search(self, query: str, k: int = 5) -> List[Dict]:
+        return [{**self.passages[i], 'score': score} for i, score in self.bm25.search(query, k)]
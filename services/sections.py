@@ -0,0 +1,83 @@
+import re
+from typing import Dict, List
+
+from services.suffix_index import split_lines
+
+
+MAX_HEADING_LENGTH = 80
+_BULLET_RE = re.compile(r"^\s*([*\-•·]|\d+[.)])\s")
+
+
+def _is_heading(line: str) -> bool:
+    """Título: línea no vacía, corta, que no es viñeta ni termina como oración"""
+    stripped = line.strip().lstrip("\ufeff")
+    return (
+        bool(stripped)
+        and len(stripped) <= MAX_HEADING_LENGTH
+        and not _BULLET_RE.match(line)
+        and not stripped.endswith((".", ",", ";"))
+    )
+
+
+def split_sections(text: str) -> List[Dict]:
+    """Divide el contenido en secciones por sus títulos y cada sección en párrafos.
+
+    Un título seguido directamente de otro título es un título de grupo (p. ej.
+    "Tipos de comunicación") y queda como `parent` de las secciones siguientes.
+    Cada viñeta de primer nivel, con sus sub-viñetas, es un párrafo. Las líneas
+    son 1-based e inclusivas, igual que line_number en search_in_file.
+    """
+    lines = split_lines(text)
+    if not any(line.strip() for line in lines):
+        return []
+    headings = []
+    for i, line in enumerate(lines):
+        if not _is_heading(line):
+            continue
+        # Separado por una línea en blanco o pegado a otro título (descarta líneas sueltas de prosa)
+        previous_blank = i == 0 or not lines[i - 1].strip() or (headings and headings[-1] == i - 1)
+        next_blank = i + 1 == len(lines) or not lines[i + 1].strip()
+        if previous_blank or next_blank:
+            headings.append(i)
+
+    if not headings or headings[0] != next((i for i, line in enumerate(lines) if line.strip()), 0):
+        # Texto antes del primer título (o sin títulos): sección introductoria
+        headings.insert(0, -1)
+
+    sections = []
+    parent = None
+    for n, start in enumerate(headings):
+        end = headings[n + 1] - 1 if n + 1 < len(headings) else len(lines) - 1
+        while end > start and not lines[end].strip():
+            end -= 1
+        if start >= 0 and end == start and n + 1 < len(headings):
+            parent = lines[start].strip().lstrip("\ufeff")
+            continue
+        title = lines[start].strip().lstrip("\ufeff") if start >= 0 else "Introducción"
+        body_start = start + 1
+        sections.append({
+            'id': len(sections) + 1,
+            'title': title,
+            'parent': parent,
+            'start_line': max(start, 0) + 1,
+            'end_line': end + 1,
+            'paragraphs': _split_paragraphs(lines, body_start, end)
+        })
+    return sections
+
+
+def _split_paragraphs(lines: List[str], start: int, end: int) -> List[Dict]:
+    paragraphs = []
+    current = None
+    for i in range(start, end + 1):
+        line = lines[i]
+        if not line.strip():
+            current = None
+            continue
+        indented = line[:1].isspace()
+        if current is None or not indented:
+            current = {'start_line': i + 1, 'end_line': i + 1}
+            paragraphs.append(current)
+        else:
+            current['end_line'] = i + 1
+    return paragraphs
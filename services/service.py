@@ -1,24 +1,61 @@
 import os
-from typing import List, Dict, Optional
+import re
+from typing import Callable, List, Dict, Iterator, Optional, Tuple
 import uuid
+from array import array
+from collections import deque
 from datetime import datetime
 
+from services.analytics import AnswerAnalytics
+from services.content_cache import content_cache
+from services.suffix_index import LineSuffixIndex, split_lines
+from services.normalize import NormalizedLineIndex, normalize_term, normalize_text
+from services.aho_corasick import AhoCorasick
+from services.sections import split_sections
+from services.retrieval import PassageIndex
+from services.corpus import corpus_loader
+from services.index_store import index_store
+
+
+RECENT_PERFORMANCE_SIZE = 5
+
 
 class MCQService:
     def __init__(self):
+        # Los dicts preservan el orden de inserción: _questions queda ordenado por
+        # created_at y _answers por answered_at (ver store_user_answer)
         self._questions: Dict[str, Dict] = {}
         self._answers: Dict[str, Dict] = {}
+        self._last_question_id: Optional[str] = None
+        self._correct_count = 0
+        self._incorrect_count = 0
+        self._recent: deque = deque(maxlen=RECENT_PERFORMANCE_SIZE)
+        # Índices posicionales para paginar por cursor sin recorrer ni copiar los dicts.
+        # Re-responder deja un hueco (None) en _answer_order que se compacta luego
+        self._question_order: List[str] = []
+        self._question_pos: Dict[str, int] = {}
+        self._answer_order: List[Optional[str]] = []
+        self._answer_pos: Dict[str, int] = {}
+        self._answer_holes = 0
+        self._analytics = AnswerAnalytics()
     
     def store_question(self, question: str, options: List[str], correct_answer: str) -> str:
         """Almacena una pregunta de opción múltiple y retorna su ID"""
         question_id = str(uuid.uuid4())
+        self._apply_question(question_id, question, options, correct_answer, datetime.now())
+        return question_id
+    
+    def _apply_question(self, question_id: str, question: str, options: List[str],
+                        correct_answer: str, created_at: datetime):
         self._questions[question_id] = {
             'question': question,
             'options': options,
             'correct_answer': correct_answer,
-            'created_at': datetime.now()
+            'created_at': created_at
         }
-        return question_id
+        self._last_question_id = question_id
+        self._question_pos[question_id] = len(self._question_order)
+        self._question_order.append(question_id)
     
     def get_question(self, question_id: str) -> Optional[Dict]:
         """Obtiene una pregunta por su ID"""
@@ -28,13 +65,59 @@ class MCQService:
         """Almacena la respuesta del usuario y si fue correcta"""
         if question_id not in self._questions:
             return False
+        self._apply_answer(question_id, user_answer, is_correct, datetime.now())
+        return True
+    
+    def _apply_answer(self, question_id: str, user_answer: str, is_correct: bool, answered_at: datetime):
+        previous = self._answers.pop(question_id, None)
+        if previous is not None:
+            self._discount_answer(previous)
         
-        self._answers[question_id] = {
+        answer = {
             'user_answer': user_answer,
             'is_correct': is_correct,
-            'answered_at': datetime.now()
+            'answered_at': answered_at
         }
-        return True
+        # Reinsertar al final mantiene _answers en orden cronológico
+        self._answers[question_id] = answer
+        if is_correct:
+            self._correct_count += 1
+        else:
+            self._incorrect_count += 1
+        self._analytics.record(is_correct)
+        
+        if previous is not None and question_id in self._recent:
+            self._rebuild_recent()
+        else:
+            self._recent.append(question_id)
+        
+        previous_pos = self._answer_pos.get(question_id)
+        if previous_pos is not None:
+            self._answer_order[previous_pos] = None
+            self._answer_holes += 1
+        self._answer_pos[question_id] = len(self._answer_order)
+        self._answer_order.append(question_id)
+        if self._answer_holes > len(self._answers):
+            self._compact_answer_order()
+    
+    def _compact_answer_order(self):
+        self._answer_order = list(self._answers)
+        self._answer_pos = {qid: pos for pos, qid in enumerate(self._answer_order)}
+        self._answer_holes = 0
+    
+    def _discount_answer(self, answer: Dict):
+        if answer['is_correct']:
+            self._correct_count -= 1
+        else:
+            self._incorrect_count -= 1
+    
+    def _rebuild_recent(self):
+        """Reconstruye el buffer de recientes desde la cola de _answers (O(tamaño del buffer))"""
+        self._recent.clear()
+        for qid in reversed(self._answers):
+            self._recent.appendleft(qid)
+            if len(self._recent) == self._recent.maxlen:
+                break
     
     def get_user_answer(self, question_id: str) -> Optional[Dict]:
         """Obtiene la respuesta del usuario para una pregunta"""
@@ -50,13 +133,11 @@ class MCQService:
 
     def get_last_question_id(self) -> Optional[str]:
         """Retorna el ID de la pregunta creada más recientemente"""
-        if not self._questions:
-            return None
-        return max(self._questions.items(), key=lambda item: item[1].get('created_at'))[0]
+        return self._last_question_id
     
     def compute_user_score(self) -> Dict:
         """Calcula el puntaje y métricas de rendimiento del usuario"""
-        total_questions = len(self._answers)
+        total_questions = self._correct_count + self._incorrect_count
         if total_questions == 0:
             return {
                 'total_questions': 0,
@@ -66,42 +147,66 @@ class MCQService:
                 'recent_performance': []
             }
         
-        correct_count = sum(1 for ans in self._answers.values() if ans['is_correct'])
-        incorrect_count = total_questions - correct_count
-        score_percentage = (correct_count / total_questions) * 100
-        
-        # Obtener las últimas 5 respuestas
-        sorted_answers = sorted(
-            self._answers.items(),
-            key=lambda x: x[1]['answered_at']
-        )
-        recent_answers = sorted_answers[-5:]
-        recent_performance = [
-            {
+        score_percentage = (self._correct_count / total_questions) * 100
+        recent_performance = []
+        for qid in self._recent:
+            ans = self._answers[qid]
+            recent_performance.append({
                 'question_id': qid,
                 'is_correct': ans['is_correct'],
                 'answered_at': ans['answered_at']
-            }
-            for qid, ans in recent_answers
-        ]
+            })
         
         return {
             'total_questions': total_questions,
-            'correct_count': correct_count,
-            'incorrect_count': incorrect_count,
+            'correct_count': self._correct_count,
+            'incorrect_count': self._incorrect_count,
             'score_percentage': score_percentage,
             'recent_performance': recent_performance
         }
     
+    def get_mastery_analytics(self) -> Dict:
+        """Retorna precisión en ventana, precisión EMA y rachas (actualizadas en O(1) por respuesta)"""
+        return self._analytics.snapshot()
+    
+    def iter_questions(self, cursor: Optional[str] = None,
+                       since: Optional[datetime] = None) -> Iterator[Tuple[str, Dict]]:
+        """Itera (id, pregunta) de la más reciente a la más antigua, sin copiar.
+
+        `cursor` es el ID de la última pregunta ya vista: la iteración continúa con
+        las anteriores a ella. `since` corta la iteración en preguntas más viejas.
+        """
+        for qid in _iter_newest_first(self._question_order, self._question_pos, cursor):
+            question = self._questions[qid]
+            if since is not None and question['created_at'] < since:
+                return
+            yield qid, question
+    
+    def iter_answer_history(self, cursor: Optional[str] = None,
+                            since: Optional[datetime] = None) -> Iterator[Dict]:
+        """Itera el historial de respuestas de la más reciente a la más antigua.
+
+        `cursor` es el question_id de la última respuesta ya vista; `since` corta la
+        iteración en respuestas más viejas.
+        """
+        for qid in _iter_newest_first(self._answer_order, self._answer_pos, cursor):
+            ans = self._answers[qid]
+            if since is not None and ans['answered_at'] < since:
+                return
+            question_data = self._questions.get(qid, {})
+            yield {
+                'question_id': qid,
+                'question': question_data.get('question', ''),
+                'user_answer': ans['user_answer'],
+                'correct_answer': question_data.get('correct_answer', ''),
+                'is_correct': ans['is_correct'],
+                'answered_at': ans['answered_at']
+            }
+    
     def get_answer_history(self) -> List[Dict]:
         """Retorna historial cronológico de respuestas"""
-        sorted_answers = sorted(
-            self._answers.items(),
-            key=lambda x: x[1]['answered_at']
-        )
-        
         history = []
-        for qid, ans in sorted_answers:
+        for qid, ans in self._answers.items():
             question_data = self._questions.get(qid, {})
             history.append({
                 'question_id': qid,
@@ -115,30 +220,350 @@ class MCQService:
         return history
 
 
+def _iter_newest_first(order: List[Optional[str]], positions: Dict[str, int],
+                       cursor: Optional[str]) -> Iterator[str]:
+    if cursor is None:
+        pos = len(order) - 1
+    else:
+        if cursor not in positions:
+            raise ValueError(f"Cursor desconocido: {cursor}")
+        pos = positions[cursor] - 1
+    while pos >= 0:
+        item = order[pos]
+        if item is not None:
+            yield item
+        pos -= 1
+
+
+def _stored_index(file_path: str, name: str, build):
+    """Índice de la versión vigente del archivo; si ya se construyó antes se lee del archivo de índices en disco"""
+    entry = content_cache.get(file_path)
+    return entry.index(name, lambda text: index_store.get(entry, name, build))
+
+
+def _ready_index(file_path: str, name: str, build):
+    """Como _stored_index, pero None si habría que esperar a construirlo (queda construyéndose en segundo plano)"""
+    return index_store.get_ready(content_cache.get(file_path), name, build)
+
+
+def _line_byte_offsets(raw) -> array:
+    """Offset en bytes del inicio de cada línea del archivo"""
+    offsets = array('q', [0])
+    offsets.extend(match.end() for match in re.finditer(rb"\n", raw))
+    return offsets
+
+
+def _search_fold(case_sensitive: bool, normalize: bool, stem: bool) -> Callable[[str], str]:
+    """Transformación que se aplica al término y a cada línea antes de compararlos"""
+    if normalize or stem:
+        return lambda text: normalize_term(text, stem)
+    return (lambda text: text) if case_sensitive else str.lower
+
+
+def _parse_search_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """Cursor de iter_search ("offset:línea") a (offset en bytes, número de línea)"""
+    if cursor is None:
+        return 0, 1
+    try:
+        offset, line_num = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise ValueError(f"Cursor inválido: {cursor}")
+    if offset < 0 or line_num < 1:
+        raise ValueError(f"Cursor inválido: {cursor}")
+    return offset, line_num
+
+
 class FileService:
     @staticmethod
     def read_txt_file(file_path: str) -> str:
+        if os.path.isdir(file_path):
+            # Directorio de documentos: todos sus .txt, cada uno con su nombre
+            return corpus_loader.load(file_path).read_text()
         if not file_path.endswith('.txt'):
             raise ValueError(f"El archivo debe tener extensión .txt: {file_path}")
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        # Se relee sólo si cambió el mtime o el tamaño del archivo
+        return content_cache.read_text(file_path)
 
     @staticmethod
-    def search_in_file(file_path: str, search_term: str,
-                      case_sensitive: bool = False) -> List[Dict[str, any]]:
+    def cache_stats() -> Dict:
+        """Aciertos, fallos y bytes ahorrados por el cache de contenido"""
+        return content_cache.stats()
+
+    @staticmethod
+    def corpus_stats(directory: str) -> Dict:
+        """Documentos, bytes, segundos y MB/s (total y por núcleo) de la última ingesta del directorio"""
+        return corpus_loader.load(directory).stats
+
+    @staticmethod
+    def list_sections(file_path: str) -> List[Dict[str, any]]:
+        """Secciones del archivo (id, título, grupo, líneas y párrafos), calculadas una vez por versión.
+
+        Para un directorio, las secciones de todos sus documentos con ids globales
+        y el doc_id, document y file_path de cada una.
+        """
+        if os.path.isdir(file_path):
+            return corpus_loader.load(file_path).sections
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        return _stored_index(file_path, "sections", split_sections)
+
+    @staticmethod
+    def read_section(file_path: str, section_id: int) -> Dict[str, any]:
+        """Retorna la sección `section_id` con su texto"""
+        if os.path.isdir(file_path):
+            return corpus_loader.load(file_path).read_section(section_id)
+        for section in FileService.list_sections(file_path):
+            if section['id'] == section_id:
+                return {**section, 'content': FileService.read_range(
+                    file_path, section['start_line'], section['end_line']
+                )}
+        raise ValueError(f"Sección no encontrada: {section_id}")
+
+    @staticmethod
+    def read_range(file_path: str, start_line: int, end_line: int) -> str:
+        """Líneas start_line..end_line (1-based, inclusivas) del archivo"""
+        if os.path.isdir(file_path):
+            raise ValueError(
+                f"{file_path} es un directorio: indica la ruta del documento "
+                f"({os.path.join(file_path, '<documento>.txt')})"
+            )
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        lines = content_cache.get(file_path).index("lines", split_lines)
+        if start_line < 1 or end_line < start_line or start_line > len(lines):
+            raise ValueError(f"Rango inválido: {start_line}-{end_line} (el archivo tiene {len(lines)} líneas)")
+        return "\n".join(lines[start_line - 1:end_line])
+
+    @staticmethod
+    def search_passages(file_path: str, query: str, k: int = 5) -> List[Dict[str, any]]:
+        """Los k pasajes (párrafos) más relevantes para la consulta según BM25"""
+        if os.path.isdir(file_path):
+            return corpus_loader.load(file_path).search_passages(query, k)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        return _stored_index(file_path, "passages", PassageIndex).search(query, k)
+
+    @staticmethod
+    def search_in_file(file_path: str, search_term: str, case_sensitive: bool = False,
+                       normalize: bool = False, stem: bool = False) -> List[Dict[str, any]]:
+        """Líneas que contienen el término.
+
+        Con normalize=True la comparación ignora acentos y mayúsculas ("replicacion"
+        encuentra "Replicación"), sin importar case_sensitive; stem=True además
+        compara raíces ("servidores" encuentra "servidor"). Responde con el índice
+        de sufijos cuando está listo; mientras se construye, recorriendo las líneas.
+        """
+        if os.path.isdir(file_path):
+            return FileService._search_corpus(file_path, search_term, case_sensitive, normalize, stem)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        index = None
+        if search_term and "\n" not in search_term:
+            index = FileService._line_index(file_path, case_sensitive, normalize, stem, wait=False)
+        if index is None:
+            # Recorre las líneas mientras el índice de un archivo grande se construye en segundo plano
+            return FileService._scan_file(file_path, search_term, case_sensitive, normalize, stem)
+        return [
+            {
+                "line_number": line_index + 1,
+                "content": index.lines[line_index].strip(),
+                "file_path": file_path
+            }
+            for line_index in index.find_lines(search_term)
+        ]
+
+    @staticmethod
+    def iter_search(file_path: str, search_term: str, case_sensitive: bool = False,
+                    max_results: Optional[int] = None, cursor: Optional[str] = None,
+                    normalize: bool = False, stem: bool = False) -> Iterator[Dict[str, any]]:
+        """Busca el término leyendo el archivo en streaming, línea a línea, sin cargarlo entero.
+
+        Se detiene tras `max_results` coincidencias (o cuando el consumidor deja de
+        iterar). Cada resultado trae `cursor`: el offset en bytes y el número de la
+        línea siguiente, para retomar la búsqueda justo después de él. En un
+        directorio el cursor antepone el doc_id del documento ("doc_id:offset:línea").
+        Las búsquedas normalizadas (ver search_in_file) comparan cada línea
+        normalizada; si el índice normalizado ya está listo lo usan en su lugar,
+        con los mismos cursores.
+        """
+        if os.path.isdir(file_path):
+            yield from FileService._iter_search_corpus(file_path, search_term, case_sensitive,
+                                                       max_results, cursor, normalize, stem)
+            return
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        if (normalize or stem) and search_term and "\n" not in search_term:
+            index = FileService._line_index(file_path, False, True, stem, wait=False)
+            if index is not None:
+                yield from FileService._iter_search_normalized(file_path, index, search_term, max_results, cursor)
+                return
+        offset, line_num = _parse_search_cursor(cursor)
+        fold = _search_fold(case_sensitive, normalize, stem)
+        term_to_search = fold(search_term)
+        found = 0
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                offset += len(raw)
+                line = raw.decode('utf-8')
+                if '\r' in line:
+                    line = line.replace('\r\n', '\n')
+                if term_to_search in fold(line):
+                    yield {
+                        "line_number": line_num,
+                        "content": line.strip(),
+                        "file_path": file_path,
+                        "cursor": f"{offset}:{line_num + 1}"
+                    }
+                    found += 1
+                    if max_results is not None and found >= max_results:
+                        return
+                line_num += 1
+
+    @staticmethod
+    def search_many(file_path: str, search_terms: List[str], case_sensitive: bool = False,
+                    normalize: bool = False, stem: bool = False) -> Dict[str, List[Dict[str, any]]]:
+        """Busca varios términos en una sola pasada y agrupa los resultados por término.
+
+        Los términos literales se buscan juntos con un autómata de Aho-Corasick,
+        normalizados igual que en search_in_file si se pide; los escritos entre
+        barras (/patrón/) se interpretan como expresiones regulares sobre el texto original.
+        """
+        if os.path.isdir(file_path):
+            results = {term: [] for term in dict.fromkeys(search_terms)}
+            for doc in corpus_loader.load(file_path).documents:
+                doc_results = FileService.search_many(doc['file_path'], search_terms, case_sensitive, normalize, stem)
+                for term, matches in doc_results.items():
+                    results[term].extend({**match, 'doc_id': doc['doc_id']} for match in matches)
+            return results
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        terms = list(dict.fromkeys(search_terms))
+        literals, regexes = [], []
+        for term in terms:
+            if len(term) > 2 and term.startswith("/") and term.endswith("/"):
+                flags = 0 if case_sensitive else re.IGNORECASE
+                regexes.append((term, re.compile(term[1:-1], flags)))
+            else:
+                literals.append(term)
+        results = {term: [] for term in terms}
+        lines = content_cache.get(file_path).index("lines", split_lines)
+        if normalize or stem:
+            # Las líneas normalizadas se calculan una vez por versión, sin construir el índice de sufijos
+            automaton = AhoCorasick([normalize_term(t, stem) for t in literals])
+            searchable = content_cache.get(file_path).index(
+                "normalized_lines_stem" if stem else "normalized_lines",
+                lambda text: split_lines(normalize_text(text, stem)[0])
+            )
+        else:
+            automaton = AhoCorasick([t if case_sensitive else t.lower() for t in literals])
+            searchable = lines if case_sensitive else [line.lower() for line in lines]
+        for line_num, (line, line_to_search) in enumerate(zip(lines, searchable), start=1):
+            matched = [literals[i] for i in sorted(automaton.matching_patterns(line_to_search))]
+            matched.extend(term for term, pattern in regexes if pattern.search(line))
+            for term in matched:
+                results[term].append({
+                    "line_number": line_num,
+                    "content": line.strip(),
+                    "file_path": file_path
+                })
+        return results
+
+    @staticmethod
+    def _line_index(file_path: str, case_sensitive: bool, normalize: bool, stem: bool,
+                    wait: bool = True) -> Optional[LineSuffixIndex]:
+        """Índice de sufijos para el modo de búsqueda, construido una vez por versión del archivo.
+
+        Con wait=False retorna None en lugar de esperar una construcción larga (ver IndexStore.get_ready).
+        """
+        lookup = _stored_index if wait else _ready_index
+        if normalize or stem:
+            return lookup(
+                file_path,
+                "normalized_stem" if stem else "normalized",
+                lambda text: NormalizedLineIndex.from_text(text, stem)
+            )
+        return lookup(
+            file_path,
+            "suffix_cs" if case_sensitive else "suffix_ci",
+            lambda text: LineSuffixIndex.from_text(text, case_sensitive)
+        )
+
+    @staticmethod
+    def _iter_search_normalized(file_path: str, index: NormalizedLineIndex, search_term: str,
+                                max_results: Optional[int], cursor: Optional[str]) -> Iterator[Dict[str, any]]:
+        _, line_num = _parse_search_cursor(cursor)
+        entry = content_cache.get(file_path)
+        line_offsets = entry.index("line_offsets", lambda text: _line_byte_offsets(entry.raw()))
+        found = 0
+        for line_index in index.find_lines(search_term):
+            if line_index + 1 < line_num:
+                continue
+            next_line = line_index + 1
+            offset = line_offsets[next_line] if next_line < len(line_offsets) else entry.key[2]
+            yield {
+                "line_number": line_index + 1,
+                "content": index.lines[line_index].strip(),
+                "file_path": file_path,
+                "cursor": f"{offset}:{next_line + 1}"
+            }
+            found += 1
+            if max_results is not None and found >= max_results:
+                return
+
+    @staticmethod
+    def _search_corpus(directory: str, search_term: str, case_sensitive: bool = False,
+                       normalize: bool = False, stem: bool = False) -> List[Dict[str, any]]:
+        results = []
+        for doc in corpus_loader.load(directory).documents:
+            if case_sensitive or normalize or stem or not search_term or "\n" in search_term:
+                matches = FileService.search_in_file(doc['file_path'], search_term, case_sensitive, normalize, stem)
+            else:
+                # Índice sin distinción de mayúsculas construido durante la ingesta
+                index = doc['suffix_ci']
+                matches = [
+                    {"line_number": i + 1, "content": index.lines[i].strip(), "file_path": doc['file_path']}
+                    for i in index.find_lines(search_term)
+                ]
+            results.extend({**match, 'doc_id': doc['doc_id']} for match in matches)
+        return results
+
+    @staticmethod
+    def _iter_search_corpus(directory: str, search_term: str, case_sensitive: bool,
+                            max_results: Optional[int], cursor: Optional[str],
+                            normalize: bool = False, stem: bool = False) -> Iterator[Dict[str, any]]:
+        documents = corpus_loader.load(directory).documents
+        first_doc, inner_cursor = 0, None
+        if cursor:
+            doc_part, _, inner_cursor = cursor.partition(":")
+            if not doc_part.isdigit() or int(doc_part) >= len(documents):
+                raise ValueError(f"Cursor inválido: {cursor}")
+            first_doc = int(doc_part)
+        found = 0
+        for doc in documents[first_doc:]:
+            for result in FileService.iter_search(doc['file_path'], search_term, case_sensitive,
+                                                  cursor=inner_cursor, normalize=normalize, stem=stem):
+                yield {**result, "doc_id": doc['doc_id'], "cursor": f"{doc['doc_id']}:{result['cursor']}"}
+                found += 1
+                if max_results is not None and found >= max_results:
+                    return
+            inner_cursor = None
+
+    @staticmethod
+    def _scan_file(file_path: str, search_term: str, case_sensitive: bool = False,
+                   normalize: bool = False, stem: bool = False) -> List[Dict[str, any]]:
         results = []
+        fold = _search_fold(case_sensitive, normalize, stem)
+        term_to_search = fold(search_term)
         with open(file_path, 'r', encoding='utf-8') as f:
             for line_num, line in enumerate(f, start=1):
-                line_to_search = line if case_sensitive else line.lower()
-                term_to_search = search_term if case_sensitive else search_term.lower()
+                line_to_search = fold(line)
                 if term_to_search in line_to_search:
                     results.append({
                         "line_number": line_num,
                         "content": line.strip(),
                         "file_path": file_path
                     })
-        return results
\ No newline at end of file
+        return results
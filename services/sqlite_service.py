@@ -0,0 +1,378 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional, Tuple
+
+from services.analytics import AnswerAnalytics
+from services.service import RECENT_PERFORMANCE_SIZE
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_created_at ON questions(created_at);
+CREATE TABLE IF NOT EXISTS answers (
+    question_id TEXT PRIMARY KEY REFERENCES questions(id),
+    user_answer TEXT NOT NULL,
+    is_correct INTEGER NOT NULL,
+    answered_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_answers_answered_at ON answers(answered_at);
+CREATE TABLE IF NOT EXISTS analytics (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS score (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    correct_count INTEGER NOT NULL,
+    incorrect_count INTEGER NOT NULL
+);
+"""
+
+_INSERT_QUESTION = (
+    "INSERT INTO questions (id, question, options, correct_answer, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_UPSERT_ANSWER = (
+    "INSERT OR REPLACE INTO answers (question_id, user_answer, is_correct, answered_at) "
+    "VALUES (?, ?, ?, ?)"
+)
+_UPSERT_ANALYTICS = "INSERT OR REPLACE INTO analytics (id, state) VALUES (1, ?)"
+_SELECT_QUESTION = "SELECT question, options, correct_answer, created_at FROM questions WHERE id = ?"
+_SELECT_ANSWER = "SELECT user_answer, is_correct, answered_at FROM answers WHERE question_id = ?"
+_SELECT_LAST_QUESTION = "SELECT id FROM questions ORDER BY created_at DESC, rowid DESC LIMIT 1"
+_UPSERT_SCORE = "INSERT OR REPLACE INTO score (id, correct_count, incorrect_count) VALUES (1, ?, ?)"
+_SELECT_SCORE = "SELECT correct_count, incorrect_count FROM score WHERE id = 1"
+# Sólo para bases creadas antes de la tabla score
+_COUNT_SCORE = "SELECT COUNT(*), COALESCE(SUM(is_correct), 0) FROM answers"
+_SELECT_RECENT = (
+    "SELECT question_id, is_correct, answered_at FROM answers "
+    "ORDER BY answered_at DESC, rowid DESC LIMIT ?"
+)
+_PAGE_SIZE = 100
+_SELECT_QUESTIONS_PAGE = (
+    "SELECT id, question, options, correct_answer, created_at, rowid FROM questions "
+    "WHERE (created_at, rowid) < (?, ?) AND created_at >= ? "
+    "ORDER BY created_at DESC, rowid DESC LIMIT ?"
+)
+_SELECT_HISTORY_PAGE = (
+    "SELECT a.question_id, q.question, a.user_answer, q.correct_answer, a.is_correct, a.answered_at, a.rowid "
+    "FROM answers a LEFT JOIN questions q ON q.id = a.question_id "
+    "WHERE (a.answered_at, a.rowid) < (?, ?) AND a.answered_at >= ? "
+    "ORDER BY a.answered_at DESC, a.rowid DESC LIMIT ?"
+)
+_SELECT_HISTORY = (
+    "SELECT a.question_id, q.question, a.user_answer, q.correct_answer, a.is_correct, a.answered_at "
+    "FROM answers a LEFT JOIN questions q ON q.id = a.question_id "
+    "ORDER BY a.answered_at, a.rowid"
+)
+
+
+class SqliteMCQService:
+    """MCQService persistente sobre SQLite (WAL) con escrituras agrupadas.
+
+    Las escrituras se confirman en lotes de `batch_size` operaciones o, a más
+    tardar, `flush_interval` segundos después de abrir el lote: un temporizador
+    confirma lo pendiente aunque no llegue otra escritura. Hasta entonces lo
+    escrito no es durable; `close()` queda registrado con atexit para confirmar
+    lo pendiente. Las lecturas usan la misma conexión, por lo que siempre ven las
+    escrituras no confirmadas. Los contadores de aciertos se mantienen en la
+    tabla score, actualizada en la misma transacción que cada respuesta.
+    """
+
+    # Se puede cerrar y reabrir sin perder datos (ver MCQServiceRegistry)
+    persistent = True
+
+    def __init__(self, db_path: str, batch_size: int = 64, flush_interval: float = 0.5):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._pending = 0
+        self._first_pending_at = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._load_aggregates()
+        atexit.register(self.close)
+
+    def _load_aggregates(self):
+        """Carga contadores y últimas respuestas desde la tabla score y consultas indexadas (sin escanear el historial)"""
+        row = self._conn.execute(_SELECT_LAST_QUESTION).fetchone()
+        self._last_question_id: Optional[str] = row[0] if row else None
+
+        row = self._conn.execute(_SELECT_SCORE).fetchone()
+        if row is None:
+            # Base creada antes de la tabla score: se cuenta una única vez y se guarda
+            total, correct = self._conn.execute(_COUNT_SCORE).fetchone()
+            row = (correct, total - correct)
+            self._conn.execute(_UPSERT_SCORE, row)
+        self._correct_count, self._incorrect_count = row
+        total = self._correct_count + self._incorrect_count
+
+        self._recent: deque = deque(maxlen=RECENT_PERFORMANCE_SIZE)
+        self._rebuild_recent()
+
+        self._analytics = AnswerAnalytics()
+        row = self._conn.execute("SELECT state FROM analytics WHERE id = 1").fetchone()
+        if row is not None:
+            self._analytics.load_state(json.loads(row[0]))
+        elif total:
+            # Base creada antes de persistir la analítica: se reconstruye una única vez
+            for (is_correct,) in self._conn.execute("SELECT is_correct FROM answers ORDER BY answered_at, rowid"):
+                self._analytics.record(bool(is_correct))
+
+    def _rebuild_recent(self):
+        rows = self._conn.execute(_SELECT_RECENT, (RECENT_PERFORMANCE_SIZE,)).fetchall()
+        self._recent.clear()
+        for qid, is_correct, answered_at in reversed(rows):
+            self._recent.append((qid, bool(is_correct), answered_at))
+
+    def _write(self, sql: str, params: tuple):
+        if self._pending == 0:
+            self._conn.execute("BEGIN")
+            self._first_pending_at = time.monotonic()
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+        self._conn.execute(sql, params)
+        self._pending += 1
+        if (self._pending >= self.batch_size or
+                time.monotonic() - self._first_pending_at >= self.flush_interval):
+            self._commit()
+
+    def _commit(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._pending:
+            self._conn.execute("COMMIT")
+            self._pending = 0
+
+    def flush(self):
+        """Confirma en disco las escrituras pendientes del lote actual"""
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        """Confirma lo pendiente y cierra la conexión"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._commit()
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.close)
+
+    def store_question(self, question: str, options: List[str], correct_answer: str) -> str:
+        """Almacena una pregunta de opción múltiple y retorna su ID"""
+        question_id = str(uuid.uuid4())
+        with self._lock:
+            self._write(_INSERT_QUESTION, (
+                question_id, question, json.dumps(options, ensure_ascii=False),
+                correct_answer, time.time()
+            ))
+            self._last_question_id = question_id
+        return question_id
+
+    def get_question(self, question_id: str) -> Optional[Dict]:
+        """Obtiene una pregunta por su ID"""
+        with self._lock:
+            row = self._conn.execute(_SELECT_QUESTION, (question_id,)).fetchone()
+        if row is None:
+            return None
+        return _question_from_row(row)
+
+    def store_user_answer(self, question_id: str, user_answer: str, is_correct: bool) -> bool:
+        """Almacena la respuesta del usuario y si fue correcta"""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM questions WHERE id = ?", (question_id,)).fetchone() is None:
+                return False
+
+            previous = self._conn.execute(_SELECT_ANSWER, (question_id,)).fetchone()
+            if previous is not None:
+                if previous[1]:
+                    self._correct_count -= 1
+                else:
+                    self._incorrect_count -= 1
+
+            answered_at = time.time()
+            self._write(_UPSERT_ANSWER, (question_id, user_answer, int(is_correct), answered_at))
+            if is_correct:
+                self._correct_count += 1
+            else:
+                self._incorrect_count += 1
+            self._write(_UPSERT_SCORE, (self._correct_count, self._incorrect_count))
+            self._analytics.record(is_correct)
+            self._write(_UPSERT_ANALYTICS, (json.dumps(self._analytics.to_state()),))
+
+            if previous is not None and any(qid == question_id for qid, _, _ in self._recent):
+                self._rebuild_recent()
+            else:
+                self._recent.append((question_id, bool(is_correct), answered_at))
+        return True
+
+    def get_user_answer(self, question_id: str) -> Optional[Dict]:
+        """Obtiene la respuesta del usuario para una pregunta"""
+        with self._lock:
+            row = self._conn.execute(_SELECT_ANSWER, (question_id,)).fetchone()
+        if row is None:
+            return None
+        return _answer_from_row(row)
+
+    def get_all_questions(self) -> Dict[str, Dict]:
+        """Obtiene todas las preguntas almacenadas"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, question, options, correct_answer, created_at FROM questions ORDER BY created_at, rowid"
+            ).fetchall()
+        return {row[0]: _question_from_row(row[1:]) for row in rows}
+
+    def get_all_answers(self) -> Dict[str, Dict]:
+        """Obtiene todas las respuestas almacenadas"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question_id, user_answer, is_correct, answered_at FROM answers ORDER BY answered_at, rowid"
+            ).fetchall()
+        return {row[0]: _answer_from_row(row[1:]) for row in rows}
+
+    def get_last_question_id(self) -> Optional[str]:
+        """Retorna el ID de la pregunta creada más recientemente"""
+        return self._last_question_id
+
+    def compute_user_score(self) -> Dict:
+        """Calcula el puntaje y métricas de rendimiento del usuario"""
+        with self._lock:
+            correct_count = self._correct_count
+            incorrect_count = self._incorrect_count
+            recent = list(self._recent)
+
+        total_questions = correct_count + incorrect_count
+        if total_questions == 0:
+            return {
+                'total_questions': 0,
+                'correct_count': 0,
+                'incorrect_count': 0,
+                'score_percentage': 0.0,
+                'recent_performance': []
+            }
+
+        return {
+            'total_questions': total_questions,
+            'correct_count': correct_count,
+            'incorrect_count': incorrect_count,
+            'score_percentage': (correct_count / total_questions) * 100,
+            'recent_performance': [
+                {
+                    'question_id': qid,
+                    'is_correct': is_correct,
+                    'answered_at': datetime.fromtimestamp(answered_at)
+                }
+                for qid, is_correct, answered_at in recent
+            ]
+        }
+
+    def get_mastery_analytics(self) -> Dict:
+        """Retorna precisión en ventana, precisión EMA y rachas (actualizadas en O(1) por respuesta)"""
+        with self._lock:
+            return self._analytics.snapshot()
+
+    def iter_questions(self, cursor: Optional[str] = None,
+                       since: Optional[datetime] = None) -> Iterator[Tuple[str, Dict]]:
+        """Itera (id, pregunta) de la más reciente a la más antigua con paginación por keyset.
+
+        `cursor` es el ID de la última pregunta ya vista; `since` corta la iteración
+        en preguntas más viejas.
+        """
+        key = self._cursor_key("SELECT created_at, rowid FROM questions WHERE id = ?", cursor)
+        for row in self._iter_pages(_SELECT_QUESTIONS_PAGE, key, since):
+            yield row[0], _question_from_row(row[1:5])
+
+    def iter_answer_history(self, cursor: Optional[str] = None,
+                            since: Optional[datetime] = None) -> Iterator[Dict]:
+        """Itera el historial de respuestas de la más reciente a la más antigua.
+
+        `cursor` es el question_id de la última respuesta ya vista; `since` corta la
+        iteración en respuestas más viejas.
+        """
+        key = self._cursor_key("SELECT answered_at, rowid FROM answers WHERE question_id = ?", cursor)
+        for qid, question, user_answer, correct_answer, is_correct, answered_at, _ in self._iter_pages(
+                _SELECT_HISTORY_PAGE, key, since):
+            yield {
+                'question_id': qid,
+                'question': question or '',
+                'user_answer': user_answer,
+                'correct_answer': correct_answer or '',
+                'is_correct': bool(is_correct),
+                'answered_at': datetime.fromtimestamp(answered_at)
+            }
+
+    def _cursor_key(self, sql: str, cursor: Optional[str]) -> tuple:
+        if cursor is None:
+            return (float("inf"), 0)
+        with self._lock:
+            row = self._conn.execute(sql, (cursor,)).fetchone()
+        if row is None:
+            raise ValueError(f"Cursor desconocido: {cursor}")
+        return tuple(row)
+
+    def _iter_pages(self, sql: str, key: tuple, since: Optional[datetime]) -> Iterator[tuple]:
+        """Recorre una consulta keyset de a _PAGE_SIZE filas, tomando el lock sólo por página.
+
+        Ambas consultas terminan en (timestamp, rowid), que es la clave de la página siguiente.
+        """
+        min_ts = since.timestamp() if since is not None else float("-inf")
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, (*key, min_ts, _PAGE_SIZE)).fetchall()
+            yield from rows
+            if len(rows) < _PAGE_SIZE:
+                return
+            key = rows[-1][-2:]
+
+    def get_answer_history(self) -> List[Dict]:
+        """Retorna historial cronológico de respuestas"""
+        with self._lock:
+            rows = self._conn.execute(_SELECT_HISTORY).fetchall()
+        return [
+            {
+                'question_id': qid,
+                'question': question or '',
+                'user_answer': user_answer,
+                'correct_answer': correct_answer or '',
+                'is_correct': bool(is_correct),
+                'answered_at': datetime.fromtimestamp(answered_at)
+            }
+            for qid, question, user_answer, correct_answer, is_correct, answered_at in rows
+        ]
+
+
+def _question_from_row(row) -> Dict:
+    question, options, correct_answer, created_at = row
+    return {
+        'question': question,
+        'options': json.loads(options),
+        'correct_answer': correct_answer,
+        'created_at': datetime.fromtimestamp(created_at)
+    }
+
+
+def _answer_from_row(row) -> Dict:
+    user_answer, is_correct, answered_at = row
+    return {
+        'user_answer': user_answer,
+        'is_correct': bool(is_correct),
+        'answered_at': datetime.fromtimestamp(answered_at)
+    }
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from services.content_cache import content_cache
+from services.corpus import list_documents
+from services.disk_cache import cache_dir, entry_hash, write_atomic
+from services.service import FileService
+
+
+# Subir la versión cuando cambie el formato del mapa o cómo se calculan los pasajes
+SUBTOPIC_MAP_VERSION = 1
+DEFAULT_PASSAGES_PER_SUBTOPIC = 8
+
+
+def content_hash(file_path: str) -> str:
+    """SHA-256 del contenido (de cada documento, en orden, si es un directorio); se calcula una vez por versión"""
+    if os.path.isdir(file_path):
+        digest = hashlib.sha256()
+        for path in list_documents(file_path):
+            digest.update(os.path.relpath(path, file_path).encode('utf-8'))
+            digest.update(bytes.fromhex(content_hash(path)))
+        return digest.hexdigest()
+    return entry_hash(content_cache.get(file_path))
+
+
+class SubtopicMap:
+    """Pasajes del curso que mejor cubren cada subtema del temario, con su puntaje BM25.
+
+    El id de un subtema es su posición en la lista (el mismo id que usa el
+    etiquetador de temas), así que buscar sus pasajes es un acceso a lista.
+    """
+
+    def __init__(self, data: Dict):
+        self.version = data['version']
+        self.content_hash = data['content_hash']
+        self.subtopics: List[str] = [entry['subtopic'] for entry in data['subtopics']]
+        self._passages: List[List[Dict]] = [entry['passages'] for entry in data['subtopics']]
+        self._ids = {subtopic: subtopic_id for subtopic_id, subtopic in enumerate(self.subtopics)}
+        self._data = data
+
+    def subtopic_id(self, subtopic: str) -> Optional[int]:
+        return self._ids.get(subtopic)
+
+    def passages(self, subtopic_id: int, k: Optional[int] = None) -> List[Dict]:
+        """Pasajes del subtema, de mayor a menor puntaje (vacío si no aparece en el curso)"""
+        passages = self._passages[subtopic_id]
+        return passages if k is None else passages[:k]
+
+    def location(self, subtopic_id: int) -> Optional[Dict]:
+        """Pasaje principal del subtema (sección y líneas), o None"""
+        passages = self._passages[subtopic_id]
+        return passages[0] if passages else None
+
+    def to_json(self) -> bytes:
+        return json.dumps(self._data, ensure_ascii=False).encode('utf-8')
+
+
+def build_subtopic_map(file_path: str, subtopics: List[str],
+                       k: int = DEFAULT_PASSAGES_PER_SUBTOPIC) -> SubtopicMap:
+    """Calcula el mapa recuperando con BM25 los k mejores pasajes de cada subtema"""
+    return SubtopicMap({
+        'version': SUBTOPIC_MAP_VERSION,
+        'content_hash': content_hash(file_path),
+        'k': k,
+        'subtopics': [
+            {
+                'id': subtopic_id,
+                'subtopic': subtopic,
+                'passages': FileService.search_passages(file_path, subtopic, k)
+            }
+            for subtopic_id, subtopic in enumerate(subtopics)
+        ]
+    })
+
+
+def subtopic_map_path(file_path: str, subtopics: List[str], k: int = DEFAULT_PASSAGES_PER_SUBTOPIC) -> str:
+    """Archivo del mapa: versión, hash del contenido y hash de la lista de subtemas en el nombre"""
+    subtopics_hash = hashlib.sha256(json.dumps(subtopics, ensure_ascii=False).encode('utf-8')).hexdigest()
+    name = f"subtopic_map-v{SUBTOPIC_MAP_VERSION}-{content_hash(file_path)[:16]}-{subtopics_hash[:8]}-k{k}.json"
+    return os.path.join(cache_dir(file_path), name)
+
+
+_loaded: Dict[str, SubtopicMap] = {}
+_lock = threading.Lock()
+
+
+def load_subtopic_map(file_path: str, subtopics: List[str], k: int = DEFAULT_PASSAGES_PER_SUBTOPIC,
+                      rebuild: bool = False) -> SubtopicMap:
+    """Mapa vigente para el contenido y los subtemas: de memoria, del cache en disco o calculado y guardado.
+
+    Un cambio en el contenido o en la lista de subtemas cambia el nombre del
+    archivo, así que un mapa viejo nunca se usa. Si no se puede escribir el
+    cache, el mapa igual se retorna.
+    """
+    path = subtopic_map_path(file_path, subtopics, k)
+    with _lock:
+        subtopic_map = None if rebuild else _loaded.get(path)
+        if subtopic_map is None and not rebuild and os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = json.load(f)
+            if data.get('version') == SUBTOPIC_MAP_VERSION and data.get('content_hash') == content_hash(file_path):
+                subtopic_map = SubtopicMap(data)
+        if subtopic_map is None:
+            subtopic_map = build_subtopic_map(file_path, subtopics, k)
+            try:
+                write_atomic(path, subtopic_map.to_json())
+            except OSError:
+                pass
+        _loaded[path] = subtopic_map
+        return subtopic_map
@@ -0,0 +1,107 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Tuple
+
+
+def build_suffix_array(text: str) -> array:
+    """Arreglo de sufijos por duplicación de prefijos (O(n log² n) comparaciones de enteros)"""
+    n = len(text)
+    if n == 0:
+        return array('i')
+    rank = [ord(ch) for ch in text]
+    sa = list(range(n))
+    k = 1
+    while True:
+        # Ordena por (rango del prefijo de largo k, rango de los k caracteres siguientes)
+        base = max(rank) + 2
+        second = rank[k:] + [-1] * min(k, n)
+        keys = [r * base + s + 1 for r, s in zip(rank, second)]
+        sa.sort(key=keys.__getitem__)
+        new_rank = [0] * n
+        current = 0
+        previous = keys[sa[0]]
+        for i in sa:
+            if keys[i] != previous:
+                current += 1
+                previous = keys[i]
+            new_rank[i] = current
+        rank = new_rank
+        if current == n - 1 or k >= n:
+            break
+        k *= 2
+    return array('i', sa)
+
+
+class LineSuffixIndex:
+    """Índice de subcadenas por línea sobre un arreglo de sufijos.
+
+    Las líneas se unen con '\\n', así que un término sin saltos de línea sólo
+    coincide dentro de una línea: mismas coincidencias que `term in line`. Con
+    case_sensitive=False cada línea se pasa a minúsculas por separado, igual que
+    el recorrido original. Cada consulta cuesta O(m log n) más las coincidencias.
+    Un `suffix_array` ya calculado (p. ej. mapeado desde el índice en disco) evita
+    construirlo de nuevo.
+    """
+
+    def __init__(self, lines: List[str], case_sensitive: bool = False, suffix_array=None):
+        self.case_sensitive = case_sensitive
+        self.lines = lines
+        self.text = self._searchable_text(lines)
+        self.line_starts = array('i', [0])
+        position = self.text.find("\n")
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = self.text.find("\n", position + 1)
+        if suffix_array is None:
+            suffix_array = build_suffix_array(self.text)
+        elif len(suffix_array) != len(self.text):
+            raise ValueError("El arreglo de sufijos no corresponde al texto")
+        self.suffix_array = suffix_array
+
+    def __getstate__(self):
+        # Un arreglo mapeado desde disco (memoryview) no se puede serializar: se copia
+        state = dict(self.__dict__)
+        if isinstance(self.suffix_array, memoryview):
+            state['suffix_array'] = array('i', self.suffix_array)
+        return state
+
+    @classmethod
+    def from_text(cls, text: str, case_sensitive: bool = False) -> "LineSuffixIndex":
+        return cls(split_lines(text), case_sensitive)
+
+    def _searchable_text(self, lines: List[str]) -> str:
+        """Texto indexado: las líneas unidas con '\\n', en minúsculas si no distingue mayúsculas.
+        Debe conservar los saltos de línea para poder ubicar cada coincidencia en su línea"""
+        return "\n".join(lines if self.case_sensitive else [line.lower() for line in lines])
+
+    def _searchable_term(self, term: str) -> str:
+        return term if self.case_sensitive else term.lower()
+
+    def find_positions(self, term: str) -> Tuple[List[int], int]:
+        """Posiciones (en self.text) de las ocurrencias del término y su largo ya transformado"""
+        if "\n" in term:
+            raise ValueError("El término no puede contener saltos de línea")
+        term = self._searchable_term(term)
+        m = len(term)
+        text = self.text
+
+        def prefix(i):
+            return text[i:i + m]
+
+        lo = bisect_left(self.suffix_array, term, key=prefix)
+        hi = bisect_right(self.suffix_array, term, lo=lo, key=prefix)
+        return sorted(self.suffix_array[lo:hi]), m
+
+    def find_lines(self, term: str) -> List[int]:
+        """Índices (base 0) de las líneas que contienen `term`, en orden"""
+        positions, _ = self.find_positions(term)
+        starts = self.line_starts
+        return sorted({bisect_right(starts, pos) - 1 for pos in positions})
+
+
+def split_lines(text: str) -> List[str]:
+    """Separa en líneas como la iteración de un archivo de texto, sin el '\\n' final"""
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return lines
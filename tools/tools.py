@@ -1,10 +1,87 @@
-from services.service import FileService, MCQService
+from services.service import FileService
+from services.factory import create_mcq_service
+from services.registry import MCQServiceRegistry, current_session_id
+from services.dedup import NearDuplicateIndex
+from services.retrieval import load_subtopics
+from services.subtopic_map import DEFAULT_PASSAGES_PER_SUBTOPIC, load_subtopic_map
 import os
 import json
+import random
+import threading
+import weakref
+from itertools import islice
 
 
 file_service = FileService()
-mcq_service = MCQService()
+mcq_service = create_mcq_service()
+mcq_registry = MCQServiceRegistry(create_mcq_service)
+
+
+def get_mcq_service():
+    """Retorna el MCQService de la sesión activa, o el compartido si no hay sesión"""
+    session_id = current_session_id.get()
+    if session_id is None:
+        return mcq_service
+    return mcq_registry.get(session_id)
+
+
+# Un índice de casi-duplicados por servicio, construido la primera vez que se consulta
+_duplicate_indexes = weakref.WeakKeyDictionary()
+_duplicate_lock = threading.Lock()
+
+
+def _duplicate_index_for(service) -> NearDuplicateIndex:
+    index = _duplicate_indexes.get(service)
+    if index is None:
+        index = NearDuplicateIndex(threshold=float(os.environ.get("MCQ_DUPLICATE_THRESHOLD", 0.7)))
+        for qid, data in service.iter_questions():
+            index.add(qid, data['question'])
+        _duplicate_indexes[service] = index
+    return index
+
+
+def find_duplicate_question(question: str):
+    """Busca una pregunta registrada casi igual (MinHash/LSH); retorna su id, texto y similitud o None"""
+    service = get_mcq_service()
+    with _duplicate_lock:
+        match = _duplicate_index_for(service).query(question)
+    if match is None:
+        return None
+    question_id, similarity = match
+    data = service.get_question(question_id)
+    return {
+        'question_id': question_id,
+        'question': data['question'] if data else '',
+        'similarity': similarity
+    }
+
+
+# Subtemas pendientes de cada sesión, por archivo: se recorren todos antes de repetir
+_subtopic_rotations = weakref.WeakKeyDictionary()
+_subtopic_lock = threading.Lock()
+
+
+def course_subtopics(file_path: str) -> list:
+    """Subtemas del curso: la lista de MCQ_SUBTOPICS_PATH si está definida, si no los títulos de sección"""
+    subtopics_path = os.environ.get("MCQ_SUBTOPICS_PATH")
+    if subtopics_path:
+        return load_subtopics(subtopics_path)
+    return [section['title'] for section in file_service.list_sections(file_path)]
+
+
+def next_subtopic(file_path: str):
+    """Siguiente subtema a evaluar en la sesión activa (orden aleatorio, sin repetir hasta agotarlos) o None"""
+    try:
+        service = get_mcq_service()
+        with _subtopic_lock:
+            rotations = _subtopic_rotations.setdefault(service, {})
+            pending = rotations.get(file_path)
+            if not pending:
+                pending = rotations[file_path] = course_subtopics(file_path)
+                random.shuffle(pending)
+            return pending.pop() if pending else None
+    except Exception:
+        return None
 
 
 def read_text_file(file_path: str) -> str:
@@ -15,17 +92,153 @@ def read_text_file(file_path: str) -> str:
         return f"Error al leer el archivo: {str(e)}"
 
 
-def search_in_text_file(file_path: str, search_term: str,
-                       case_sensitive: bool = False) -> str:
+def list_text_sections(file_path: str) -> str:
+    """Lista las secciones del archivo con su id, grupo y rango de líneas"""
     try:
-        results = file_service.search_in_file(file_path, search_term, case_sensitive)
+        sections = file_service.list_sections(file_path)
+        if not sections:
+            return "El archivo no tiene contenido."
+
+        output = f"Secciones de {os.path.basename(file_path)} ({len(sections)}):\n\n"
+        current_document, current_parent = None, None
+        for section in sections:
+            if section.get('document') != current_document:
+                current_document, current_parent = section['document'], None
+                output += f"\n== {current_document} ==\n"
+            if section['parent'] != current_parent:
+                current_parent = section['parent']
+                output += f"{current_parent}\n"
+            output += (
+                f"  [{section['id']}] {section['title']} "
+                f"(líneas {section['start_line']}-{section['end_line']})\n"
+            )
+        return output
+    except Exception as e:
+        return f"Error al listar secciones: {str(e)}"
+
+
+def read_text_section(file_path: str, section_id: int) -> str:
+    """Lee sólo una sección del archivo por su id (ver list_text_sections)"""
+    try:
+        section = file_service.read_section(file_path, section_id)
+        header = f"[{section['id']}] {section['title']}"
+        if section['parent']:
+            header = f"{section['parent']} > {header}"
+        if section.get('document'):
+            header = f"{section['document']} > {header}"
+        return f"{header} (líneas {section['start_line']}-{section['end_line']})\n\n{section['content']}"
+    except Exception as e:
+        return f"Error al leer la sección: {str(e)}"
+
+
+def read_text_range(file_path: str, start_line: int, end_line: int) -> str:
+    """Lee las líneas start_line..end_line (inclusivas) del archivo"""
+    try:
+        content = file_service.read_range(file_path, start_line, end_line)
+        return f"Líneas {start_line}-{end_line}:\n\n{content}"
+    except Exception as e:
+        return f"Error al leer el rango: {str(e)}"
+
+
+def retrieve_passages(file_path: str, query: str, k: int = 4) -> str:
+    """Recupera los k fragmentos del archivo más relevantes para un subtema o consulta (BM25)"""
+    try:
+        return _format_passages(query, file_service.search_passages(file_path, query, k))
+    except Exception as e:
+        return f"Error al recuperar fragmentos: {str(e)}"
+
+
+def retrieve_subtopic_passages(file_path: str, subtopic: str, k: int = 4) -> str:
+    """Fragmentos de un subtema del temario, leídos del mapa subtema → pasajes precalculado (BM25 si no está)"""
+    try:
+        if k <= DEFAULT_PASSAGES_PER_SUBTOPIC:
+            subtopic_map = load_subtopic_map(file_path, course_subtopics(file_path))
+            subtopic_id = subtopic_map.subtopic_id(subtopic)
+            if subtopic_id is not None:
+                return _format_passages(subtopic, subtopic_map.passages(subtopic_id, k))
+        return retrieve_passages(file_path, subtopic, k)
+    except Exception as e:
+        return f"Error al recuperar fragmentos: {str(e)}"
+
+
+def _format_passages(query: str, passages: list) -> str:
+    if not passages:
+        return f"No se encontraron fragmentos relevantes para '{query}'."
+
+    output = f"Fragmentos más relevantes para '{query}':\n"
+    for passage in passages:
+        source = f"{passage['document']}, " if passage.get('document') else ""
+        output += (
+            f"\n[{source}Sección {passage['section_id']}: {passage['section_title']}, "
+            f"líneas {passage['start_line']}-{passage['end_line']}]\n"
+            f"{passage['text']}\n"
+        )
+    return output
+
+
+DEFAULT_SEARCH_PAGE_SIZE = 50
+
+
+def _result_location(result: dict, file_path: str) -> str:
+    """'Línea N', o 'documento, línea N' si la búsqueda fue sobre un directorio"""
+    if 'doc_id' in result:
+        return f"{os.path.relpath(result['file_path'], file_path)}, línea {result['line_number']}"
+    return f"Línea {result['line_number']}"
+
+
+def search_in_text_file(file_path: str, search_term: str, case_sensitive: bool = False,
+                        max_results: int = DEFAULT_SEARCH_PAGE_SIZE, cursor: str = None,
+                        normalize: bool = True, stem: bool = False) -> str:
+    """Busca un término y retorna la primera página de resultados; el cursor retoma la búsqueda.
+
+    Salvo con case_sensitive, ignora acentos y mayúsculas ("replicacion" encuentra
+    "Replicación"); stem=True también encuentra singulares/plurales y masculino/femenino.
+    """
+    try:
+        results, has_more = _take_page(
+            file_service.iter_search(file_path, search_term, case_sensitive, cursor=cursor,
+                                     normalize=normalize and not case_sensitive, stem=stem and not case_sensitive),
+            max_results
+        )
 
         if not results:
+            if cursor:
+                return f"No hay más resultados para '{search_term}' en el archivo."
             return f"No se encontraron resultados para '{search_term}' en el archivo."
 
-        output = f"Encontrados {len(results)} resultados para '{search_term}':\n\n"
+        if cursor:
+            output = f"Siguientes {len(results)} resultados para '{search_term}':\n\n"
+        elif has_more:
+            output = f"Primeros {len(results)} resultados para '{search_term}':\n\n"
+        else:
+            output = f"Encontrados {len(results)} resultados para '{search_term}':\n\n"
         for result in results:
-            output += f"Línea {result['line_number']}: {result['content']}\n"
+            output += f"{_result_location(result, file_path)}: {result['content']}\n"
+        if has_more:
+            output += f"\nHay más resultados. Siguiente cursor: {results[-1]['cursor']}\n"
+
+        return output
+    except Exception as e:
+        return f"Error en búsqueda: {str(e)}"
+
+
+def search_many_in_text_file(file_path: str, search_terms: list, case_sensitive: bool = False,
+                             normalize: bool = True, stem: bool = False) -> str:
+    """Busca varios términos (o /regex/) en una sola pasada, con resultados agrupados por término"""
+    try:
+        if not isinstance(search_terms, list) or not search_terms:
+            return "Error: 'search_terms' debe ser una lista no vacía de términos"
+        results = file_service.search_many(file_path, search_terms, case_sensitive,
+                                           normalize and not case_sensitive, stem and not case_sensitive)
+
+        output = f"Búsqueda de {len(results)} términos:\n"
+        for term, matches in results.items():
+            if not matches:
+                output += f"\n'{term}': sin resultados\n"
+                continue
+            output += f"\n'{term}': {len(matches)} resultados\n"
+            for result in matches:
+                output += f"{_result_location(result, file_path)}: {result['content']}\n"
 
         return output
     except Exception as e:
@@ -35,7 +248,8 @@ def search_in_text_file(file_path: str, search_term: str,
 def check_multiple_choice_answer(question_id: str, user_answer: str) -> str:
     """Verifica si la respuesta del usuario es correcta y la almacena"""
     try:
-        question_data = mcq_service.get_question(question_id)
+        service = get_mcq_service()
+        question_data = service.get_question(question_id)
         if not question_data:
             return f"Error: No se encontró pregunta con ID {question_id}"
         
@@ -51,7 +265,7 @@ def check_multiple_choice_answer(question_id: str, user_answer: str) -> str:
         
         is_correct = user_answer_text == correct_answer
         
-        mcq_service.store_user_answer(question_id, user_answer_text, is_correct)
+        service.store_user_answer(question_id, user_answer_text, is_correct)
         
         result = f"Respuesta registrada para pregunta {question_id}\n\n"
         result += f"Tu respuesta: {user_answer_text}\n"
@@ -67,7 +281,7 @@ def check_multiple_choice_answer(question_id: str, user_answer: str) -> str:
 def check_last_multiple_choice_answer(user_answer: str) -> str:
     """Verifica la respuesta del usuario contra la última pregunta creada"""
     try:
-        last_id = mcq_service.get_last_question_id()
+        last_id = get_mcq_service().get_last_question_id()
         if not last_id:
             return "Error: No hay preguntas registradas aún"
         return check_multiple_choice_answer(last_id, user_answer)
@@ -95,7 +309,10 @@ def register_multiple_choice_question(question: str, options: list, correct_inde
         # Calcular la nueva posición de la opción correcta tras mezclar
         original_correct_answer = options[correct_index]
         correct_answer = original_correct_answer
-        question_id = mcq_service.store_question(question, shuffled_options, correct_answer)
+        service = get_mcq_service()
+        question_id = service.store_question(question, shuffled_options, correct_answer)
+        with _duplicate_lock:
+            _duplicate_index_for(service).add(question_id, question)
 
         result = f"Pregunta registrada con ID: {question_id}\n\n"
         result += f"Pregunta: {question}\n\n"
@@ -108,14 +325,18 @@ def register_multiple_choice_question(question: str, options: list, correct_inde
         return f"Error al registrar pregunta: {str(e)}"
 
 
-def list_multiple_choice_questions(limit: int = 20) -> str:
-    """Lista las últimas preguntas registradas (sin revelar la respuesta correcta)"""
+def _take_page(items, limit):
+    """Toma hasta `limit` elementos de un iterador y avisa si quedan más"""
+    if limit is None:
+        return list(items), False
+    page = list(islice(items, limit + 1))
+    return page[:limit], len(page) > limit
+
+
+def list_multiple_choice_questions(limit: int = 20, cursor: str = None) -> str:
+    """Lista las últimas preguntas registradas, de la más reciente a la más antigua (sin revelar la respuesta correcta)"""
     try:
-        all_questions = mcq_service.get_all_questions()
-        items = list(all_questions.items())
-        items.sort(key=lambda kv: kv[1].get("created_at"))
-        if limit is not None:
-            items = items[-limit:]
+        items, has_more = _take_page(get_mcq_service().iter_questions(cursor=cursor), limit)
         lines = []
         for qid, data in items:
             question = data.get("question", "")
@@ -124,15 +345,38 @@ def list_multiple_choice_questions(limit: int = 20) -> str:
             lines.append(f"ID: {qid}\nPregunta: {question}\nOpciones:\n" + "\n".join(
                 [f"{chr(65+i)}) {opt}" for i, opt in enumerate(options)]
             ))
-        return "\n\n".join(lines) if lines else "Sin preguntas registradas"
+        if not lines:
+            return "Sin preguntas registradas"
+        result = "\n\n".join(lines)
+        if has_more:
+            result += f"\n\nHay preguntas más antiguas. Siguiente cursor: {items[-1][0]}"
+        return result
     except Exception as e:
         return f"Error al listar preguntas: {str(e)}"
 
 
+def format_mastery_analytics(analytics: dict) -> str:
+    """Formatea la analítica de dominio (ventana, EMA y rachas) para los agentes"""
+    if not analytics['answers_recorded']:
+        return "Sin respuestas para calcular tendencias.\n"
+    
+    result = (
+        f"Precisión en ventana (últimas {analytics['window_answers']} de {analytics['window_size']}): "
+        f"{analytics['window_accuracy']:.1f}% ({analytics['window_correct']}/{analytics['window_answers']})\n"
+    )
+    result += f"Precisión ponderada (EMA, alfa={analytics['ema_alpha']}): {analytics['ema_accuracy']:.1f}%\n"
+    streak_kind = "aciertos" if analytics['current_streak_correct'] else "errores"
+    result += f"Racha actual: {analytics['current_streak']} {streak_kind} seguidos\n"
+    result += f"Mejor racha de aciertos: {analytics['best_correct_streak']}\n"
+    result += f"Peor racha de errores: {analytics['worst_incorrect_streak']}\n"
+    return result
+
+
 def get_user_performance() -> str:
     """Obtiene el rendimiento y puntaje actual del usuario"""
     try:
-        score_data = mcq_service.compute_user_score()
+        service = get_mcq_service()
+        score_data = service.compute_user_score()
         
         if score_data['total_questions'] == 0:
             return "No hay respuestas registradas todavía. El usuario no ha respondido ninguna pregunta."
@@ -149,20 +393,25 @@ def get_user_performance() -> str:
                 status = "✓ CORRECTO" if perf['is_correct'] else "✗ INCORRECTO"
                 result += f"  {i}. {status}\n"
         
+        result += "\nTendencia de dominio:\n"
+        result += format_mastery_analytics(service.get_mastery_analytics())
+        
         return result
     except Exception as e:
         return f"Error al obtener rendimiento: {str(e)}"
 
 
-def get_answer_history_detailed() -> str:
-    """Obtiene el historial detallado de respuestas del usuario"""
+def get_answer_history_detailed(limit: int = 20, cursor: str = None) -> str:
+    """Obtiene el historial detallado de respuestas del usuario, de la más reciente a la más antigua"""
     try:
-        history = mcq_service.get_answer_history()
+        service = get_mcq_service()
+        history, has_more = _take_page(service.iter_answer_history(cursor=cursor), limit)
         
         if not history:
             return "No hay historial de respuestas todavía."
         
-        result = f"=== HISTORIAL DE RESPUESTAS ({len(history)} preguntas) ===\n\n"
+        total = service.compute_user_score()['total_questions']
+        result = f"=== HISTORIAL DE RESPUESTAS ({len(history)} de {total} preguntas, más recientes primero) ===\n\n"
         
         for i, entry in enumerate(history, 1):
             result += f"--- Pregunta {i} ---\n"
@@ -171,6 +420,9 @@ def get_answer_history_detailed() -> str:
             result += f"Respuesta correcta: {entry['correct_answer']}\n"
             result += f"Resultado: {'✓ CORRECTO' if entry['is_correct'] else '✗ INCORRECTO'}\n\n"
         
+        if has_more:
+            result += f"Hay respuestas más antiguas. Siguiente cursor: {history[-1]['question_id']}\n"
+        
         return result
     except Exception as e:
         return f"Error al obtener historial: {str(e)}"
@@ -186,13 +438,102 @@ TOOLS_SCHEMA = [
                 "properties": {
                     "file_path": {
                         "type": "string",
-                        "description": "Ruta completa al archivo .txt"
+                        "description": "Ruta completa al archivo .txt o a un directorio de documentos"
+                    }
+                },
+                "required": ["file_path"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "list_text_sections",
+            "description": "Lista las secciones de un archivo .txt con su id y rango de líneas",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Ruta al archivo o directorio de documentos"
                     }
                 },
                 "required": ["file_path"]
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_text_section",
+            "description": "Lee una sola sección de un archivo .txt por su id",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Ruta al archivo o directorio de documentos"
+                    },
+                    "section_id": {
+                        "type": "integer",
+                        "description": "Id de la sección (ver list_text_sections)"
+                    }
+                },
+                "required": ["file_path", "section_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_text_range",
+            "description": "Lee un rango de líneas (inclusivo) de un archivo .txt",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Ruta al archivo (en un directorio, el del documento)"
+                    },
+                    "start_line": {
+                        "type": "integer",
+                        "description": "Primera línea (desde 1)"
+                    },
+                    "end_line": {
+                        "type": "integer",
+                        "description": "Última línea (inclusiva)"
+                    }
+                },
+                "required": ["file_path", "start_line", "end_line"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "retrieve_passages",
+            "description": "Recupera los fragmentos de un archivo .txt más relevantes para un subtema o consulta (BM25)",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Ruta al archivo o directorio de documentos"
+                    },
+                    "query": {
+                        "type": "string",
+                        "description": "Subtema o consulta en texto libre"
+                    },
+                    "k": {
+                        "type": "integer",
+                        "description": "Cantidad de fragmentos",
+                        "default": 4
+                    }
+                },
+                "required": ["file_path", "query"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -203,7 +544,7 @@ TOOLS_SCHEMA = [
                 "properties": {
                     "file_path": {
                         "type": "string",
-                        "description": "Ruta al archivo"
+                        "description": "Ruta al archivo o directorio de documentos"
                     },
                     "search_term": {
                         "type": "string",
@@ -213,6 +554,25 @@ TOOLS_SCHEMA = [
                         "type": "boolean",
                         "description": "Distinguir mayúsculas",
                         "default": False
+                    },
+                    "normalize": {
+                        "type": "boolean",
+                        "description": "Ignorar acentos y mayúsculas (no aplica con case_sensitive)",
+                        "default": True
+                    },
+                    "stem": {
+                        "type": "boolean",
+                        "description": "Comparar raíces: singular/plural y masculino/femenino",
+                        "default": False
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Máximo de resultados por página",
+                        "default": DEFAULT_SEARCH_PAGE_SIZE
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor devuelto por la página anterior para continuar la búsqueda"
                     }
                 },
                 "required": ["file_path", "search_term"]
@@ -220,6 +580,44 @@ TOOLS_SCHEMA = [
         }
     },
     
+    {
+        "type": "function",
+        "function": {
+            "name": "search_many_in_text_file",
+            "description": "Busca varios términos en un archivo .txt en una sola pasada; los términos entre barras (/patrón/) son expresiones regulares",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {
+                        "type": "string",
+                        "description": "Ruta al archivo o directorio de documentos"
+                    },
+                    "search_terms": {
+                        "type": "array",
+                        "description": "Términos o /expresiones regulares/ a buscar",
+                        "items": {"type": "string"},
+                        "minItems": 1
+                    },
+                    "case_sensitive": {
+                        "type": "boolean",
+                        "description": "Distinguir mayúsculas",
+                        "default": False
+                    },
+                    "normalize": {
+                        "type": "boolean",
+                        "description": "Ignorar acentos y mayúsculas (no aplica con case_sensitive)",
+                        "default": True
+                    },
+                    "stem": {
+                        "type": "boolean",
+                        "description": "Comparar raíces: singular/plural y masculino/femenino",
+                        "default": False
+                    }
+                },
+                "required": ["file_path", "search_terms"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -245,7 +643,7 @@ TOOLS_SCHEMA = [
         "type": "function",
         "function": {
             "name": "list_multiple_choice_questions",
-            "description": "Lista las últimas preguntas registradas (sin revelar la respuesta correcta)",
+            "description": "Lista las últimas preguntas registradas, de la más reciente a la más antigua (sin revelar la respuesta correcta)",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -253,6 +651,10 @@ TOOLS_SCHEMA = [
                         "type": "integer",
                         "description": "Cantidad máxima a listar",
                         "default": 20
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor devuelto por la página anterior para seguir con preguntas más antiguas"
                     }
                 }
             }